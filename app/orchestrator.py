@@ -0,0 +1,614 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+import chess
+from app.shared_models import SharedModels
+from app.tracing import Tracer, UtteranceTrace
+from voice_input import move_parser as mp
+from voice_input.audio_capture import SAMPLE_RATE
+from voice_input.early_commit import EarlyCommit, partial_due
+from voice_output.text_to_speech import URGENT
+
+# Queue item marking the end of the audio source
+_DONE = None
+
+
+class Utterance:
+    """A captured segment (or partial) on its way through the pipeline."""
+
+    __slots__ = ("audio", "start", "partial", "trace", "text")
+
+    def __init__(self, audio, start: int, partial: bool = False,
+                 trace: Optional[UtteranceTrace] = None) -> None:
+        self.audio = audio
+        self.start = start
+        self.partial = partial
+        self.trace = trace
+        self.text = None
+
+
+# ---------------------------------------------------------
+# Dialogue
+# ---------------------------------------------------------
+class Session:
+    """
+    Dialogue state of one game and what each transcript does to it.
+
+    Whether we are waiting for a clarification, and for which move, is
+    explicit state here rather than module globals, so every handler
+    sees and updates the same values.
+
+    Args:
+        game: GameState (or LiChess) the moves are played on
+        tts: TextToSpeech used for feedback
+        tracer: Tracer for stage timings (in memory if not given)
+        name: Board name when several games are played at once (see
+            SessionManager); announcements about this game start with it
+        recorder: Optional SessionRecorder; the game, every finished
+            utterance and the server's moves are added to its log
+    """
+
+    IDLE = "idle"
+    CLARIFY_CASTLE = "clarify_castle"   # "Kingside or queenside?"
+    CLARIFY_SQUARE = "clarify_square"   # "Which knight?"
+
+    def __init__(self, game, tts, tracer: Optional[Tracer] = None, name: Optional[str] = None,
+                 recorder=None) -> None:
+        self.game = game
+        self.tts = tts
+        self.tracer = tracer or Tracer()
+        self.name = name
+        self.state = self.IDLE
+        self.pending_move = None
+        self.early = EarlyCommit(game.board, game.move_index)
+
+        self.recorder = recorder
+        self.record_game = None
+        self._result_recorded = False
+        if recorder is not None:
+            # Plies count from the board's root, so moves made before the
+            # session started go into the log too
+            self.record_game = recorder.start_game(game.board.root().fen(), board=name)
+            for ply, move in enumerate(game.board.move_stack):
+                recorder.move(self.record_game, ply, move.uci(), source="history")
+
+    @property
+    def waiting_for_clarification(self) -> bool:
+        return self.state != self.IDLE
+
+    @property
+    def prefix(self) -> str:
+        return f"Board {self.name}: " if self.name else ""
+
+    def route(self, text: str) -> tuple["Session", str]:
+        """Session a transcript is for: with a single game, always this one."""
+        return self, text
+
+    def _ask(self, state: str, move: Optional[str]) -> None:
+        self.state = state
+        self.pending_move = move
+
+    def _done(self) -> None:
+        self.state = self.IDLE
+        self.pending_move = None
+
+    def confirm_move(self, text: str) -> None:
+        """Confirm a move we just played (a tone in earcon mode)."""
+        self.tts.notify("check" if self.game.board.is_check() else "accepted", text)
+
+    def _game_over(self) -> bool:
+        if self.game.is_game_over():
+            self.tts.speak(f"{self.prefix}Game over. {self.game.get_result()}", priority=URGENT)
+            if self.recorder is not None and not self._result_recorded:
+                self._result_recorded = True
+                board = self.game.board
+                self.recorder.result(self.record_game, len(board.move_stack), board.result())
+            return True
+        return False
+
+    def finish(self, trace: UtteranceTrace, audio=None) -> dict:
+        """End an utterance's trace and add it to the session log."""
+        record = self.tracer.end(trace)
+        if self.recorder is not None:
+            board = self.game.board
+            ply = record.get("ply")
+            if ply is None:
+                ply = len(board.move_stack)
+            played = [move.uci() for move in board.move_stack[ply:]]
+            self.recorder.utterance(self.record_game, record, ply, played, board.fen(), audio)
+        return record
+
+    # ---------------------------------------------------------
+    # Commands
+    # ---------------------------------------------------------
+    def handle(self, text: str, intent_type: Optional[str],
+               trace: Optional[UtteranceTrace] = None) -> bool:
+        """
+        Act on a final transcript.
+
+        Args:
+            text: Transcript
+            intent_type: IntentClassifier prediction (unused while a
+                clarification is pending)
+            trace: Trace of the utterance
+
+        Returns:
+            False to stop listening (game over)
+        """
+        record = trace.record if trace else (lambda **fields: None)
+        # Position the command was given in, for the session log
+        record(ply=len(self.game.board.move_stack))
+
+        if self.waiting_for_clarification:
+            return self.handle_clarification(text, trace)
+
+        if intent_type == "move":
+            # Position-aware match first (handles near-miss transcripts), then
+            # the generic grammar so ambiguous moves still get a clarification
+            with self.tracer.stage("parse", trace):
+                parsed_move = self.game.resolve_spoken_move(text) or mp.parse_move(text)
+            record(move=parsed_move)
+
+            if not parsed_move:
+                record(outcome="unparsed")
+                self.tts.speak("Could not understand move. Please try again.")
+                return True
+
+            with self.tracer.stage("play", trace):
+                success, error = self.game.play_move(parsed_move)
+            record(outcome="played" if success else error)
+
+            if success:
+                self.confirm_move(f"Moved {parsed_move}")
+                return not self._game_over()
+            if error == "ambiguous":
+                self.tts.notify("ambiguous")
+                self.tts.speak(self.game.get_disambiguation_prompt(parsed_move))
+                self._ask(self.CLARIFY_SQUARE, parsed_move)
+            else:
+                self.tts.notify("illegal", "Invalid move")
+
+        elif intent_type == "castle":
+            with self.tracer.stage("parse", trace):
+                castle_result = self.game.parse_castling_intent(text)
+            record(move=castle_result if isinstance(castle_result, str) else None)
+
+            if castle_result is None:
+                record(outcome="illegal")
+                self.tts.speak("Castling is not legal in this position.")
+                return True
+
+            if isinstance(castle_result, tuple) and castle_result[0] == "ambiguous":
+                # Both castling options available - ask for clarification
+                record(outcome="ambiguous")
+                self.tts.notify("ambiguous")
+                self.tts.speak("Which side? Kingside or queenside?")
+                self._ask(self.CLARIFY_CASTLE, "castle")
+                return True
+
+            with self.tracer.stage("play", trace):
+                success, error = self.game.play_move(castle_result)
+            record(outcome="played" if success else error)
+
+            if success:
+                side = "queenside" if castle_result == "O-O-O" else "kingside"
+                self.confirm_move(f"Castled {side}")
+                return not self._game_over()
+            self.tts.notify("illegal", "Cannot castle.")
+
+        # TODO: Handle other intents (resign, draw, new_game, rematch, repeat)
+        return True
+
+    def handle_clarification(self, text: str, trace: Optional[UtteranceTrace] = None) -> bool:
+        """Answer to "Kingside or queenside?" / "Which knight?"."""
+        record = trace.record if trace else (lambda **fields: None)
+
+        if self.state == self.CLARIFY_CASTLE:
+            text_lower = text.lower()
+            if any(word in text_lower for word in ["kingside", "short", "king"]):
+                castle_move = "O-O"
+            elif any(word in text_lower for word in ["queenside", "long", "queen"]):
+                castle_move = "O-O-O"
+            else:
+                record(outcome="clarify_again")
+                self.tts.speak("Please say kingside or queenside.")
+                return True
+
+            with self.tracer.stage("play", trace):
+                success, error = self.game.play_move(castle_move)
+            record(move=castle_move, outcome="played" if success else error)
+            self._done()
+
+            if success:
+                side = "queenside" if castle_move == "O-O-O" else "kingside"
+                self.confirm_move(f"Castled {side}")
+                return not self._game_over()
+            self.tts.notify("illegal", "Cannot castle on that side.")
+            return True
+
+        from_square = mp.extract_square_disambiguation(text)
+        if not from_square:
+            record(outcome="clarify_again")
+            self.tts.speak("I didn't understand. Please say the square, like 'a1' or 'h8'.")
+            return True
+
+        with self.tracer.stage("play", trace):
+            success, error = self.game.handle_ambiguous_move(self.pending_move, from_square)
+        record(move=self.pending_move, outcome="played" if success else error)
+
+        if not success:
+            self.tts.speak("That square doesn't match any legal move. Please try again.")
+            return True
+
+        self.confirm_move(f"Moved {self.pending_move} from {from_square}")
+        self._done()
+        return not self._game_over()
+
+    def handle_partial(self, text: str, utterance: int) -> tuple[bool, bool]:
+        """
+        Play a move from a partial transcript once it is unambiguous.
+
+        Returns:
+            (played, running): played is True if the move was played (the
+            final transcript is skipped); running is False once the game is over
+        """
+        if self.waiting_for_clarification:
+            return False, True
+
+        move = self.early.update(text, utterance)
+        if move is None:
+            return False, True
+
+        trace = self.tracer.create(transcript=text, intent="move", move=move, early_commit=True,
+                                   ply=len(self.game.board.move_stack))
+        try:
+            with self.tracer.stage("play", trace):
+                success, error = self.game.play_move(move)
+            trace.record(outcome="played" if success else error)
+        finally:
+            self.finish(trace)
+
+        if not success:
+            return False, True
+        self.confirm_move(f"Moved {move}")
+        return True, not self._game_over()
+
+    # ---------------------------------------------------------
+    # Server
+    # ---------------------------------------------------------
+    def handle_event(self, event: dict) -> list[str]:
+        """Apply a server stream event and announce the opponent's move."""
+        moves = self.game.handle_event(event)
+        if not moves:
+            return moves
+
+        if self.recorder is not None:
+            stack = self.game.board.move_stack
+            first = len(stack) - len(moves)
+            for ply in range(first, len(stack)):
+                fen = self.game.board.fen() if ply == len(stack) - 1 else None
+                self.recorder.move(self.record_game, ply, stack[ply].uci(), fen)
+
+        # On (re)connect the whole game arrives at once: only the last
+        # move is news, and only if the opponent made it
+        mover = not self.game.board.turn
+        if mover != getattr(self.game, "player_color", mover):
+            colour = "White" if mover == chess.WHITE else "Black"
+            self.tts.speak(f"{self.prefix}{colour} played {moves[-1]}", priority=URGENT,
+                           key=f"opponent:{self.name}" if self.name else "opponent")
+        self._game_over()
+        return moves
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+class Orchestrator:
+    """
+    Event-driven voice pipeline on one asyncio loop.
+
+    Stages are tasks connected by bounded queues:
+
+        capture -> segments -> transcription -> transcripts -> commands
+        server stream -> events -> server events
+
+    A full queue makes the stage before it wait (backpressure) instead
+    of piling up work, while the capture thread keeps recording into its
+    ring buffer, so listening never stalls. Blocking calls run off the
+    loop: reading the capture in a single-thread executor, Whisper and
+    the intent encoder on the SharedModels workers. The game and
+    dialogue state are only changed from the loop thread, server events
+    included, under GameState.lock (which decoding holds while it reads
+    the board); speech output is queued on TextToSpeech's own worker and
+    never waited for.
+
+    Args:
+        recognizer: SpeechRecognizer (models loaded or loadable)
+        intent: IntentClassifier
+        session: Session holding the game and dialogue state, or a
+            SessionManager routing each command to one of several games
+            (its SharedModels are then used instead of recognizer/intent)
+        gate: Optional event set while TTS plays (TextToSpeech.speaking)
+        on_barge_in: Called when the user talks over the TTS
+        early_commit: Decode partial utterances and play moves as soon
+            as they are unambiguous (see EarlyCommit)
+        partial_interval: Seconds of new audio between partial decodes
+        partial_pause: Seconds of silence after which the utterance so far
+            is decoded once more; shorter than the capture's end silence,
+            so a move can be committed before the utterance is closed
+        queue_size: Capacity of each queue
+    """
+
+    def __init__(
+        self,
+        recognizer,
+        intent,
+        session: Session,
+        gate: Optional[threading.Event] = None,
+        on_barge_in: Optional[Callable[[], None]] = None,
+        early_commit: bool = False,
+        partial_interval: float = 0.3,
+        partial_pause: float = 0.1,
+        queue_size: int = 4
+    ) -> None:
+        self.recognizer = recognizer
+        self.intent = intent
+        self.session = session
+        self.tracer = session.tracer
+        self.gate = gate
+        self.on_barge_in = on_barge_in
+        self.early_commit = early_commit
+        self.partial_interval = partial_interval
+        self.partial_pause = partial_pause
+        self.queue_size = queue_size
+
+        self.models = getattr(session, "models", None)
+        self.followed = []
+        self._loop = None
+        self._stopping = None
+        self._closed = threading.Event()
+        # Start offset of the utterance already acted on from a partial
+        self._committed = None
+
+    def follow(self, game_id: str, session: Optional[Session] = None) -> None:
+        """
+        Stream a Lichess game into the pipeline once run() starts.
+
+        Args:
+            game_id: Lichess game id
+            session: Session of that game (default: the orchestrator's own)
+        """
+        self.followed.append((game_id, session or self.session))
+
+    def stop(self) -> None:
+        """Ask run() to finish (safe from any thread)."""
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def run(self, source=None) -> None:
+        """
+        Listen and handle commands until stopped, the game ends or the
+        source (e.g. a FileSource in tests) is exhausted. If a stage fails,
+        the pipeline is shut down and its exception raised from here.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._closed.clear()
+        self.segments = asyncio.Queue(self.queue_size)
+        self.transcripts = asyncio.Queue(self.queue_size)
+        self.events = asyncio.Queue(self.queue_size)
+
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture-reader")
+        models = self.models or SharedModels(self.recognizer, self.intent, max_batch=1)
+
+        capture = self.recognizer.capture(source, gate=self.gate, on_barge_in=self.on_barge_in)
+        capture.start()
+        for game_id, session in self.followed:
+            session.game.start_stream(game_id, on_event=functools.partial(self._post_event, session=session))
+        print("Listening...")
+
+        tasks = [
+            asyncio.create_task(self._capture(capture), name="capture"),
+            asyncio.create_task(self._transcribe(models), name="transcribe"),
+            asyncio.create_task(self._commands(models), name="commands"),
+            asyncio.create_task(self._server_events(), name="server-events"),
+        ]
+        stopping = asyncio.create_task(self._stopping.wait(), name="stopping")
+        failed = None
+        try:
+            # Stages return on their own once the source is exhausted; only
+            # stopping or a stage raising ends the run
+            pending = set(tasks) | {stopping}
+            while failed is None and not stopping.done():
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                failed = next((task for task in done if task is not stopping
+                               and not task.cancelled() and task.exception() is not None), None)
+        finally:
+            self._closed.set()
+            stopping.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for _, session in self.followed:
+                session.game.stop_stream()
+            capture.stop()
+            # A decode in flight cannot be cancelled; don't wait for it
+            self._reader.shutdown(wait=False)
+            if models is not self.models:
+                models.close(wait=False)
+        if failed is not None:
+            print(f"Pipeline stage {failed.get_name()} failed: {failed.exception()!r}")
+            raise failed.exception()
+
+    # ---------------------------------------------------------
+    # Stages
+    # ---------------------------------------------------------
+    async def _capture(self, capture) -> None:
+        decoded = (None, 0)  # utterance, samples already sent for partial decoding
+        while True:
+            segment = await self._loop.run_in_executor(
+                self._reader, capture.next_segment, self.partial_pause / 2
+            )
+            if segment is not None:
+                start, end, speech_end = capture.last_bounds
+                trace = self.tracer.create(
+                    audio_seconds=round(len(segment) / SAMPLE_RATE, 3),
+                    endpoint_ms=round(1000 * (end - speech_end) / SAMPLE_RATE, 1)
+                )
+                await self.segments.put(Utterance(segment, start, trace=trace))
+                continue
+
+            if capture.finished:
+                await self.segments.put(_DONE)
+                return
+            if not self.early_commit:
+                continue
+
+            # Still speaking: offer what we have so far, if there is room
+            current = capture.partial()
+            if current is None or current[0] == self._committed:
+                continue
+            start, samples = current
+            seen = decoded[1] if decoded[0] == start else 0
+            due = partial_due(len(samples), seen, capture.trailing_silence,
+                              int(self.partial_interval * SAMPLE_RATE), int(self.partial_pause * SAMPLE_RATE))
+            if not due or self.segments.full():
+                continue
+            decoded = (start, len(samples))
+            self.segments.put_nowait(Utterance(samples, start, partial=True))
+
+    async def _transcribe(self, models: SharedModels) -> None:
+        while True:
+            utterance = await self.segments.get()
+            if utterance is _DONE:
+                await self.transcripts.put(_DONE)
+                return
+            if utterance.start == self._committed:
+                self._finish(utterance, outcome="early_committed")
+                continue
+
+            stage = "stt_partial" if utterance.partial else "stt"
+            try:
+                with self.tracer.stage(stage, utterance.trace, profile=False):
+                    utterance.text = await asyncio.wrap_future(
+                        models.transcribe(utterance.audio, escalate=not utterance.partial,
+                                          tracer=self.tracer, stage=stage)
+                    )
+            except Exception as e:
+                print(f"Error during speech recognition: {e}")
+                self._finish(utterance, outcome="stt_error")
+                continue
+
+            if utterance.partial:
+                # Partials are only worth anything while they are fresh
+                if utterance.text and not self.transcripts.full():
+                    self.transcripts.put_nowait(utterance)
+                continue
+
+            utterance.trace.record(transcript=utterance.text)
+            if getattr(models.recognizer, "cascade", None):
+                utterance.trace.record(stt_tier=models.recognizer.cascade.last_tier)
+            await self.transcripts.put(utterance)
+
+    async def _commands(self, models: SharedModels) -> None:
+        while True:
+            utterance = await self.transcripts.get()
+            if utterance is _DONE:
+                self._stopping.set()
+                return
+
+            if utterance.partial:
+                session, text = self.session.route(utterance.text)
+                if not text:
+                    continue
+                try:
+                    with session.game.lock:
+                        played, running = session.handle_partial(text, utterance.start)
+                except Exception as e:
+                    # The final transcript gets another go
+                    print(f"Error handling partial transcript {text!r}: {e!r}")
+                    continue
+                if played:
+                    self._committed = utterance.start
+                if not running and session is self.session:
+                    self._stopping.set()
+                    return
+                continue
+
+            if utterance.start == self._committed:
+                self._finish(utterance, outcome="early_committed")
+                continue
+            if not utterance.text:
+                self._finish(utterance, outcome="no_speech")
+                continue
+
+            trace = utterance.trace
+            session = None
+            try:
+                session, text = self.session.route(utterance.text)
+                if session.name:
+                    trace.record(board=session.name)
+                if not text:
+                    # Only a board name: switch to it
+                    trace.record(outcome="switched")
+                    session.tts.speak(f"Board {session.name}")
+                    continue
+
+                try:
+                    intent_type = None
+                    if not session.waiting_for_clarification:
+                        with self.tracer.stage("intent", trace, profile=False):
+                            intent_type, score, path = await asyncio.wrap_future(
+                                models.classify(text, tracer=self.tracer)
+                            )
+                        trace.record(intent=intent_type, intent_score=score, intent_path=path)
+
+                    with session.game.lock:
+                        running = session.handle(text, intent_type, trace)
+                except Exception as e:
+                    # One bad command must not take the pipeline down
+                    print(f"Error handling command {text!r}: {e!r}")
+                    trace.record(outcome="error")
+                    session.tts.speak(f"{session.prefix}Sorry, something went wrong with that command.")
+                    continue
+                # With several boards, the others carry on after a game ends
+                if not running and session is self.session:
+                    self._stopping.set()
+                    return
+            finally:
+                if session is None:
+                    self.tracer.end(trace)
+                else:
+                    session.finish(trace, utterance.audio)
+
+    async def _server_events(self) -> None:
+        while True:
+            session, event = await self.events.get()
+            try:
+                with session.game.lock:
+                    session.handle_event(event)
+            except Exception as e:
+                print(f"Error applying server event: {e}")
+
+    def _finish(self, utterance: Utterance, **fields) -> None:
+        if utterance.trace is not None:
+            utterance.trace.record(**fields)
+            self.tracer.end(utterance.trace)
+
+    def _post_event(self, event: dict, session: Optional[Session] = None) -> None:
+        # Runs on the stream thread: wait for room in the queue, which
+        # slows reading the stream down instead of dropping events
+        item = (session or self.session, event)
+        try:
+            future = asyncio.run_coroutine_threadsafe(self.events.put(item), self._loop)
+        except RuntimeError:
+            return  # loop already closed
+        while not self._closed.is_set():
+            try:
+                future.result(timeout=0.5)
+                return
+            except FutureTimeout:
+                continue
+        future.cancel()
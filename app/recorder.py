@@ -0,0 +1,504 @@
+"""
+Append-only session log: what was said, understood and played.
+
+Usage:
+    python -m app.recorder games sessions/
+    python -m app.recorder show sessions/ --game 3 --ply 12
+    python -m app.recorder pgn sessions/ [--game 3] [-o games.pgn]
+    python -m app.recorder replay sessions/ [--game 3 --backend ngram --audio]
+
+A session directory holds three files, each only ever appended to:
+
+    log.jsonl   one compact JSON record per line: game starts, utterances
+                (transcript, intent, parsed move, outcome, stage timings,
+                moves played, resulting position), server moves, results
+    index.bin   (game, ply, byte offset in log.jsonl) per record, for
+                random access by game and ply
+    audio.pcm   16-bit PCM of recorded utterances, referenced by sample
+                offset from their log record
+
+A record's ply is the number of half-moves on the board when it happened,
+so everything said in one position shares a ply. `pgn` exports games
+with the recognition details of each move in its comment; `replay`
+re-runs the recorded transcripts (or, with --audio, the recorded audio
+through Whisper) through the current intent classifier and Session and
+reports changed outcomes and stage timings against the recording.
+"""
+import argparse
+import json
+import queue
+import struct
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Optional
+
+import chess
+import chess.pgn
+import numpy as np
+
+LOG = "log.jsonl"
+INDEX = "index.bin"
+AUDIO = "audio.pcm"
+
+_ENTRY = struct.Struct("<IIQ")
+INDEX_DTYPE = np.dtype([("game", "<u4"), ("ply", "<u4"), ("offset", "<u8")])
+
+
+def _line(record: dict) -> bytes:
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _read_index(path: Path) -> np.ndarray:
+    if not path.exists():
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    data = path.read_bytes()
+    # A crash can leave half an entry at the end
+    return np.frombuffer(data[:len(data) - len(data) % _ENTRY.size], dtype=INDEX_DTYPE)
+
+
+# ---------------------------------------------------------
+# Writing
+# ---------------------------------------------------------
+class SessionRecorder:
+    """
+    Writes the session log.
+
+    Every method only queues its record; a background thread appends
+    them (audio, then log line, then index entry), so the command path
+    never waits for the disk. Opening an existing directory continues its
+    log, first dropping a line cut off by a crash and indexing any
+    records the index missed.
+
+    Args:
+        directory: Session directory (created if missing)
+        keep_audio: Also store the audio of each utterance
+    """
+
+    def __init__(self, directory: str | Path, keep_audio: bool = True) -> None:
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.keep_audio = keep_audio
+
+        self._games = self._repair()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write, name="recorder", daemon=True)
+        self._thread.start()
+
+    def _repair(self) -> int:
+        """Make log and index agree; returns the last game number used."""
+        log, index = self.dir / LOG, self.dir / INDEX
+        if not log.exists():
+            index.unlink(missing_ok=True)
+            return 0
+
+        data = log.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with open(log, "r+b") as f:
+                f.truncate(end)
+
+        entries = _read_index(index)
+        entries = entries[entries["offset"] < end]
+        with open(index, "r+b" if index.exists() else "wb") as f:
+            f.truncate(entries.nbytes)
+            f.seek(0, 2)
+            # Records whose line made it to the log but whose entry didn't
+            position = data.index(b"\n", int(entries["offset"][-1])) + 1 if len(entries) else 0
+            games = int(entries["game"].max()) if len(entries) else 0
+            while position < end:
+                next_line = data.index(b"\n", position) + 1
+                record = json.loads(data[position:next_line])
+                f.write(_ENTRY.pack(record["game"], record["ply"], position))
+                games = max(games, record["game"])
+                position = next_line
+        return games
+
+    def _put(self, record: dict, audio=None) -> None:
+        record.setdefault("time", round(time.time(), 3))
+        self._queue.put((record, audio))
+
+    def start_game(self, fen: str = chess.STARTING_FEN, **fields) -> int:
+        """
+        Open a new game in the log.
+
+        Args:
+            fen: Starting position
+            fields: Extra header fields (board name, Lichess game id...)
+
+        Returns:
+            The game number used by the other methods
+        """
+        with self._lock:
+            self._games += 1
+            game = self._games
+        self._put({"type": "game", "game": game, "ply": 0, "fen": fen, **fields})
+        return game
+
+    def utterance(self, game: int, trace: dict, ply: int, played: list[str], fen: str, audio=None) -> None:
+        """
+        Record a handled utterance.
+
+        Args:
+            game: Game number from start_game()
+            trace: Finished trace (Tracer.end()): transcript, intent,
+                move, outcome, stage timings...
+            ply: Half-moves on the board when it was handled
+            played: UCI of the moves it played (usually zero or one)
+            fen: Position afterwards
+            audio: float32 audio of the utterance, stored if keep_audio
+        """
+        record = {"type": "utterance", "game": game, "ply": ply}
+        record.update((k, v) for k, v in trace.items() if k != "utterance" and v is not None)
+        record.update(played=played, fen=fen)
+        self._put(record, audio if self.keep_audio else None)
+
+    def move(self, game: int, ply: int, uci: str, fen: Optional[str] = None, source: str = "server") -> None:
+        """Record a move that did not come from an utterance (e.g. the opponent's)."""
+        record = {"type": "move", "game": game, "ply": ply, "uci": uci, "source": source}
+        if fen is not None:
+            record["fen"] = fen
+        self._put(record)
+
+    def result(self, game: int, ply: int, result: str) -> None:
+        self._put({"type": "result", "game": game, "ply": ply, "result": result})
+
+    def flush(self) -> None:
+        """Wait until everything queued so far is on disk."""
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write(self) -> None:
+        audio_file = open(self.dir / AUDIO, "ab") if self.keep_audio else None
+        with open(self.dir / LOG, "ab") as log, open(self.dir / INDEX, "ab") as index:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                entries, waiting = [], []
+                for item in batch:
+                    if item is None:
+                        running = False
+                        continue
+                    record, audio = item
+                    if record is None:
+                        waiting.append(audio)  # flush() marker
+                        continue
+                    if audio is not None and audio_file is not None:
+                        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+                        record["audio"] = [audio_file.tell() // 2, len(pcm)]
+                        audio_file.write(pcm.tobytes())
+                    entries.append(_ENTRY.pack(record["game"], record["ply"], log.tell()))
+                    log.write(_line(record))
+
+                # Index entries never point past what is in the log
+                if audio_file is not None:
+                    audio_file.flush()
+                log.flush()
+                index.write(b"".join(entries))
+                index.flush()
+                for done in waiting:
+                    done.set()
+        if audio_file is not None:
+            audio_file.close()
+
+
+# ---------------------------------------------------------
+# Reading
+# ---------------------------------------------------------
+class SessionLog:
+    """
+    Random access to a session directory written by SessionRecorder.
+    Records are found through the index, so only the lines asked for are
+    read. Records written after opening are not seen; open it again.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.dir = Path(directory)
+        self.index = _read_index(self.dir / INDEX)
+
+    def _read(self, offsets) -> list[dict]:
+        records = []
+        with open(self.dir / LOG, "rb") as f:
+            for offset in offsets:
+                f.seek(int(offset))
+                records.append(json.loads(f.readline()))
+        return records
+
+    def games(self) -> list[dict]:
+        """The start record of every game."""
+        _, first = np.unique(self.index["game"], return_index=True)
+        return self._read(self.index["offset"][np.sort(first)])
+
+    def records(self, game: Optional[int] = None, ply: Optional[int] = None) -> list[dict]:
+        """Records of a game (and ply), in the order they were written."""
+        mask = np.ones(len(self.index), dtype=bool)
+        if game is not None:
+            mask &= self.index["game"] == game
+        if ply is not None:
+            mask &= self.index["ply"] == ply
+        return self._read(self.index["offset"][mask])
+
+    def audio(self, record: dict) -> Optional[np.ndarray]:
+        """float32 audio of an utterance record, if it was kept."""
+        if "audio" not in record:
+            return None
+        offset, samples = record["audio"]
+        pcm = np.fromfile(self.dir / AUDIO, dtype="<i2", count=samples, offset=2 * offset)
+        return pcm.astype(np.float32) / 32768
+
+    def to_pgn(self, game: int) -> str:
+        """
+        The game as PGN. Each move's comment says how it was recognized;
+        utterances that played nothing are listed with the move that
+        followed them.
+        """
+        records = self.records(game)
+        if not records:
+            raise LookupError(f"No game {game} in {self.dir}")
+        header = records[0]
+
+        line = []                       # UCI moves from the start position
+        notes = {}                      # ply -> how that move was recognized
+        attempts = defaultdict(list)    # ply -> utterances that played nothing
+        result = "*"
+        for record in records[1:]:
+            line = _advance(line, record)
+            if record["type"] == "utterance":
+                if record.get("played"):
+                    notes[record["ply"]] = describe(record)
+                else:
+                    attempts[record["ply"]].append(describe(record))
+            elif record["type"] == "move":
+                notes[record["ply"]] = record.get("source", "server")
+            elif record["type"] == "result":
+                result = record["result"]
+
+        pgn = chess.pgn.Game()
+        pgn.headers["Event"] = "HandsFreeChess session"
+        pgn.headers["Date"] = time.strftime("%Y.%m.%d", time.localtime(header["time"]))
+        pgn.headers["Round"] = str(game)
+        if header.get("board"):
+            pgn.headers["Board"] = str(header["board"])
+        if header.get("site"):
+            pgn.headers["Site"] = f"https://lichess.org/{header['site']}"
+        if header["fen"] != chess.STARTING_FEN:
+            pgn.setup(header["fen"])
+        pgn.headers["Result"] = result
+
+        node, board = pgn, pgn.board()
+        for ply, uci in enumerate(line):
+            move = chess.Move.from_uci(uci)
+            if move not in board.legal_moves:
+                node.comment = f"{node.comment} (log continues with illegal {uci})".strip()
+                break
+            node = node.add_variation(move)
+            board.push(move)
+            node.comment = "; ".join(filter(None, attempts.get(ply, []) + [notes.get(ply)]))
+        if attempts.get(len(line)):
+            node.comment = "; ".join(filter(None, [node.comment] + attempts[len(line)]))
+        return str(pgn)
+
+
+def _advance(line: list[str], record: dict) -> list[str]:
+    """
+    Moves from the start after a record. Records carry the ply they were
+    made at, so a takeback or a server resync simply cuts the line there.
+    """
+    if record["type"] == "utterance" and record.get("played"):
+        return line[:record["ply"]] + record["played"]
+    if record["type"] == "move":
+        return line[:record["ply"]] + [record["uci"]]
+    return line
+
+
+def describe(record: dict) -> str:
+    """One-line summary of an utterance record, e.g. for PGN comments."""
+    parts = [f"\"{record.get('transcript') or ''}\""]
+    if record.get("intent"):
+        score = record.get("intent_score")
+        parts.append(f"{record['intent']} {score:.2f}" if score is not None else record["intent"])
+    parts.append(record.get("outcome") or "none")
+    if record.get("early_commit"):
+        parts.append("early")
+    stages = record.get("stages_ms", {})
+    if "stt" in stages:
+        parts.append(f"stt {stages['stt']:.0f} ms")
+    if "total_ms" in record:
+        parts.append(f"total {record['total_ms']:.0f} ms")
+    return " ".join(parts)
+
+
+# ---------------------------------------------------------
+# Replay
+# ---------------------------------------------------------
+class _SilentTTS:
+    def speak(self, text, priority=None, key=None):
+        pass
+
+    def notify(self, event, text=None, priority=None):
+        pass
+
+
+def replay(log: SessionLog, game: int, intent,
+           transcribe: Optional[Callable[[np.ndarray, chess.Board], Optional[str]]] = None) -> list[dict]:
+    """
+    Re-run the utterances of a recorded game through the current pipeline.
+
+    The board is put back in the recorded position before every
+    utterance (server moves and the recorded moves are replayed in
+    between), so one changed outcome does not derail the rest of the game.
+
+    Args:
+        log: SessionLog to read from
+        game: Game number
+        intent: IntentClassifier (or anything with predict())
+        transcribe: Optional transcribe(audio, board) -> text to decode
+            the recorded audio again; otherwise the recorded transcripts
+            are used
+
+    Returns:
+        Per utterance: ply, recorded and replayed transcript/outcome/moves,
+        whether the result changed, and both sets of stage timings (ms)
+    """
+    from app.orchestrator import Session
+    from app.tracing import Tracer
+    from chess_rules.game_interface import GameState
+
+    records = log.records(game)
+    start_fen = records[0]["fen"]
+    state = GameState()
+    state.update_from_fen(start_fen)
+    tracer = Tracer()
+    session = Session(state, _SilentTTS(), tracer)
+
+    line, results = [], []
+    for record in records[1:]:
+        if record["type"] == "utterance":
+            ply = record["ply"]
+            if [m.uci() for m in state.board.move_stack] != line[:ply]:
+                state.update_from_fen(start_fen)
+                for uci in line[:ply]:
+                    state.board.push_uci(uci)
+                state.move_index.update()
+
+            trace = tracer.create()
+            text = record.get("transcript")
+            audio = log.audio(record)
+            if transcribe is not None and audio is not None:
+                with tracer.stage("stt", trace):
+                    text = transcribe(audio, state.board)
+            trace.record(transcript=text)
+
+            if text:
+                intent_type = None
+                if not session.waiting_for_clarification:
+                    with tracer.stage("intent", trace):
+                        intent_type = intent.predict(text)
+                    trace.record(intent=intent_type)
+                session.handle(text, intent_type, trace)
+            else:
+                trace.record(outcome="no_speech")
+            replayed = tracer.end(trace)
+
+            played = [m.uci() for m in state.board.move_stack[ply:]]
+            results.append({
+                "ply": ply,
+                "recorded": {k: record.get(k) for k in ("transcript", "intent", "outcome", "played")},
+                "replayed": {"transcript": text, "intent": replayed["intent"],
+                             "outcome": replayed["outcome"], "played": played},
+                "changed": played != record.get("played", []) or replayed["outcome"] != record.get("outcome"),
+                "recorded_ms": record.get("stages_ms", {}),
+                "replayed_ms": replayed["stages_ms"],
+            })
+        line = _advance(line, record)
+    return results
+
+
+def _replay_report(results: list[dict]) -> str:
+    changed = [r for r in results if r["changed"]]
+    lines = [f"{len(results)} utterances, {len(changed)} with a different outcome"]
+    for r in changed:
+        before, after = r["recorded"], r["replayed"]
+        lines.append(f"  ply {r['ply']:>3} \"{before['transcript']}\": {before['outcome']} {before['played']}"
+                     f" -> \"{after['transcript']}\": {after['outcome']} {after['played']}")
+
+    lines.append(f"{'stage':>8} {'recorded ms':>12} {'replayed ms':>12}")
+    for stage in ("stt", "intent", "parse", "play"):
+        recorded = [r["recorded_ms"][stage] for r in results if stage in r["recorded_ms"]]
+        replayed = [r["replayed_ms"][stage] for r in results if stage in r["replayed_ms"]]
+        if recorded or replayed:
+            cell = lambda values: f"{np.mean(values):.2f}" if values else "-"
+            lines.append(f"{stage:>8} {cell(recorded):>12} {cell(replayed):>12}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["games", "show", "pgn", "replay"])
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--game", type=int, help="Game number (default: all games)")
+    parser.add_argument("--ply", type=int, help="show: only records made at this ply")
+    parser.add_argument("-o", "--output", type=Path, help="pgn: write to a file")
+    parser.add_argument("--backend", default="minilm", help="replay: intent encoder")
+    parser.add_argument("--audio", action="store_true", help="replay: decode the recorded audio again")
+    parser.add_argument("--model", default="Systran/faster-whisper-tiny.en", help="replay --audio: Whisper model")
+    args = parser.parse_args()
+
+    if not (args.directory / LOG).exists():
+        raise SystemExit(f"No session log in {args.directory}")
+    log = SessionLog(args.directory)
+    games = [args.game] if args.game else [header["game"] for header in log.games()]
+
+    if args.command == "games":
+        for header in log.games():
+            records = len(log.records(header["game"]))
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(header["time"]))
+            print(f"{header['game']:>4}  {started}  {records:>4} records  board {header.get('board') or '-'}")
+
+    elif args.command == "show":
+        for game in games:
+            for record in log.records(game, args.ply):
+                print(json.dumps(record))
+
+    elif args.command == "pgn":
+        text = "\n\n".join(log.to_pgn(game) for game in games) + "\n"
+        if args.output:
+            args.output.write_text(text, encoding="utf-8")
+            print(f"{len(games)} games written to {args.output}")
+        else:
+            print(text)
+
+    else:
+        from voice_input.intent_classifier import IntentClassifier
+        intent = IntentClassifier(backend=args.backend)
+        transcribe = None
+        if args.audio:
+            from faster_whisper import WhisperModel
+            from voice_input.speech_to_text import transcribe as whisper_transcribe
+            from chess_rules.spoken_moves import DecodingContext
+            model = WhisperModel(args.model, device="cpu", compute_type="int8", cpu_threads=4, num_workers=1)
+            context = DecodingContext()
+
+            def transcribe(audio, board):
+                return whisper_transcribe(model, audio, hints=context.get(board))
+
+        for game in games:
+            print(f"Game {game}")
+            print(_replay_report(replay(log, game, intent, transcribe)))
+
+
+if __name__ == "__main__":
+    main()
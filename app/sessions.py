@@ -0,0 +1,143 @@
+import asyncio
+import re
+import threading
+from typing import Optional
+from app.orchestrator import Session
+from app.shared_models import SharedModels
+from app.tracing import Tracer, UtteranceTrace
+
+# Spoken board numbers, with the usual Whisper mishearings
+NUMBER_WORDS = {
+    "one": 1, "won": 1, "two": 2, "to": 2, "too": 2, "three": 3, "tree": 3,
+    "four": 4, "for": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "ate": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17,
+    "eighteen": 18, "nineteen": 19, "twenty": 20,
+}
+
+_BOARD_RE = re.compile(r"^\W*(?:on\s+)?(?:board|game)\s+(?:number\s+)?([a-z0-9]+)\W*(.*)$", re.IGNORECASE)
+
+
+def parse_board(text: str) -> tuple[Optional[str], str]:
+    """
+    Split a leading board selector off a transcript.
+
+    "Board two, knight f3" -> ("2", "knight f3");
+    "on board alice castle" -> ("alice", "castle");
+    "knight f3" -> (None, "knight f3")
+    """
+    match = _BOARD_RE.match(text)
+    if not match:
+        return None, text
+    word, rest = match.group(1).lower(), match.group(2).strip()
+    return str(NUMBER_WORDS.get(word, word)), rest
+
+
+class SessionManager:
+    """
+    Several games played by voice at once (simultaneous exhibitions,
+    correspondence games).
+
+    Every game gets its own Session, so boards, validators, move indexes
+    and pending clarifications are kept apart, while Whisper and the
+    intent encoder are loaded once and shared through SharedModels. A
+    command goes to the board it names ("board two, knight f3") and
+    otherwise to the board spoken to last, whose legal moves also prime
+    Whisper. Pass the manager to Orchestrator in place of a Session.
+
+    Args:
+        models: SharedModels every session uses
+        tts: TextToSpeech used for feedback
+        tracer: Tracer for stage timings (in memory if not given)
+        recorder: Optional SessionRecorder every game is logged to
+    """
+
+    def __init__(self, models: SharedModels, tts, tracer: Optional[Tracer] = None, recorder=None) -> None:
+        self.models = models
+        self.tts = tts
+        self.tracer = tracer or Tracer()
+        self.recorder = recorder
+        self.sessions: dict[str, Session] = {}
+        self.focus: Optional[Session] = None
+
+        # One lock for all boards: the decoder reads whichever board has
+        # focus, and focus changes between utterances
+        self.lock = threading.RLock()
+        models.recognizer.board_lock = self.lock
+        self._numbered = 0
+
+    def add(self, game, name: Optional[str] = None) -> Session:
+        """
+        Start managing a game.
+
+        Args:
+            game: GameState (or LiChess) of the new board
+            name: Spoken name of the board (default: its number, "1", "2", ...)
+
+        Returns:
+            The game's Session
+        """
+        if name is None:
+            self._numbered += 1
+            name = str(self._numbered)
+        name = name.lower()
+        if name in self.sessions:
+            raise ValueError(f"Board {name} already exists")
+
+        game.lock = self.lock
+        session = Session(game, self.tts, self.tracer, name=name, recorder=self.recorder)
+        self.sessions[name] = session
+        if self.focus is None:
+            self._set_focus(session)
+        return session
+
+    def remove(self, name: str) -> Session:
+        session = self.sessions.pop(name.lower())
+        if session is self.focus:
+            self._set_focus(next(iter(self.sessions.values()), None))
+        return session
+
+    def _set_focus(self, session: Optional[Session]) -> None:
+        self.focus = session
+        self.models.recognizer.board = session.game.board if session else None
+
+    def route(self, text: str) -> tuple[Session, str]:
+        """
+        Session a transcript is for, and the command without the board
+        name. Naming a board also gives it focus.
+        """
+        name, rest = parse_board(text)
+        if name in self.sessions:
+            self._set_focus(self.sessions[name])
+            return self.focus, rest
+        if self.focus is None:
+            raise LookupError("No game sessions")
+        return self.focus, text
+
+    async def command(self, text: str, name: Optional[str] = None,
+                      trace: Optional[UtteranceTrace] = None) -> bool:
+        """
+        Handle one transcript through the shared models.
+
+        Args:
+            text: Transcript
+            name: Board it is for, when the caller already knows (e.g. a
+                client bound to one game); otherwise routed by route()
+            trace: Trace of the utterance
+
+        Returns:
+            False once that board's game is over
+        """
+        if name is not None:
+            session = self.sessions[name.lower()]
+        else:
+            session, text = self.route(text)
+            if not text:
+                self.tts.speak(f"Board {session.name}")
+                return True
+
+        intent_type = None
+        if not session.waiting_for_clarification:
+            intent_type, _, _ = await asyncio.wrap_future(self.models.classify(text, tracer=self.tracer))
+        with self.lock:
+            return session.handle(text, intent_type, trace)
@@ -0,0 +1,141 @@
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import ExitStack
+from typing import Callable, Optional
+
+
+class BatchWorker:
+    """
+    A single thread in front of a shared model.
+
+    Requests from every caller queue up here. Whenever the model is free,
+    everything waiting (up to max_batch) goes in as one batch, so batches
+    grow with load without ever holding a lone request back.
+
+    A request may name a Tracer and stage; the batch then runs inside
+    Tracer.profiling(stage), so the profiler samples this thread (where
+    the model actually runs) rather than the caller waiting on it.
+
+    Args:
+        run_batch: run_batch(items) -> one result per item
+        max_batch: Most items per run_batch() call
+        name: Thread name
+    """
+
+    def __init__(self, run_batch: Callable[[list], list], max_batch: int = 16, name: str = "model") -> None:
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item, tracer=None, stage: Optional[str] = None) -> Future:
+        future = Future()
+        self._requests.put((item, future, (tracer, stage) if tracer is not None and stage else None))
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """Stop after the requests already queued."""
+        self._requests.put(None)
+        if wait:
+            self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self) -> None:
+        closing = False
+        while not closing:
+            request = self._requests.get()
+            if request is None:
+                return
+
+            batch = [request]
+            while len(batch) < self.max_batch:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+
+            batch = [request for request in batch if request[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                with ExitStack() as profiling:
+                    for tracer, stage in {request[2] for request in batch if request[2]}:
+                        profiling.enter_context(tracer.profiling(stage))
+                    results = self.run_batch([item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+class SharedModels:
+    """
+    One Whisper model and one intent encoder for every game session.
+
+    Each model sits behind its own BatchWorker, so sessions never load
+    copies of their own and Whisper is only used from the "stt" thread.
+    The intent classifier can also be called directly (e.g. by a
+    DecodingCascade accept check running on that thread); it locks its
+    own cache and counters. Intent requests that arrive together are classified with one
+    IntentClassifier.predict_batch() call. Whisper transcripts are
+    decoded one at a time: every utterance has its own audio length and
+    legal-move prompt, and faster-whisper's batched pipeline only batches
+    chunks of a single recording.
+
+    Args:
+        recognizer: SpeechRecognizer (models loaded or loadable)
+        intent: IntentClassifier
+        max_batch: Most transcripts per intent batch
+    """
+
+    def __init__(self, recognizer, intent, max_batch: int = 16) -> None:
+        self.recognizer = recognizer
+        self.intent = intent
+        self.whisper = BatchWorker(self._transcribe_batch, max_batch=1, name="stt")
+        self.encoder = BatchWorker(self._classify_batch, max_batch=max_batch, name="intent")
+
+    def transcribe(self, audio, escalate: bool = True, tracer=None, stage: str = "stt") -> Future:
+        """
+        Future of SpeechRecognizer.transcribe(audio, escalate); the decode
+        is profiled as `stage` by `tracer`, if given.
+        """
+        return self.whisper.submit((audio, escalate), tracer, stage)
+
+    def classify(self, text: str, tracer=None, stage: str = "intent") -> Future:
+        """Future of (intent or None, score, route) for a transcript."""
+        return self.encoder.submit(text, tracer, stage)
+
+    def close(self, wait: bool = True) -> None:
+        # A decode in flight cannot be cancelled; wait=False leaves it be
+        self.whisper.close(wait)
+        self.encoder.close(wait)
+
+    def stats(self) -> dict:
+        return {"stt": self.whisper.stats(), "intent": self.encoder.stats()}
+
+    def _transcribe_batch(self, items: list[tuple]) -> list[Optional[str]]:
+        return [self.recognizer.transcribe(audio, escalate) for audio, escalate in items]
+
+    def _classify_batch(self, texts: list[str]) -> list[tuple]:
+        intents = self.intent.predict_batch(texts)
+        return list(zip(intents, self.intent.last_scores, self.intent.last_paths))
@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Optional
+
+
+class ModelWarmup:
+    """
+    Load models concurrently on background threads.
+
+    Each component must provide load_model() and warmup() (see 
+    SpeechRecognizer and IntentClassifier) and may expose load_timings with
+    "import"/"load" entries. The first-inference cost is measured here.
+    A component that raises is listed in `errors` (and in report());
+    retry() loads just those again.
+
+    Args:
+        components: Mapping of display name -> component
+    """
+
+    def __init__(self, components: dict) -> None:
+        self.components = components
+        self.timings = {name: {} for name in components}
+        self.errors = {}
+        self._threads = []
+        self._ready = threading.Event()
+        self._start = None
+        self._elapsed = None
+
+    def record(self, name: str, stage: str, seconds: float) -> None:
+        """Add a timing that was measured elsewhere (e.g. app imports)."""
+        self.timings.setdefault(name, {})[stage] = seconds
+
+    def start(self, names: Optional[list[str]] = None) -> None:
+        """
+        Start one loader thread per component and return immediately.
+
+        Args:
+            names: Only load these components (default: all)
+        """
+        self._start = time.perf_counter()
+        self._ready.clear()
+        self._threads = []
+        for name in names or list(self.components):
+            component = self.components[name]
+            self.errors.pop(name, None)
+            thread = threading.Thread(
+                target=self._load, args=(name, component), name=f"warmup-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        threading.Thread(target=self._join, name="warmup", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every component is warm. Returns False on timeout."""
+        return self._ready.wait(timeout)
+
+    def retry(self) -> None:
+        """Load the components that failed again, in the background."""
+        self.start(list(self.errors))
+
+    @property
+    def ready(self) -> bool:
+        """Loading has finished, successfully or not (see errors)."""
+        return self._ready.is_set()
+
+    @property
+    def ok(self) -> bool:
+        """Every component loaded and warmed up."""
+        return self.ready and not self.errors
+
+    def _load(self, name: str, component) -> None:
+        try:
+            component.load_model()
+            self.timings[name].update(getattr(component, "load_timings", {}))
+
+            start = time.perf_counter()
+            component.warmup()
+            self.timings[name]["first_inference"] = time.perf_counter() - start
+        except Exception as e:
+            self.errors[name] = e
+            print(f"Could not load {name}: {e}")
+
+    def _join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+        self._elapsed = time.perf_counter() - self._start
+        self._ready.set()
+
+    def report(self) -> str:
+        """Human-readable startup timing breakdown."""
+        lines = ["Startup timings:"]
+        for name, stages in self.timings.items():
+            parts = ", ".join(f"{stage} {1000 * seconds:.0f} ms" for stage, seconds in stages.items())
+            total = sum(stages.values())
+            lines.append(f"  {name:<10} {1000 * total:7.0f} ms  ({parts})")
+        if self._elapsed is not None:
+            lines.append(f"  models ready after {1000 * self._elapsed:.0f} ms (loaded in parallel)")
+        for name, error in self.errors.items():
+            lines.append(f"  FAILED {name}: {type(error).__name__}: {error}")
+        return "\n".join(lines)
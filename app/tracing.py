@@ -0,0 +1,270 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional
+
+# Histogram buckets (seconds) for the Prometheus export
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class UtteranceTrace:
+    """Stage timings and outcome of one utterance."""
+
+    def __init__(self, number: int, **fields) -> None:
+        self.number = number
+        self.time = time.time()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.fields = {
+            "transcript": None, "intent": None, "intent_score": None,
+            "move": None, "outcome": None,
+        }
+        self.fields.update(fields)
+
+    def record(self, **fields) -> None:
+        self.fields.update(fields)
+
+    def to_dict(self) -> dict:
+        return {
+            "utterance": self.number,
+            "time": round(self.time, 3),
+            **self.fields,
+            "stages_ms": {name: round(1000 * s, 3) for name, s in self.stages.items()},
+            "total_ms": round(1000 * (time.perf_counter() - self.start), 3),
+        }
+
+
+class Tracer:
+    """
+    Per-utterance tracing of the voice pipeline.
+
+    Stages are timed with perf_counter (monotonic) around the calls that
+    matter (Whisper decode, intent, parsing, play_move...). Each finished
+    utterance is appended to a JSONL file; aggregated stage histograms and
+    outcome counters are rewritten as a Prometheus text file.
+
+    With profile=True a sampling profiler records, every `interval`
+    seconds, the stack of any thread that is inside a stage, so hot spots
+    can be attributed per stage (see dump_profile).
+
+    Args:
+        trace_dir: Where utterances.jsonl, metrics.prom and profile.txt go;
+            None keeps everything in memory
+        profile: Enable the sampling profiler
+        interval: Profiler sampling period in seconds
+    """
+
+    def __init__(self, trace_dir: Optional[str | Path] = None, profile: bool = False,
+                 interval: float = 0.005) -> None:
+        self.dir = Path(trace_dir) if trace_dir else None
+        if self.dir:
+            self.dir.mkdir(parents=True, exist_ok=True)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._count = 0
+
+        # stage -> [bucket counts..., +Inf], sum
+        self._histograms = defaultdict(lambda: [0] * (len(BUCKETS) + 1))
+        self._sums = Counter()
+        self._outcomes = Counter()
+
+        # Profiler state: thread id -> stages open on it, innermost last.
+        # Coroutines on one event loop open and close stages out of order.
+        self._active = {}
+        self._samples = defaultdict(Counter)     # stage -> leaf function -> samples
+        self._inclusive = defaultdict(Counter)   # stage -> any function on stack -> samples
+        self._profiler = None
+        self._stop = threading.Event()
+        if profile:
+            self.interval = interval
+            self._profiler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+            self._profiler.start()
+
+    # ---------------------------------------------------------
+    # Utterances
+    # ---------------------------------------------------------
+    @property
+    def current(self) -> Optional[UtteranceTrace]:
+        return getattr(self._local, "trace", None)
+
+    def create(self, **fields) -> UtteranceTrace:
+        """
+        Start tracing an utterance without binding it to this thread, for
+        utterances handed between threads or asyncio tasks; pass it to
+        stage() and end() explicitly.
+        """
+        with self._lock:
+            self._count += 1
+            number = self._count
+        return UtteranceTrace(number, **fields)
+
+    def begin(self, **fields) -> UtteranceTrace:
+        """Start tracing an utterance on this thread."""
+        trace = self.create(**fields)
+        self._local.trace = trace
+        return trace
+
+    def record(self, **fields) -> None:
+        """Attach fields (transcript, intent, move, outcome...) to the current utterance."""
+        trace = self.current
+        if trace is not None:
+            trace.record(**fields)
+
+    @contextmanager
+    def stage(self, name: str, trace: Optional[UtteranceTrace] = None, profile: bool = True):
+        """
+        Time a stage of the current utterance, or of `trace` (also counted
+        without one). With profile=False this thread is not sampled: use it
+        for a stage that only awaits work running on another thread, which
+        marks itself with profiling().
+        """
+        start = time.perf_counter()
+        try:
+            with self.profiling(name) if profile else nullcontext():
+                yield
+        finally:
+            seconds = time.perf_counter() - start
+            trace = trace or self.current
+            if trace is not None:
+                trace.stages[name] = trace.stages.get(name, 0.0) + seconds
+            self.observe(name, seconds)
+
+    @contextmanager
+    def profiling(self, name: str):
+        """Attribute this thread's profiler samples to stage `name`, without timing it."""
+        thread = threading.get_ident()
+        self._active[thread] = self._active.get(thread, ()) + (name,)
+        try:
+            yield
+        finally:
+            # Drop this stage's own entry; whatever opened after it may still be running
+            stages = list(self._active.get(thread, ()))
+            if name in stages:
+                del stages[len(stages) - 1 - stages[::-1].index(name)]
+            if stages:
+                self._active[thread] = tuple(stages)
+            else:
+                self._active.pop(thread, None)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add a timing measured elsewhere (e.g. TTS time to first audio)."""
+        index = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+        with self._lock:
+            self._histograms[name][index] += 1
+            self._sums[name] += seconds
+
+    def end(self, trace: Optional[UtteranceTrace] = None) -> Optional[dict]:
+        """Finish the current utterance (or `trace`) and export it."""
+        if trace is None:
+            trace = self.current
+            if trace is None:
+                return None
+        if trace is self.current:
+            self._local.trace = None
+
+        record = trace.to_dict()
+        self.observe("total", record["total_ms"] / 1000)
+        with self._lock:
+            self._outcomes[record["outcome"] or "none"] += 1
+
+        if self.dir:
+            with open(self.dir / "utterances.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._write(self.dir / "metrics.prom", self.prometheus())
+        return record
+
+    # ---------------------------------------------------------
+    # Export
+    # ---------------------------------------------------------
+    def prometheus(self) -> str:
+        """Stage histograms and outcome counters in Prometheus text format."""
+        lines = [
+            "# HELP handsfreechess_stage_seconds Time spent per pipeline stage",
+            "# TYPE handsfreechess_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage in sorted(self._histograms):
+                counts = self._histograms[stage]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, counts):
+                    cumulative += count
+                    lines.append(f'handsfreechess_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'handsfreechess_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+                lines.append(f'handsfreechess_stage_seconds_sum{{stage="{stage}"}} {self._sums[stage]:.6f}')
+                lines.append(f'handsfreechess_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+
+            lines.append("# HELP handsfreechess_utterances_total Utterances by outcome")
+            lines.append("# TYPE handsfreechess_utterances_total counter")
+            for outcome, count in sorted(self._outcomes.items()):
+                lines.append(f'handsfreechess_utterances_total{{outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write(path: Path, text: str) -> None:
+        # Scrapers must never see a half-written file
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+    # ---------------------------------------------------------
+    # Sampling profiler
+    # ---------------------------------------------------------
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            active = {thread: stages[-1] for thread, stages in list(self._active.items()) if stages}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread, stage in active.items():
+                frame = frames.get(thread)
+                if frame is None or thread == me:
+                    continue
+                self._samples[stage][self._where(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    where = self._where(frame)
+                    if where not in seen:
+                        seen.add(where)
+                        self._inclusive[stage][where] += 1
+                    frame = frame.f_back
+
+    @staticmethod
+    def _where(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def profile_report(self, top: int = 10) -> str:
+        """Hot spots per stage: self samples and inclusive samples."""
+        lines = []
+        for stage in sorted(self._inclusive):
+            total = sum(self._samples[stage].values())
+            lines.append(f"== {stage} ({total} samples, {1000 * total * self.interval:.0f} ms)")
+            lines.append("  self:")
+            for where, count in self._samples[stage].most_common(top):
+                lines.append(f"    {count / total:6.1%}  {where}")
+            lines.append("  inclusive:")
+            for where, count in self._inclusive[stage].most_common(top):
+                lines.append(f"    {count / total:6.1%}  {where}")
+        return "\n".join(lines) + "\n"
+
+    def dump_profile(self) -> Optional[str]:
+        if self._profiler is None:
+            return None
+        report = self.profile_report()
+        if self.dir:
+            self._write(self.dir / "profile.txt", report)
+        return report
+
+    def close(self) -> None:
+        if self._profiler is not None:
+            self._stop.set()
+            self._profiler.join(timeout=1)
+            self.dump_profile()
@@ -0,0 +1,102 @@
+"""
+Retry rate with and without legal-move-biased decoding.
+
+Usage:
+    python -m benchmarks.bench_board_bias corpus.jsonl
+
+The replay corpus is JSONL, one utterance per line:
+    {"audio": "fixtures/nf3.wav", "fen": "<position>", "expected": "Nf3"}
+
+"expected" is optional. For every utterance the transcript goes through the
+same steps as handle_speech: parse_move, then move validation. A retry is
+counted whenever the user would have heard "Could not understand move"
+(parse failure) or "Invalid move" (parsed but not legal / not expected).
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import chess
+from faster_whisper import WhisperModel
+
+from chess_rules.move_validator import MoveClarifier
+from voice_input import move_parser as mp
+from voice_input.audio_capture import FileSource
+from voice_input.speech_to_text import transcribe
+from chess_rules.spoken_moves import DecodingContext
+
+
+def load_audio(path: Path):
+    source = FileSource(path)
+    source.open()
+    return source.samples
+
+
+def to_move(board: chess.Board, parsed: str) -> chess.Move:
+    """Resolve parse_move output (SAN or "e7e8=Q"-style UCI) to a Move."""
+    try:
+        return chess.Move.from_uci(parsed.replace("=", "").lower())
+    except ValueError:
+        return board.parse_san(parsed)
+
+
+def outcome(text: str | None, board: chess.Board, expected: str | None) -> str:
+    """Classify a transcript the way handle_speech would react to it."""
+    parsed = mp.parse_move(text) if text else None
+    if not parsed:
+        return "not_understood"
+
+    is_valid, error = MoveClarifier(board).validate_move(parsed)
+    if error == "ambiguous":
+        return "ambiguous"
+    if not is_valid:
+        return "invalid"
+
+    if expected and to_move(board, parsed) != board.parse_san(expected):
+        return "wrong_move"
+    return "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--model", default="Systran/faster-whisper-tiny.en")
+    args = parser.parse_args()
+
+    entries = [json.loads(line) for line in args.corpus.read_text().splitlines() if line.strip()]
+    model = WhisperModel(args.model, device="cpu", compute_type="int8",
+                         cpu_threads=4, num_workers=1)
+    context = DecodingContext()
+
+    results = {"plain": {}, "biased": {}}
+    timings = {"plain": 0.0, "biased": 0.0}
+
+    for entry in entries:
+        audio = load_audio(args.corpus.parent / entry["audio"])
+        board = chess.Board(entry["fen"])
+
+        for mode in results:
+            hints = context.get(board) if mode == "biased" else None
+            start = time.perf_counter()
+            text = transcribe(model, audio, hints=hints)
+            timings[mode] += time.perf_counter() - start
+
+            result = outcome(text, board, entry.get("expected"))
+            results[mode][result] = results[mode].get(result, 0) + 1
+
+    total = len(entries)
+    for mode, counts in results.items():
+        retries = total - counts.get("ok", 0) - counts.get("ambiguous", 0)
+        print(f"{mode:>7}: retries {retries}/{total} ({100 * retries / total:.1f}%)  "
+              f"not understood {counts.get('not_understood', 0)}  "
+              f"avg decode {1000 * timings[mode] / total:.1f} ms  {counts}")
+
+    plain = total - results["plain"].get("ok", 0) - results["plain"].get("ambiguous", 0)
+    biased = total - results["biased"].get("ok", 0) - results["biased"].get("ambiguous", 0)
+    if plain:
+        print(f"Retry reduction: {100 * (plain - biased) / plain:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+End-of-speech to transcript latency of the capture endpointer.
+
+Usage:
+    python -m benchmarks.bench_endpointing fixtures/ [--pauses 0.8 0.25 --vad auto]
+    python -m benchmarks.bench_endpointing fixtures/ --no-stt
+    python -m benchmarks.bench_endpointing --synthetic 50 --no-stt
+
+Fixtures are the bench_pipeline corpus (manifest.json + WAVs) or any
+directory of WAV utterances. Each one is padded with leading and trailing
+room noise and streamed through AudioCapture in 30 ms frames, once per
+trailing-silence setting. For every utterance we measure how long after
+the true end of speech the segment was cut (endpoint), how long Whisper
+then takes (decode), their sum (what the user waits for), and whether the
+endpointer split the command in two. --synthetic uses tone-burst
+"words" with short gaps instead of recordings, to check splitting
+without a corpus.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_pipeline import MANIFEST, percentile
+from voice_input.audio_capture import (
+    AudioCapture, AudioSource, FileSource, make_vad, CHUNK_SIZE, SAMPLE_RATE
+)
+
+MIC_CHUNK = 1024  # what sr.Microphone reads per call
+
+
+class ArraySource(AudioSource):
+    """Plays an in-memory buffer in microphone-sized chunks."""
+
+    def __init__(self, samples: np.ndarray) -> None:
+        self.samples = samples
+        self.position = 0
+
+    def read(self):
+        if self.position >= len(self.samples):
+            return None
+        chunk = self.samples[self.position:self.position + MIC_CHUNK]
+        self.position += len(chunk)
+        return chunk
+
+
+# ---------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------
+def room_noise(seconds: float, rng) -> np.ndarray:
+    return (0.002 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def speech_end(samples: np.ndarray) -> int:
+    """Sample offset where speech ends: last 10 ms window above 5% of peak RMS."""
+    window = SAMPLE_RATE // 100
+    n = len(samples) // window
+    rms = np.sqrt(np.mean(samples[:n * window].reshape(n, window) ** 2, axis=1))
+    loud = np.nonzero(rms > 0.05 * rms.max())[0]
+    return int((loud[-1] + 1) * window) if len(loud) else len(samples)
+
+
+def load_fixtures(fixture_dir: Path) -> list[dict]:
+    manifest = fixture_dir / MANIFEST
+    if manifest.exists():
+        entries = json.loads(manifest.read_text())
+    else:
+        entries = [{"file": p.name, "text": None} for p in sorted(fixture_dir.glob("*.wav"))]
+
+    for entry in entries:
+        source = FileSource(fixture_dir / entry["file"])
+        source.open()
+        entry["audio"] = source.samples
+    return entries
+
+
+def synthetic_fixtures(count: int, rng) -> list[dict]:
+    """Commands of 1-4 syllable bursts separated by 40-150 ms gaps."""
+    fixtures = []
+    for i in range(count):
+        parts = []
+        for syllable in range(rng.integers(1, 5)):
+            if syllable:
+                parts.append(room_noise(rng.uniform(0.04, 0.15), rng))
+            seconds = rng.uniform(0.12, 0.3)
+            t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+            envelope = np.sin(np.pi * t / seconds) ** 0.5
+            voice = np.sin(2 * np.pi * rng.uniform(100, 250) * t) * envelope
+            parts.append((rng.uniform(0.1, 0.5) * voice).astype(np.float32))
+        fixtures.append({"file": f"synthetic{i:03d}", "text": None, "audio": np.concatenate(parts)})
+    return fixtures
+
+
+# ---------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------
+def endpoint(samples: np.ndarray, pause: float, vad_kind: str, phrase_time_limit: float):
+    """Run the capture over samples; returns the (start, end, speech_end, audio) segments."""
+    capture = AudioCapture(
+        ArraySource(samples), pause_threshold=pause,
+        phrase_time_limit=phrase_time_limit, vad=make_vad(vad_kind)
+    )
+    capture.start()
+    segments = []
+    while (segment := capture.next_segment(timeout=5)) is not None:
+        segments.append((*capture.last_bounds, segment))
+    capture.stop()
+    return segments
+
+
+def measure(fixtures: list[dict], pause: float, args, recognizer) -> dict:
+    rng = np.random.default_rng(1)
+    endpoint_ms, decode_ms, total_ms = [], [], []
+    split = missed = matched = references = 0
+
+    for entry in fixtures:
+        lead = room_noise(0.5, rng)
+        samples = np.concatenate([lead, entry["audio"], room_noise(args.tail, rng)])
+        true_end = len(lead) + speech_end(entry["audio"])
+
+        segments = endpoint(samples, pause, args.vad, args.phrase_time_limit)
+        # The segment that was open when the speech ended
+        closing = [s for s in segments if s[0] < true_end]
+        if not closing:
+            missed += 1
+            continue
+        split += len(closing) > 1
+        start, end, _, audio = closing[-1]
+        waited = 1000 * (end - true_end) / SAMPLE_RATE
+        endpoint_ms.append(waited)
+
+        if recognizer is None:
+            continue
+        # A split command has to be heard in full to be understood
+        heard = np.concatenate([s[3] for s in closing])
+        began = time.perf_counter()
+        text = recognizer.transcribe(heard)
+        decoded = 1000 * (time.perf_counter() - began)
+        decode_ms.append(decoded)
+        total_ms.append(waited + decoded)
+        if entry.get("text"):
+            references += 1
+            matched += (text or "").lower().strip(" .!?") == entry["text"].lower()
+
+    def stats(values):
+        return {"p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)} if values else None
+
+    return {
+        "pause": pause,
+        "endpoint": stats(endpoint_ms),
+        "decode": stats(decode_ms),
+        "total": stats(total_ms),
+        "split": split,
+        "missed": missed,
+        "exact": matched / references if references else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("fixtures", type=Path, nargs="?")
+    parser.add_argument("--synthetic", type=int, help="Use N generated utterances instead of fixtures")
+    parser.add_argument("--pauses", type=float, nargs="+", default=[0.8, 0.25],
+                        help="Trailing-silence windows to compare (0.8 was the old default)")
+    parser.add_argument("--vad", default="auto", help="auto, webrtc or energy")
+    parser.add_argument("--tail", type=float, default=1.5, help="Seconds of noise after each utterance")
+    parser.add_argument("--phrase-time-limit", type=float, default=4)
+    parser.add_argument("--no-stt", action="store_true", help="Only measure endpointing")
+    parser.add_argument("--model", default="Systran/faster-whisper-tiny.en")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        fixtures = synthetic_fixtures(args.synthetic, np.random.default_rng(0))
+    elif args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        parser.error("give a fixture directory or --synthetic N")
+    if not fixtures:
+        raise SystemExit(f"No fixtures in {args.fixtures}")
+
+    recognizer = None
+    if not args.no_stt:
+        from voice_input.speech_to_text import SpeechRecognizer
+        recognizer = SpeechRecognizer(model_name=args.model)
+        recognizer.warmup()
+
+    detector = make_vad(args.vad)
+    vad = type(detector).__name__ if detector else "energy"
+    print(f"{len(fixtures)} utterances, VAD {vad}, {CHUNK_SIZE * 1000 // SAMPLE_RATE} ms frames")
+    print(f"{'pause':>6} {'endpoint p50/p95':>18} {'decode p50/p95':>16} {'total p50/p95':>16} "
+          f"{'split':>6} {'missed':>6} {'exact':>6}")
+
+    results = []
+    for pause in args.pauses:
+        r = measure(fixtures, pause, args, recognizer)
+        results.append(r)
+
+        def cell(stats):
+            return f"{stats['p50_ms']:.0f}/{stats['p95_ms']:.0f} ms" if stats else "-"
+        exact = f"{r['exact']:.0%}" if r["exact"] is not None else "-"
+        print(f"{pause:>5.2f}s {cell(r['endpoint']):>18} {cell(r['decode']):>16} "
+              f"{cell(r['total']):>16} {r['split']:>6} {r['missed']:>6} {exact:>6}")
+
+    if args.output:
+        args.output.write_text(json.dumps({"vad": vad, "results": results}, indent=1))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Accuracy, latency and peak memory of the intent backends.
+
+Usage:
+    python -m benchmarks.bench_intent_backends [--backends minilm ngram]
+
+Each backend runs in a fresh process so peak RSS reflects only what that
+backend imports and loads. Scoring bypasses the regex fast path and the
+embedding cache so the encoders themselves are compared.
+"""
+import argparse
+import multiprocessing
+import statistics
+import sys
+import time
+
+# Held-out phrasings (none are intent examples); None = should be rejected
+EVAL_SET = [
+    ("knight to f3", "move"), ("bishop takes c4", "move"), ("queen to d8", "move"),
+    ("rook takes a seven", "move"), ("pawn to e four", "move"), ("king to g1", "move"),
+    ("move my knight to c6", "move"), ("bishop b5", "move"), ("take on d5 with the pawn", "move"),
+    ("promote the pawn to a queen", "move"),
+    ("castle on the king side", "castle"), ("castle long", "castle"), ("let me castle", "castle"),
+    ("castle short please", "castle"),
+    ("I resign", "resign"), ("I surrender", "resign"), ("I quit this game", "resign"),
+    ("resign the game", "resign"),
+    ("can we call it a draw", "draw"), ("offer draw", "draw"), ("let's agree to a draw", "draw"),
+    ("draw please", "draw"),
+    ("start new game", "new_game"), ("play a new game", "new_game"), ("find me a new game", "new_game"),
+    ("play again", "new_game"),
+    ("rematch please", "rematch"), ("another game against him", "rematch"),
+    ("let's run it back", "rematch"), ("one more", "rematch"),
+    ("say that again", "repeat"), ("what was that", "repeat"), ("repeat the last move", "repeat"),
+    ("sorry what", "repeat"),
+    ("hello there", None), ("what's the weather like", None), ("turn off the lights", None),
+]
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+
+def run_backend(backend: str, repeat: int, results) -> None:
+    start = time.perf_counter()
+    from voice_input.intent_classifier import IntentClassifier, normalize
+
+    classifier = IntentClassifier(backend=backend, cache_size=0)
+    load_time = time.perf_counter() - start
+    threshold = classifier.backend.default_threshold
+
+    correct = 0
+    timings = []
+    for _ in range(repeat):
+        correct = 0
+        for text, expected in EVAL_SET:
+            t0 = time.perf_counter()
+            scores = classifier.scores(normalize(text))
+            intent, score = max(scores.items(), key=lambda item: item[1])
+            predicted = intent if score > threshold else None
+            timings.append(time.perf_counter() - t0)
+            correct += predicted == expected
+
+    timings.sort()
+    results.put({
+        "backend": backend,
+        "accuracy": correct / len(EVAL_SET),
+        "load_ms": 1000 * load_time,
+        "mean_ms": 1000 * statistics.mean(timings),
+        "p95_ms": 1000 * timings[int(0.95 * (len(timings) - 1))],
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", default=["minilm", "ngram"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'backend':>8} {'accuracy':>9} {'load':>9} {'mean':>9} {'p95':>9} {'peak RSS':>10}")
+
+    for backend in args.backends:
+        results = context.Queue()
+        process = context.Process(target=run_backend, args=(backend, args.repeat, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            print(f"{backend:>8} failed (exit code {process.exitcode})")
+            continue
+
+        r = results.get()
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+        print(f"{backend:>8} {r['accuracy']:>8.0%} {r['load_ms']:>7.0f}ms "
+              f"{r['mean_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms {rss:>10}")
+
+
+if __name__ == "__main__":
+    main()
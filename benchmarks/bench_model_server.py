@@ -0,0 +1,177 @@
+"""
+Client startup and per-request overhead of the local model server.
+
+Usage:
+    python -m benchmarks.bench_model_server [--backend minilm --requests 2000]
+    python -m benchmarks.bench_model_server --backend ngram --no-stt
+
+Starts voice_input.model_server in a separate process, then compares it
+with in-process inference:
+
+- startup: a fresh Python process that imports the client, gets ready
+  (loads the models / connects) and answers its first command, timed
+  from the parent (interpreter start included, the same for both)
+- intent: per-call latency of IntentClassifier.predict in this process
+  vs RemoteIntentClassifier.predict, over the bench_pipeline commands
+- audio (with Whisper): round trip of ModelClient.transcribe minus the
+  server's own decode time, i.e. what the socket and shared memory add
+  per utterance, for short and long utterances
+"""
+import argparse
+import json
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_pipeline import COMMANDS, percentile
+from voice_input.model_server import ModelClient
+
+LOCAL_INTENT = """
+from voice_input.intent_classifier import IntentClassifier
+intent = IntentClassifier(backend={backend!r}, store_dir=None)
+intent.predict("knight to f three")
+"""
+REMOTE_INTENT = """
+from voice_input.intent_classifier import RemoteIntentClassifier
+intent = RemoteIntentClassifier({socket!r})
+intent.predict("knight to f three")
+"""
+LOCAL_STT = """
+import numpy as np
+from faster_whisper import WhisperModel
+from voice_input.speech_to_text import decode
+model = WhisperModel({model!r}, device="cpu", compute_type="int8", cpu_threads=4, num_workers=1)
+decode(model, np.zeros(16000, dtype=np.float32))
+"""
+REMOTE_STT = """
+import numpy as np
+from voice_input.model_server import ModelClient
+ModelClient({socket!r}).transcribe(np.zeros(16000, dtype=np.float32))
+"""
+
+
+def start_server(socket_path: Path, args) -> tuple[subprocess.Popen, float]:
+    command = [sys.executable, "-m", "voice_input.model_server", "--socket", str(socket_path),
+               "--intent-backend", args.backend, "--model", args.model]
+    if args.no_stt:
+        command.append("--no-stt")
+
+    start = time.perf_counter()
+    server = subprocess.Popen(command)
+    while True:
+        if server.poll() is not None:
+            raise SystemExit("Model server exited during startup")
+        try:
+            ModelClient(socket_path).close()
+            return server, time.perf_counter() - start
+        except OSError:
+            time.sleep(0.05)
+
+
+def process_time(script: str, runs: int) -> float:
+    """Median wall time (s) of a fresh interpreter running script."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def call_ms(function, inputs: list, requests: int) -> list[float]:
+    times = []
+    for n in range(requests):
+        start = time.perf_counter()
+        function(inputs[n % len(inputs)])
+        times.append(1000 * (time.perf_counter() - start))
+    return times
+
+
+def summary(times: list[float]) -> dict:
+    return {"mean_ms": float(np.mean(times)), "p50_ms": percentile(times, 50), "p95_ms": percentile(times, 95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", default="minilm", help="Intent encoder: minilm or ngram")
+    parser.add_argument("--model", default="Systran/faster-whisper-tiny.en")
+    parser.add_argument("--no-stt", action="store_true", help="Serve and measure intents only")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3, help="Startup runs (median)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    socket_path = Path(tempfile.mkdtemp()) / "models.sock"
+    server, server_startup = start_server(socket_path, args)
+    print(f"Server ready after {server_startup:.2f} s")
+    results = {"backend": args.backend, "server_startup_s": server_startup}
+
+    try:
+        startup = {
+            "intent_local_s": process_time(LOCAL_INTENT.format(backend=args.backend), args.runs),
+            "intent_remote_s": process_time(REMOTE_INTENT.format(socket=str(socket_path)), args.runs),
+        }
+        if not args.no_stt:
+            startup["stt_local_s"] = process_time(LOCAL_STT.format(model=args.model), args.runs)
+            startup["stt_remote_s"] = process_time(REMOTE_STT.format(socket=str(socket_path)), args.runs)
+        results["startup"] = startup
+
+        print("\nClient process startup to first answer (median):")
+        for kind in ("intent", "stt"):
+            if f"{kind}_local_s" in startup:
+                print(f"  {kind:<7} in-process {1000 * startup[f'{kind}_local_s']:7.0f} ms   "
+                      f"remote {1000 * startup[f'{kind}_remote_s']:7.0f} ms")
+
+        from voice_input.intent_classifier import IntentClassifier, RemoteIntentClassifier
+        texts = [text for _, text, _, _ in COMMANDS]
+        local = IntentClassifier(backend=args.backend, store_dir=None)
+        local.warmup()
+        remote = RemoteIntentClassifier(socket_path)
+        remote.warmup()
+        intent = {
+            "local": summary(call_ms(local.predict, texts, args.requests)),
+            "remote": summary(call_ms(remote.predict, texts, args.requests)),
+        }
+        intent["overhead_ms"] = intent["remote"]["mean_ms"] - intent["local"]["mean_ms"]
+        results["intent"] = intent
+        remote.close()
+
+        print(f"\nIntent predict over {args.requests} calls (mean / p50 / p95):")
+        for side in ("local", "remote"):
+            s = intent[side]
+            print(f"  {side:<7} {s['mean_ms']:.3f} / {s['p50_ms']:.3f} / {s['p95_ms']:.3f} ms")
+        print(f"  overhead {1000 * intent['overhead_ms']:.0f} us per call")
+
+        if not args.no_stt:
+            client = ModelClient(socket_path)
+            audio = {}
+            print("\nTranscription round trip minus server decode time:")
+            for seconds in (1, 4, 10):
+                samples = (0.01 * np.random.default_rng(seconds).standard_normal(16000 * seconds)).astype(np.float32)
+                overheads = []
+                for _ in range(max(1, args.requests // 100)):
+                    start = time.perf_counter()
+                    reply = client.transcribe(samples, escalate=False)
+                    overheads.append(1000 * (time.perf_counter() - start) - reply["decode_ms"])
+                audio[f"{seconds}s"] = summary(overheads)
+                print(f"  {seconds:>2} s audio: {audio[f'{seconds}s']['p50_ms']:.3f} ms p50, "
+                      f"{audio[f'{seconds}s']['p95_ms']:.3f} ms p95")
+            results["audio_overhead"] = audio
+            client.close()
+    finally:
+        # Lets the server remove its socket
+        server.send_signal(signal.SIGINT)
+        server.wait()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=1))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Throughput of move_parser.parse_move (parses/sec) on the regression corpus.
+
+Usage:
+    python -m benchmarks.bench_move_parser [--seconds 2]
+"""
+import argparse
+import time
+
+from tests.test_move_parser import CORPUS
+from voice_input import move_parser as mp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    utterances = [text for text, _ in CORPUS]
+    parses = 0
+    start = time.perf_counter()
+    deadline = start + args.seconds
+
+    while time.perf_counter() < deadline:
+        for text in utterances:
+            mp.parse_move(text)
+        parses += len(utterances)
+
+    elapsed = time.perf_counter() - start
+    print(f"{parses / elapsed:,.0f} parses/sec "
+          f"({1e6 * elapsed / parses:.1f} us/parse, {len(utterances)} utterances)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+End-to-end latency and accuracy of the voice command pipeline.
+
+Usage:
+    python -m benchmarks.bench_pipeline synthesize fixtures/ [--voices 2 --rates 150 200]
+    python -m benchmarks.bench_pipeline run fixtures/ [--output results.json --compare old.json]
+    python -m benchmarks.bench_pipeline run fixtures/ --text-only
+    python -m benchmarks.bench_pipeline run fixtures/ --cascade
+
+Each fixture is a WAV file plus a manifest entry with the position, the
+spoken command and the expected outcome. A run feeds every fixture through
+SpeechRecognizer.transcribe -> IntentClassifier.predict -> move lookup
+(GameState.resolve_spoken_move / move_parser.parse_move, as in main.py) ->
+GameState.play_move, timing each stage. --text-only skips Whisper and uses
+the manifest text as the transcript.
+
+`synthesize` builds the corpus offline with pyttsx3 (one file per command,
+voice and speaking rate).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+import chess
+
+from voice_input import move_parser as mp
+
+MANIFEST = "manifest.json"
+STAGES = ["stt", "intent", "parse", "play", "total"]
+
+# (moves leading to the position, spoken command, expected intent, expected SAN)
+COMMANDS = [
+    ("", "e four", "move", "e4"),
+    ("", "pawn to d four", "move", "d4"),
+    ("", "knight to f three", "move", "Nf3"),
+    ("", "knight c three", "move", "Nc3"),
+    ("", "g one f three", "move", "Nf3"),
+    ("", "c four", "move", "c4"),
+    ("e4", "e five", "move", "e5"),
+    ("e4", "c five", "move", "c5"),
+    ("e4", "knight to f six", "move", "Nf6"),
+    ("e4 e5", "knight to f three", "move", "Nf3"),
+    ("e4 e5 Nf3", "knight to c six", "move", "Nc6"),
+    ("e4 e5 Nf3 Nc6", "bishop to b five", "move", "Bb5"),
+    ("e4 e5 Nf3 Nc6", "bishop c four", "move", "Bc4"),
+    ("e4 e5 Nf3 Nc6 Bb5 a6", "bishop takes c six", "move", "Bxc6"),
+    ("e4 e5 Nf3 Nc6 Bb5 a6", "bishop to a four", "move", "Ba4"),
+    ("e4 d5", "e takes d five", "move", "exd5"),
+    ("e4 d5 exd5", "queen takes d five", "move", "Qxd5"),
+    ("d4 d5 c4", "e six", "move", "e6"),
+    ("d4 d5 c4 e6", "knight to c three", "move", "Nc3"),
+    ("d4 Nf6 c4 g6", "knight c three", "move", "Nc3"),
+    ("e4 e5 Nf3 Nc6 Bc4 Bc5", "castle kingside", "castle", "O-O"),
+    ("e4 e5 Nf3 Nc6 Bc4 Nf6", "castle short", "castle", "O-O"),
+    ("e4 e5 Nf3 Nc6 Bb5 a6 Ba4 Nf6 O-O", "bishop to e seven", "move", "Be7"),
+    ("e4 e5 Nf3 Nc6 Bb5 a6 Ba4 Nf6 O-O Be7", "rook to e one", "move", "Re1"),
+    ("e4 e5 Nf3 Nc6 Bb5 a6 Ba4 Nf6 O-O Be7 Re1", "b five", "move", "b5"),
+    ("", "I resign", "resign", None),
+    ("", "offer a draw", "draw", None),
+    ("", "rematch", "rematch", None),
+    ("", "start a new game", "new_game", None),
+    ("", "repeat that", "repeat", None),
+]
+
+
+# ---------------------------------------------------------
+# Fixture corpus
+# ---------------------------------------------------------
+def position(moves: str) -> chess.Board:
+    board = chess.Board()
+    for move in moves.split():
+        board.push_san(move)
+    return board
+
+
+def synthesize(out_dir: Path, voices: int, rates: list[int]) -> None:
+    """Render every command with pyttsx3 and write the manifest."""
+    import pyttsx3
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    engine = pyttsx3.init()
+    available = engine.getProperty("voices")[:voices] or [None]
+
+    entries = []
+    for v, voice in enumerate(available):
+        if voice is not None:
+            engine.setProperty("voice", voice.id)
+        for rate in rates:
+            engine.setProperty("rate", rate)
+            for i, (moves, text, intent, expected) in enumerate(COMMANDS):
+                name = f"cmd{i:02d}_v{v}_r{rate}.wav"
+                engine.save_to_file(text, str(out_dir / name))
+                entries.append({
+                    "file": name, "fen": position(moves).fen(), "text": text,
+                    "intent": intent, "expected": expected,
+                    "voice": getattr(voice, "name", "default"), "rate": rate,
+                })
+            # Render this voice/rate batch before switching settings
+            engine.runAndWait()
+
+    (out_dir / MANIFEST).write_text(json.dumps(entries, indent=1))
+    print(f"Wrote {len(entries)} fixtures to {out_dir}")
+
+
+def load_fixtures(fixture_dir: Path, text_only: bool) -> list[dict]:
+    entries = json.loads((fixture_dir / MANIFEST).read_text())
+    if text_only:
+        return entries
+
+    from voice_input.audio_capture import FileSource
+    for entry in entries:
+        source = FileSource(fixture_dir / entry["file"])
+        source.open()
+        entry["audio"] = source.samples
+    return entries
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+def run_command(game, intent_type: str | None, text: str) -> str | None:
+    """The move half of main.handle_speech: the move to play, if any."""
+    if intent_type == "move":
+        return game.resolve_spoken_move(text) or mp.parse_move(text)
+    if intent_type == "castle":
+        move = game.parse_castling_intent(text)
+        # ("ambiguous", options) would need a clarification round
+        return move if isinstance(move, str) else None
+    return None
+
+
+def percentile(values: list[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(timings: dict[str, list[float]]) -> dict:
+    return {
+        stage: {
+            "p50_ms": 1000 * percentile(values, 50),
+            "p95_ms": 1000 * percentile(values, 95),
+            "p99_ms": 1000 * percentile(values, 99),
+            "mean_ms": 1000 * sum(values) / len(values),
+        }
+        for stage, values in timings.items() if values
+    }
+
+
+def run(args) -> dict:
+    from chess_rules.game_interface import GameState
+    from voice_input.intent_classifier import IntentClassifier
+
+    fixtures = load_fixtures(args.fixtures, args.text_only)
+    if not fixtures:
+        raise SystemExit(f"No fixtures in {args.fixtures / MANIFEST}")
+
+    game = GameState()
+    intent = IntentClassifier(backend=args.backend)
+    recognizer = None
+    if not args.text_only:
+        from voice_input.cascade import DecodingCascade
+        from voice_input.speech_to_text import SpeechRecognizer
+
+        def understood(text):
+            # Same check as main.understood
+            return bool(game.resolve_spoken_move(text)) or intent.predict(text) not in ("move", None)
+
+        cascade = DecodingCascade(accept=understood) if args.cascade else None
+        recognizer = SpeechRecognizer(model_name=args.model, board=game.board, cascade=cascade)
+        recognizer.warmup()
+    intent.warmup()
+
+    timings = {stage: [] for stage in STAGES}
+    results = []
+    for repeat in range(args.repeat):
+        for entry in fixtures:
+            game.update_from_fen(entry["fen"])
+            stamps = [time.perf_counter()]
+
+            if recognizer is not None:
+                text = recognizer.transcribe(entry["audio"]) or ""
+            else:
+                text = entry["text"]
+            stamps.append(time.perf_counter())
+
+            intent_type = intent.predict(text)
+            stamps.append(time.perf_counter())
+
+            move = run_command(game, intent_type, text)
+            stamps.append(time.perf_counter())
+
+            played = None
+            if move:
+                before = game.board.copy(stack=False)
+                success, _ = game.play_move(move)
+                if success:
+                    played = before.san(game.board.peek())
+            stamps.append(time.perf_counter())
+
+            for stage, start, end in zip(STAGES, stamps, stamps[1:]):
+                timings[stage].append(end - start)
+            timings["total"].append(stamps[-1] - stamps[0])
+
+            if repeat == 0:
+                results.append({
+                    "file": entry.get("file"), "text": entry["text"], "transcript": text,
+                    "intent": intent_type, "played": played,
+                    "correct": intent_type == entry["intent"] and played == entry["expected"],
+                })
+
+    if recognizer is None:
+        del timings["stt"]
+
+    summary = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": None if args.text_only else args.model,
+            "backend": args.backend,
+            "fixtures": len(fixtures),
+            "repeat": args.repeat,
+        },
+        "accuracy": sum(r["correct"] for r in results) / len(results),
+        "stages": summarize(timings),
+        "results": results,
+    }
+    if recognizer is not None and recognizer.cascade:
+        summary["cascade"] = recognizer.cascade.stats()
+    return summary
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(summary: dict, previous: dict | None) -> None:
+    meta = summary["meta"]
+    print(f"{meta['fixtures']} fixtures x {meta['repeat']} repeats  "
+          f"(model {meta['model'] or 'none: text only'}, intent backend {meta['backend']})")
+    print(f"{'stage':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for stage, s in summary["stages"].items():
+        line = f"{stage:>8} {s['p50_ms']:>7.2f}ms {s['p95_ms']:>7.2f}ms {s['p99_ms']:>7.2f}ms"
+        old = previous["stages"].get(stage) if previous else None
+        if old:
+            line += f"   p50 {s['p50_ms'] - old['p50_ms']:+.2f}ms  p95 {s['p95_ms'] - old['p95_ms']:+.2f}ms"
+        print(line)
+
+    line = f"accuracy {summary['accuracy']:.1%}"
+    if previous:
+        line += f" ({summary['accuracy'] - previous['accuracy']:+.1%})"
+    print(line)
+
+    cascade = summary.get("cascade")
+    if cascade:
+        print(f"cascade ({cascade['exhausted']} unsure after every tier):")
+        for tier, t in enumerate(cascade["tiers"]):
+            print(f"  tier {tier} {t['model'] or meta['model']} beam {t['beam_size']}: "
+                  f"kept {t['used_rate']:.0%}, {t['decodes']} decodes, {t['mean_ms']:.0f} ms each")
+
+    for r in summary["results"]:
+        if not r["correct"]:
+            print(f"  miss: {r['text']!r} heard {r['transcript']!r} -> {r['intent']} / {r['played']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    synth = commands.add_parser("synthesize", help="Render the fixture corpus with pyttsx3")
+    synth.add_argument("fixtures", type=Path)
+    synth.add_argument("--voices", type=int, default=2, help="Number of installed voices to use")
+    synth.add_argument("--rates", type=int, nargs="+", default=[150, 200])
+
+    bench = commands.add_parser("run", help="Time the pipeline over a fixture corpus")
+    bench.add_argument("fixtures", type=Path)
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.add_argument("--model", default="Systran/faster-whisper-tiny.en")
+    bench.add_argument("--backend", default="minilm", help="Intent backend (minilm, ngram)")
+    bench.add_argument("--text-only", action="store_true", help="Skip Whisper, use manifest text")
+    bench.add_argument("--cascade", action="store_true", help="Decode with the confidence cascade")
+    bench.add_argument("--output", type=Path, help="Write results as JSON")
+    bench.add_argument("--compare", type=Path, help="Previous JSON results to diff against")
+
+    args = parser.parse_args()
+    if args.command == "synthesize":
+        synthesize(args.fixtures, args.voices, args.rates)
+        return
+
+    summary = run(args)
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+    report(summary, previous)
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=1))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Command throughput of many game sessions sharing one set of models.
+
+Usage:
+    python -m benchmarks.bench_sessions [--sessions 1 4 16 64 --backend ngram]
+    python -m benchmarks.bench_sessions --sessions 8 --max-batch 1 16 --output results.json
+
+Every simulated session is a client bound to its own board that replays a
+scripted game (spoken commands for both sides) as fast as it can through
+SessionManager.command(), so the only shared resource is the intent
+encoder worker of SharedModels. For each session count and batch limit
+we report commands per second, per-command latency and the mean batch
+size the encoder saw. Transcripts are given as text: with a single
+Whisper model, decoding runs one utterance at a time whatever the
+number of sessions.
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from app.sessions import SessionManager
+from app.shared_models import SharedModels
+from benchmarks.bench_pipeline import percentile
+from chess_rules.game_interface import GameState
+from voice_input.intent_classifier import IntentClassifier
+
+# Ruy Lopez, closed: spoken commands the text pipeline plays as written
+GAME = [
+    "pawn to e four", "pawn to e five", "knight to f three", "knight to c six",
+    "bishop to b five", "pawn to a six", "bishop to a four", "knight to f six",
+    "castle kingside", "bishop to e seven", "rook to e one", "pawn to b five",
+    "bishop to b three", "pawn to d six", "pawn to c three", "castle short",
+]
+
+
+class SilentTTS:
+    def speak(self, text, priority=None, key=None):
+        pass
+
+    def notify(self, event, text=None, priority=None):
+        pass
+
+
+class NoRecognizer:
+    """SharedModels' Whisper side, unused with text commands."""
+
+    board = None
+    board_lock = None
+
+
+async def client(manager: SessionManager, name: str, games: int, latencies: list) -> int:
+    game = manager.sessions[name].game
+    played = 0
+    for _ in range(games):
+        game.update_from_fen(game.board.starting_fen)
+        for text in GAME:
+            start = time.perf_counter()
+            await manager.command(text, name=name)
+            latencies.append(1000 * (time.perf_counter() - start))
+        played += len(game.board.move_stack)
+    return played
+
+
+def measure(sessions: int, max_batch: int, args) -> dict:
+    intent = IntentClassifier(backend=args.backend, cache_size=args.cache_size, store_dir=None)
+    intent.warmup()
+    models = SharedModels(NoRecognizer(), intent, max_batch=max_batch)
+    manager = SessionManager(models, SilentTTS())
+    for _ in range(sessions):
+        manager.add(GameState())
+
+    latencies = []
+
+    async def run():
+        return await asyncio.gather(*(
+            client(manager, name, args.games, latencies) for name in manager.sessions
+        ))
+
+    start = time.perf_counter()
+    played = sum(asyncio.run(run()))
+    wall = time.perf_counter() - start
+    models.close()
+
+    commands = len(latencies)
+    return {
+        "sessions": sessions,
+        "max_batch": max_batch,
+        "commands": commands,
+        "played": played,
+        "commands_per_s": commands / wall,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_batch": models.encoder.stats()["mean_batch"],
+        "intent": intent.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 16],
+                        help="Encoder batch limits to compare (1 = no batching)")
+    parser.add_argument("--games", type=int, default=5, help="Games each session plays")
+    parser.add_argument("--backend", default="ngram", help="Intent encoder: ngram or minilm")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="Intent embedding cache (0: every command reaches the encoder)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    print(f"Intent backend {args.backend}, {len(GAME)} commands per game, {args.games} games per session")
+    print(f"{'sessions':>8} {'batch':>6} {'commands/s':>11} {'p50/p95':>16} {'mean batch':>11} {'played':>7}")
+
+    results = []
+    for sessions in args.sessions:
+        for max_batch in args.max_batch:
+            r = measure(sessions, max_batch, args)
+            results.append(r)
+            print(f"{sessions:>8} {max_batch:>6} {r['commands_per_s']:>11.0f} "
+                  f"{r['p50_ms']:>7.2f}/{r['p95_ms']:.2f} ms {r['mean_batch']:>11.1f} "
+                  f"{r['played']:>3}/{r['commands']}")
+
+    if args.output:
+        args.output.write_text(json.dumps({"backend": args.backend, "results": results}, indent=1))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-utterance latency of the temp.wav path vs the in-memory path.
+
+Usage:
+    python -m benchmarks.bench_stt_input path/to/fixtures [--repeat 5]
+
+Each fixture is a recorded WAV utterance. The file path reproduces the old
+listen_once behaviour (write temp.wav, let Whisper decode it through ffmpeg),
+the in-memory path converts the PCM once and hands the buffer to transcribe.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import speech_recognition as sr
+from faster_whisper import WhisperModel
+
+from voice_input.speech_to_text import audio_to_array, transcribe
+
+
+def load_fixture(path: Path) -> sr.AudioData:
+    """Load a WAV file as the AudioData the microphone would have produced."""
+    with wave.open(str(path), "rb") as wav:
+        frames = wav.readframes(wav.getnframes())
+        return sr.AudioData(frames, wav.getframerate(), wav.getsampwidth())
+
+
+def file_path(model: WhisperModel, audio: sr.AudioData, tmp: str) -> str | None:
+    with open(tmp, "wb") as f:
+        f.write(audio.get_wav_data())
+    return transcribe(model, tmp)
+
+
+def in_memory(model: WhisperModel, audio: sr.AudioData, tmp: str) -> str | None:
+    return transcribe(model, audio_to_array(audio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("fixtures", type=Path, help="Directory of WAV fixtures")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default="Systran/faster-whisper-tiny.en")
+    args = parser.parse_args()
+
+    fixtures = [load_fixture(p) for p in sorted(args.fixtures.glob("*.wav"))]
+    if not fixtures:
+        raise SystemExit(f"No .wav fixtures found in {args.fixtures}")
+
+    model = WhisperModel(args.model, device="cpu", compute_type="int8",
+                         cpu_threads=4, num_workers=1)
+
+    tmp = os.path.join(tempfile.mkdtemp(), "temp.wav")
+    paths = {"file (temp.wav)": file_path, "in-memory": in_memory}
+
+    # Warm up both paths so the first decode doesn't skew the numbers
+    for run in paths.values():
+        run(model, fixtures[0], tmp)
+
+    print(f"{len(fixtures)} fixtures x {args.repeat} repeats")
+    for name, run in paths.items():
+        timings = []
+        for _ in range(args.repeat):
+            for audio in fixtures:
+                start = time.perf_counter()
+                run(model, audio, tmp)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        print(f"{name:>16}: mean {statistics.mean(timings):7.1f} ms  "
+              f"median {statistics.median(timings):7.1f} ms  "
+              f"min {min(timings):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
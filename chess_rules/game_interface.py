@@ -1,17 +1,26 @@
 import chess
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from chess_rules import move_validator as mv
+from chess_rules.lichess_client import LichessClient, GameStream
+from chess_rules.move_index import MoveIndex
 
 class GameState:
     def __init__(self) -> None:
         self.board = chess.Board()
-        self.validator = mv(self.board)
+        self.validator = mv.MoveClarifier(self.board)
+        self.move_index = MoveIndex(self.board)
+        # Held by whoever changes the board while other threads read it
+        # (speech decoding, the Lichess stream)
+        self.lock = threading.RLock()
     
     def update_from_fen(self, fen: str) -> None:
         """Updates the internal board state."""
         self.board.set_fen(fen)
         # Update validator's board reference
         self.validator.board = self.board
+        self.move_index.update()
     
     # TODO: reduce return types to max 2...
     def parse_castling_intent(self, text: str) -> str | None | tuple[str, list[str]]:
@@ -71,10 +80,22 @@ class GameState:
         
         if succes:
             # TODO: Add logic for actually making the move on site...
+            self.move_index.update()
             return (True, "move_executed")
         
         return (False, "execution_failed")
     
+    def resolve_spoken_move(self, text: str) -> str | None:
+        """
+        Match a (possibly misheard) transcript against the legal moves.
+        
+        Returns:
+            SAN of the best-ranked legal move (e.g. 'Nf3'), or None if 
+            nothing matches or the transcript is ambiguous
+        """
+        move = self.move_index.lookup(text)
+        return self.board.san(move) if move else None
+    
     def handle_ambiguous_move(self, move: str, from_square: str) -> tuple[bool, str]:
         
         resolved_move = self.validator.resolve_ambiguous_move(move, from_square)
@@ -146,25 +167,208 @@ class ChessDotCom(GameState):
 # ---------------------------------------------------------
 
 class LiChess(GameState):
-    def __init__(self, token) -> None:
+    """
+    Lichess game kept in sync through a persistent board stream.
+
+    Our own moves are applied to the local board straight away and
+    submitted in the background; if the server rejects one it is taken
+    back and on_rejected is called so the user can be told.
+
+    Args:
+        token: Personal API token (board:play scope)
+        username: Our Lichess username, used to work out player_color
+        client: Shared LichessClient (one is created if not given)
+        on_rejected: Optional callback(move, reason) for refused moves
+    """
+
+    def __init__(self, token, username: str | None = None, client: LichessClient | None = None,
+                 on_rejected=None) -> None:
         super().__init__()
-        self.headers = {
-            "Authorization": f"Bearer {token}"
-        }
-    
-    def fetch_game_state(self, game_id):
-        url = f"https://lichess.org/api/board/game/stream/{game_id}"
-        response = requests.get(url, headers=self.headers, stream=True)
+        self.client = client or LichessClient(token)
+        self.username = username.lower() if username else None
+        self.player_color = chess.WHITE
+        self.initial_fen = chess.STARTING_FEN
+        self.status = None
+        self.game_id = None
+        self.stream = None
 
-        for line in response.iter_lines():
-            if line:
-                event = line.decode("utf-8")
-                if '"fen"' in event:
-                    fen = event.split('"fen":"')[1].split('"')[0]
-                    self.update_from_fen(fen)
-                    return fen
+        self.on_rejected = on_rejected
+        # Moves applied locally that the stream has not echoed back yet
+        self.pending = []
+        # One record per submitted move: move, seconds, accepted, error
+        self.move_timings = []
+        self.last_submission = None
+        # Single worker keeps submissions in order on a kept-alive connection
+        self._submitter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lichess-move")
 
-        return None
-        
-            
+    def start_stream(self, game_id: str, on_moves=None, on_event=None) -> GameStream:
+        """
+        Follow a game in the background.
+
+        Args:
+            game_id: Lichess game id
+            on_moves: Optional callback receiving the SAN of each batch of
+                moves received from the server (e.g. to announce them)
+            on_event: Optional callback receiving the raw stream events
+                instead; the caller applies them with handle_event (e.g.
+                from its own event loop)
+        """
+        self.game_id = game_id
+
+        if on_event is None:
+            def on_event(event: dict) -> None:
+                moves = self.handle_event(event)
+                if moves and on_moves:
+                    on_moves(moves)
+
+        self.stream = GameStream(self.client, game_id, on_event).start()
+        return self.stream
+
+    def stop_stream(self) -> None:
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+
+    def close(self) -> None:
+        self.stop_stream()
+        self._submitter.shutdown(wait=True)
+        self.client.close()
+
+    # ---------------------------------------------------------
+    # Our moves
+    # ---------------------------------------------------------
+    def play_move(self, move: str):
+        """
+        Apply a move locally and submit it without waiting for the server.
+
+        Returns:
+            The local result, as GameState.play_move. When connected to a
+            game, the returned Future resolves once the server has answered;
+            it is kept on self.last_submission.
+        """
+        with self.lock:
+            success, result = super().play_move(move)
+            if not success or self.game_id is None:
+                return (success, result)
 
+            played = self.board.peek()
+            self.pending.append(played)
+
+        self.last_submission = self._submitter.submit(self._submit, played, move)
+        return (success, result)
+
+    def _submit(self, played: chess.Move, spoken: str) -> bool:
+        start = time.perf_counter()
+        accepted, error = self.client.submit_move(self.game_id, played.uci())
+        self.move_timings.append({
+            "move": played.uci(),
+            "seconds": time.perf_counter() - start,
+            "accepted": accepted,
+            "error": error,
+        })
+
+        if accepted:
+            return True
+
+        with self.lock:
+            self._rollback(played)
+        if self.on_rejected:
+            self.on_rejected(spoken, error)
+        return False
+
+    def _rollback(self, move: chess.Move) -> None:
+        if move not in self.pending:
+            # The stream already resynced the board without it
+            return
+        # Anything played on top of a rejected move is invalid as well
+        index = self.pending.index(move)
+        undo = len(self.pending) - index
+        del self.pending[index:]
+        for _ in range(undo):
+            self.board.pop()
+        self.move_index.update()
+
+    # ---------------------------------------------------------
+    # Server events
+    # ---------------------------------------------------------
+
+    def handle_event(self, event: dict) -> list[str]:
+        """Apply a board stream event; returns SAN of newly applied moves."""
+        kind = event.get("type")
+
+        if kind == "gameFull":
+            fen = event.get("initialFen", "startpos")
+            self.initial_fen = chess.STARTING_FEN if fen == "startpos" else fen
+            with self.lock:
+                if self.board.root().fen() != self.initial_fen:
+                    self.board.set_fen(self.initial_fen)
+            if self.username:
+                black = (event.get("black") or {}).get("id", "")
+                self.player_color = chess.BLACK if black.lower() == self.username else chess.WHITE
+            state = event.get("state", {})
+        elif kind == "gameState":
+            state = event
+        else:
+            return []
+
+        self.status = state.get("status", self.status)
+        return self.apply_server_moves(state.get("moves", ""))
+
+    def apply_server_moves(self, moves: str) -> list[str]:
+        """
+        Bring the board in line with the server's space-separated UCI move
+        list, pushing only the moves we don't have yet. Falls back to a
+        replay from the initial position on takebacks or divergence.
+        """
+        server = moves.split()
+
+        with self.lock:
+            stack = self.board.move_stack
+            applied = len(stack)
+            confirmed = applied - len(self.pending)
+
+            def matches(n: int) -> bool:
+                return n == 0 or (len(server) >= n and server[n - 1] == stack[n - 1].uci())
+
+            if len(server) >= applied and matches(applied):
+                new = server[applied:]
+                self.pending.clear()
+            elif self.pending and len(server) == confirmed and matches(confirmed):
+                # Our optimistic move has not reached the stream yet
+                return []
+            else:
+                self.board.set_fen(self.initial_fen)
+                self.pending.clear()
+                new = server
+
+            try:
+                played = self._push_uci(new)
+            except ValueError:
+                # Our board had diverged from the server; the server wins
+                self.board.set_fen(self.initial_fen)
+                self.pending.clear()
+                played = self._push_uci(server)
+
+            self.move_index.update()
+            return played
+
+    def _push_uci(self, moves: list[str]) -> list[str]:
+        played = []
+        for uci in moves:
+            move = self.board.parse_uci(uci)
+            played.append(self.board.san(move))
+            self.board.push(move)
+        return played
+
+    def fetch_game_state(self, game_id):
+        """Read the current position once from the board stream."""
+        response = self.client.open_stream(game_id)
+        try:
+            for event in self.client.iter_events(response):
+                if event.get("type") in ("gameFull", "gameState"):
+                    self.handle_event(event)
+                    return self.board.fen()
+        finally:
+            response.close()
+
+        return None
@@ -0,0 +1,180 @@
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Iterator, Optional
+
+LICHESS_URL = "https://lichess.org"
+
+# Game statuses that keep the board stream open; anything else ends the game
+ACTIVE_STATUSES = {"created", "started"}
+
+# Errors that will not go away by reconnecting (bad token, unknown game)
+FATAL_STATUS_CODES = {400, 401, 403, 404}
+
+
+class LichessClient:
+    """
+    Long-lived HTTP client for the Lichess Board API.
+
+    A single requests.Session with a pooled keep-alive adapter is shared by
+    the game stream and everything else, so TCP/TLS setup is paid once per
+    connection rather than once per call.
+
+    Args:
+        token: Personal API token (board:play scope)
+        base_url: Server root, overridable for tests
+        pool_size: Connections kept alive (the stream holds one of them)
+        connect_timeout: Seconds to wait for a connection
+        read_timeout: Seconds of silence before a stream is considered dead
+            (Lichess sends an empty keep-alive line every few seconds)
+        submit_timeout: Seconds to wait for a move submission response
+    """
+
+    def __init__(self, token: str, base_url: str = LICHESS_URL, pool_size: int = 4,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 submit_timeout: float = 10.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.submit_timeout = (connect_timeout, submit_timeout)
+
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def open_stream(self, game_id: str) -> requests.Response:
+        """Open the NDJSON board stream of a game (caller closes it)."""
+        response = self.session.get(
+            f"{self.base_url}/api/board/game/stream/{game_id}",
+            stream=True, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def iter_events(response: requests.Response) -> Iterator[dict]:
+        """Yield one dict per NDJSON line, skipping keep-alive blank lines."""
+        for line in response.iter_lines():
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+    def submit_move(self, game_id: str, uci: str) -> tuple[bool, Optional[str]]:
+        """
+        Make a move in a board game, reusing a pooled connection.
+
+        Returns:
+            (True, None) if the server accepted it, otherwise (False, reason)
+        """
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/board/game/{game_id}/move/{uci}",
+                timeout=self.submit_timeout
+            )
+        except requests.RequestException as e:
+            return (False, str(e) or type(e).__name__)
+
+        if response.ok:
+            return (True, None)
+
+        try:
+            error = response.json().get("error")
+        except ValueError:
+            error = None
+        return (False, error or f"HTTP {response.status_code}")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def event_status(event: dict) -> Optional[str]:
+    """Game status carried by a gameFull or gameState event, if any."""
+    if event.get("type") == "gameFull":
+        return event.get("state", {}).get("status")
+    if event.get("type") == "gameState":
+        return event.get("status")
+    return None
+
+
+class GameStream:
+    """
+    Background consumer of one game's board stream.
+
+    Calls on_event for every event until the game ends or stop() is called.
+    Dropped connections are reopened with exponential backoff; Lichess
+    resends a full gameFull on reconnect, so no event is lost for good.
+
+    Args:
+        client: Shared LichessClient
+        game_id: Lichess game id
+        on_event: Called from the stream thread with each parsed event
+        min_backoff: First reconnect delay in seconds
+        max_backoff: Cap on the reconnect delay
+    """
+
+    def __init__(self, client: LichessClient, game_id: str, on_event: Callable[[dict], None],
+                 min_backoff: float = 0.5, max_backoff: float = 30.0) -> None:
+        self.client = client
+        self.game_id = game_id
+        self.on_event = on_event
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.reconnects = 0
+        self.finished = False
+        self.error = None
+
+        self._stop = threading.Event()
+        self._response = None
+        self._thread = None
+
+    def start(self) -> "GameStream":
+        self._thread = threading.Thread(target=self._run, name=f"lichess-{self.game_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        # Closing the response unblocks a read waiting on the socket
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        delay = self.min_backoff
+
+        while not self._stop.is_set():
+            try:
+                self._response = self.client.open_stream(self.game_id)
+                for event in self.client.iter_events(self._response):
+                    delay = self.min_backoff
+                    self.on_event(event)
+
+                    status = event_status(event)
+                    if status is not None and status not in ACTIVE_STATUSES:
+                        self.finished = True
+                        return
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code in FATAL_STATUS_CODES:
+                    self.error = e
+                    return
+            except (requests.RequestException, OSError):
+                pass
+            finally:
+                if self._response is not None:
+                    self._response.close()
+                    self._response = None
+
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.max_backoff)
+            self.reconnects += 1
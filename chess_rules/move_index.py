@@ -0,0 +1,228 @@
+import chess
+from typing import Optional
+from chess_rules.spoken_moves import spoken_forms, canonical_key, destination
+
+# Fuzzy matching must never swap, add or drop the piece that was named
+PIECE_LETTERS = frozenset("NBRQK")
+
+
+class _Node:
+    __slots__ = ("children", "moves")
+
+    def __init__(self) -> None:
+        self.children = {}
+        self.moves = {}  # move -> variant rank (lower is more natural)
+
+
+class _SideIndex:
+    """Spoken-form trie for the legal moves of one side to move."""
+
+    def __init__(self) -> None:
+        self.root = _Node()
+        self.keys = {}        # move -> [(key, rank), ...]
+        self.signatures = {}  # move -> signature the keys were built from
+
+    def insert(self, move: chess.Move, keys: list[tuple[str, int]]) -> None:
+        for key, rank in keys:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _Node())
+            if rank < node.moves.get(move, rank + 1):
+                node.moves[move] = rank
+        self.keys[move] = keys
+
+    def remove(self, move: chess.Move) -> None:
+        for key, _ in self.keys.pop(move, ()):
+            path = [self.root]
+            for char in key:
+                path.append(path[-1].children[char])
+            path[-1].moves.pop(move, None)
+
+            # Prune branches that no longer lead to any move
+            for depth in range(len(key), 0, -1):
+                node = path[depth]
+                if node.moves or node.children:
+                    break
+                del path[depth - 1].children[key[depth - 1]]
+
+        self.signatures.pop(move, None)
+
+    def exact(self, key: str) -> Optional[_Node]:
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+
+class MoveIndex:
+    """
+    Maps fuzzy transcripts to the legal moves of the current position.
+
+    Every legal move is indexed under the canonical keys of its spoken
+    variants ("knight f3", "knight to f three", "g1 f3", "Nf3") in a
+    character trie. Lookup tries an exact key first and then a bounded
+    edit-distance walk of the trie, restricted to moves that land on the
+    square that was heard.
+
+    The index keeps one trie per colour and updates it incrementally: after
+    a move is pushed only the moves that appeared, disappeared or changed
+    their notation (new capture, new disambiguation) since that side last
+    moved are touched.
+
+    Args:
+        board: Board to index (e.g. GameState.board)
+        max_distance: Maximum edit distance accepted by fuzzy lookup
+    """
+
+    def __init__(self, board: chess.Board, max_distance: float = 1.0) -> None:
+        self.board = board
+        self.max_distance = max_distance
+        self._sides = {chess.WHITE: _SideIndex(), chess.BLACK: _SideIndex()}
+        self._position = None
+        self.update()
+
+    # ---------------------------------------------------------
+    # Maintenance
+    # ---------------------------------------------------------
+    def update(self) -> None:
+        """Bring the index in line with the board (cheap if unchanged)."""
+        position = self.board._transposition_key()
+        if position == self._position:
+            return
+
+        side = self._sides[self.board.turn]
+        legal = list(self.board.legal_moves)
+        signatures = self._signatures(legal)
+
+        for move in [m for m in side.keys if signatures.get(m) != side.signatures.get(m)]:
+            side.remove(move)
+
+        for move in legal:
+            if move not in side.keys:
+                side.insert(move, self._keys_for(move))
+                side.signatures[move] = signatures[move]
+
+        self._position = position
+
+    def _signatures(self, legal: list[chess.Move]) -> dict:
+        """
+        Everything a move's spoken forms depend on besides the move itself:
+        the piece making it, whether it captures, and which other pieces of
+        the same type can reach the same square (SAN disambiguation).
+        """
+        groups = {}
+        for move in legal:
+            piece = self.board.piece_type_at(move.from_square)
+            groups.setdefault((piece, move.to_square), []).append(move.from_square)
+
+        signatures = {}
+        for move in legal:
+            piece = self.board.piece_type_at(move.from_square)
+            rivals = groups[(piece, move.to_square)]
+            signatures[move] = (
+                piece,
+                self.board.is_capture(move),
+                tuple(rivals) if len(rivals) > 1 and piece != chess.PAWN else ()
+            )
+        return signatures
+
+    def _keys_for(self, move: chess.Move) -> list[tuple[str, int]]:
+        keys = {}
+        forms = spoken_forms(self.board, move)
+        for rank, form in enumerate(forms):
+            key = canonical_key(form)
+            if key and key not in keys:
+                keys[key] = rank
+
+        # Players often leave out "takes": accept "knight d5" for Nxd5
+        for key, rank in list(keys.items()):
+            if "x" in key:
+                keys.setdefault(key.replace("x", ""), rank + len(forms))
+
+        return list(keys.items())
+
+    # ---------------------------------------------------------
+    # Lookup
+    # ---------------------------------------------------------
+    def candidates(self, text: str) -> list[tuple[chess.Move, float, int]]:
+        """
+        Return matching legal moves as (move, distance, rank), best first.
+        """
+        self.update()
+        side = self._sides[self.board.turn]
+        key = canonical_key(text)
+        if not key:
+            return []
+
+        node = side.exact(key)
+        if node is not None and node.moves:
+            return sorted(((m, 0.0, r) for m, r in node.moves.items()), key=lambda c: c[2])
+
+        # Fuzzy fallback: never change the square the user asked for
+        target = destination(key)
+        found = {}
+        first_row = [0]
+        for char in key:
+            first_row.append(first_row[-1] + (2 if char in PIECE_LETTERS else 1))
+        for char, child in side.root.children.items():
+            self._walk(child, char, key, first_row, found)
+
+        results = []
+        for move, (distance, rank) in found.items():
+            if target and chess.square_name(move.to_square) != target:
+                continue
+            results.append((move, distance, rank))
+
+        return sorted(results, key=lambda c: (c[1], c[2]))
+
+    def lookup(self, text: str) -> Optional[chess.Move]:
+        """
+        Resolve a transcript to the best-ranked legal move.
+
+        Returns:
+            The move, or None if nothing matches or the best matches tie
+            (e.g. "knight d2" with two knights able to go there)
+        """
+        results = self.candidates(text)
+        if not results:
+            return None
+        if len(results) > 1 and results[1][1:] == results[0][1:]:
+            return None
+        return results[0][0]
+
+    def has_extension(self, text: str) -> bool:
+        """True if a longer spoken form of some legal move starts with text."""
+        self.update()
+        key = canonical_key(text)
+        node = self._sides[self.board.turn].exact(key) if key else None
+        return node is not None and bool(node.children)
+
+    def _walk(self, node: _Node, char: str, key: str, previous: list, found: dict) -> None:
+        # One row of the Levenshtein table per trie edge. A case-only
+        # difference ("b" file vs "B" bishop) costs half an edit; any other
+        # edit touching a piece letter costs more than max_distance allows.
+        skip = 2 if char in PIECE_LETTERS else 1
+        row = [previous[0] + skip]
+        for i, expected in enumerate(key, 1):
+            if expected == char:
+                cost = 0
+            elif expected.lower() == char.lower():
+                cost = 0.5
+            elif expected in PIECE_LETTERS or char in PIECE_LETTERS:
+                cost = 2
+            else:
+                cost = 1
+            drop = 2 if expected in PIECE_LETTERS else 1
+            row.append(min(row[i - 1] + drop, previous[i] + skip, previous[i - 1] + cost))
+
+        distance = row[-1]
+        if distance <= self.max_distance:
+            for move, rank in node.moves.items():
+                if move not in found or (distance, rank) < found[move]:
+                    found[move] = (distance, rank)
+
+        if min(row) <= self.max_distance:
+            for next_char, child in node.children.items():
+                self._walk(child, next_char, key, row, found)
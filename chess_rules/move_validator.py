@@ -1,53 +1,138 @@
+import re
 import chess
 from typing import Optional, List, Tuple
 # TODO: Add clarifications/comments etc.
 # TODO: (Optional) add chess 960 and variants
 
+PIECE_MAP = {'K': chess.KING, 'Q': chess.QUEEN, 'R': chess.ROOK, 
+             'B': chess.BISHOP, 'N': chess.KNIGHT, 'P': chess.PAWN}
+
+# SAN-like pattern: piece, optional origin file/rank, destination, promotion
+_SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?")
+_UCI_PATTERN = re.compile(r"[a-h][1-8][a-h][1-8][qrbn]?")
+
+
+class PositionCache:
+    """
+    Everything MoveClarifier needs about one position, built once per ply:
+    the set of legal moves (UCI lookups are one Move.from_uci plus a set
+    membership test, cheaper than formatting every move as a UCI string)
+    and (piece_type, to_square) -> moves. SAN strings are generated lazily
+    (board.san is the expensive part) and memoised in a SAN -> Move map.
+    """
+    
+    def __init__(self, board: chess.Board):
+        self.board = board
+        self.key = board._transposition_key()
+        self.legal = set()
+        self.by_san = {}
+        self.by_target = {}
+        self._san = {}
+        
+        for move in board.legal_moves:
+            self.legal.add(move)
+            piece_type = board.piece_type_at(move.from_square)
+            self.by_target.setdefault((piece_type, move.to_square), []).append(move)
+    
+    def san(self, move: chess.Move) -> str:
+        """SAN of a legal move in this position (memoised)."""
+        san = self._san.get(move)
+        if san is None:
+            san = self.board.san(move)
+            self._san[move] = san
+            self.by_san[san.rstrip("+#")] = move
+        return san
+    
+    def resolve(self, move_str: str) -> Tuple[Optional[chess.Move], str]:
+        """
+        Match a UCI or SAN string against the legal moves.
+        
+        Returns:
+            (move, "ok"), (None, "ambiguous") or (None, "illegal")
+        """
+        move_str = move_str.strip().rstrip("+#!?")
+        
+        # UCI, also the "e7e8=Q" form produced by the move parser
+        uci = move_str.replace("=", "").lower()
+        if _UCI_PATTERN.fullmatch(uci):
+            move = chess.Move.from_uci(uci)
+            return (move, "ok") if move in self.legal else (None, "illegal")
+        
+        move = self.by_san.get(move_str)
+        if move:
+            return (move, "ok")
+        
+        if move_str in ("O-O", "0-0", "O-O-O", "0-0-0"):
+            return self._castle(len(move_str) > 3)
+        
+        # SAN, including under-/over-specified forms ("Nd2" with two 
+        # knights able to go there, "Ng1f3", "xe4")
+        m = _SAN_PATTERN.fullmatch(move_str)
+        if not m:
+            return (None, "illegal")
+        
+        piece, from_file, from_rank, capture, to_square, promotion = m.groups()
+        candidates = [
+            move for move in self.by_target.get(
+                (PIECE_MAP[piece or "P"], chess.parse_square(to_square)), []
+            )
+            if (not from_file or chess.square_file(move.from_square) == ord(from_file) - ord("a"))
+            and (not from_rank or chess.square_rank(move.from_square) == int(from_rank) - 1)
+            and move.promotion == (PIECE_MAP[promotion] if promotion else None)
+            and (not capture or self.board.is_capture(move))
+        ]
+        
+        if len(candidates) == 1:
+            return (candidates[0], "ok")
+        if len(candidates) > 1:
+            return (None, "ambiguous")
+        return (None, "illegal")
+    
+    def _castle(self, queenside: bool) -> Tuple[Optional[chess.Move], str]:
+        for move in self.by_target.get((chess.KING, self._castle_target(queenside)), []):
+            if self.board.is_castling(move):
+                return (move, "ok")
+        return (None, "illegal")
+    
+    def _castle_target(self, queenside: bool) -> int:
+        rank = 0 if self.board.turn == chess.WHITE else 7
+        return chess.square(2 if queenside else 6, rank)
+
+
 class MoveClarifier:
     def __init__(self, board: chess.Board):
         self.board = board
+        self._cache = None
+    
+    @property
+    def cache(self) -> PositionCache:
+        """Legal-move cache for the current position (rebuilt after push/pop)."""
+        if self._cache is None or self._cache.key != self.board._transposition_key():
+            self._cache = PositionCache(self.board)
+        return self._cache
     
     def is_ambiguous(self, move_str: str) -> bool:
         """Check if move is ambiguous (e.g., 'Re1' when both rooks can move there)"""
-        try:
-            # Try parsing - if it fails due to ambiguity, return True
-            self.board.parse_san(move_str)
-            return False
-        except chess.AmbiguousMoveError:
-            return True
-        except (chess.InvalidMoveError, chess.IllegalMoveError):
-            return False # Invalid, but not ambiguous
+        return self.cache.resolve(move_str)[1] == "ambiguous"
     
     def get_disambiguation_options(self, move_str: str) -> str:
         """Return list of possible moves (e.g., ['Rae1', 'Rhe1'])"""
         options = []
         
-        # Extract destination square from move string
-        # Handles captures
-        dest = move_str.replace("x", "")[-2:]
-        
-        # Get piece type from move string
-        piece_char = move_str[0] if move_str[0].isupper() else "P"
-        piece_map = {'K': chess.KING, 'Q': chess.QUEEN, 'R': chess.ROOK, 
-                     'B': chess.BISHOP, 'N': chess.KNIGHT, 'P': chess.PAWN}
-        piece_type = piece_map.get(piece_char)
-        
-        if not piece_type:
+        m = _SAN_PATTERN.fullmatch(move_str.strip().rstrip("+#"))
+        if not m:
             return options
         
-        # Find all legal moves matching the pattern 
-        for move in self.board.legal_moves:
-            moving_piece = self.board.piece_at(move.from_square)
-            
-            # Check if this move matches our criteria
-            if (moving_piece and 
-                moving_piece.piece_type == piece_type and 
-                chess.square_name(move.to_square) == dest):
-                
-                # Get fully qualified SAN for this move
-                san = self.board.san(move)
-                from_sq = chess.square_name(move.from_square)
-                options.append((san, from_sq))
+        piece, _, _, _, dest, _ = m.groups()
+        piece_type = PIECE_MAP[piece or "P"]
+        cache = self.cache
+        
+        # Every legal move of that piece type to the destination
+        for move in cache.by_target.get((piece_type, chess.parse_square(dest)), []):
+            # Fully qualified SAN for this move
+            san = cache.san(move)
+            from_sq = chess.square_name(move.from_square)
+            options.append((san, from_sq))
                 
         return options
     
@@ -82,46 +167,27 @@ class MoveClarifier:
 
     def is_legal(self, move_str: str) -> bool:
         
-        # Try UCI first
-        try:
-            uci_move = chess.Move.from_uci(move_str)
-            return uci_move in self.board.legal_moves
-        except:
-            pass
-        
-        # Try SAN
-        try:
-            san_move = self.board.parse_san(move_str)
-            return san_move in self.board.legal_moves
-        except:
-            return False
+        return self.cache.resolve(move_str)[1] == "ok"
     
     def validate_move(self, move_str: str) -> Tuple[bool, Optional[str]]:
         
-        if self.is_ambiguous(move_str):
+        move, status = self.cache.resolve(move_str)
+        
+        if status == "ambiguous":
             return (False, "ambiguous")
         
-        if not self.is_legal(move_str):
+        if status == "illegal":
             return (False, "illegal")
         
         return (True, None)
     
     def execute_move(self, move_str: str) -> bool:
         
-        # try UCI first
-        try:
-            uci_move = chess.Move.from_uci(move_str)
-            if uci_move in self.board.legal_moves:
-                self.board.push(uci_move)
-                return True
-        except:
-            pass
-        
-        # fallback to SAN
-        try:
-            san_move = self.board.parse_san(move_str)
-            self.board.push(san_move)
-            return True
-        except:
+        move, status = self.cache.resolve(move_str)
+        
+        if move is None:
             return False
+        
+        self.board.push(move)
+        return True
         
\ No newline at end of file
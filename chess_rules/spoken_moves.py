@@ -0,0 +1,206 @@
+import re
+import chess
+from collections import OrderedDict
+
+PIECE_NAMES = {
+    chess.PAWN: "pawn",
+    chess.KNIGHT: "knight",
+    chess.BISHOP: "bishop",
+    chess.ROOK: "rook",
+    chess.QUEEN: "queen",
+    chess.KING: "king",
+}
+
+# Whisper's initial_prompt is truncated to ~224 tokens; stay well below it
+MAX_PROMPT_CHARS = 600
+CACHE_SIZE = 256
+
+
+# Word -> canonical key fragment. Piece letters are upper case, files lower
+# case, so "bishop c3" (Bc3) and "b c3" stay distinct. Includes the usual
+# Whisper mishearings of chess vocabulary.
+WORD_KEYS = {
+    "knight": "N", "knights": "N", "night": "N", "nite": "N", "horse": "N",
+    "bishop": "B", "bishops": "B",
+    "rook": "R", "rooks": "R", "rock": "R", "brook": "R",
+    "queen": "Q", "queens": "Q",
+    "king": "K", "kings": "K",
+    "takes": "x", "take": "x", "captures": "x", "capture": "x", "x": "x",
+    "one": "1", "won": "1",
+    "two": "2", "too": "2",
+    "three": "3", "tree": "3", "free": "3",
+    "four": "4", "for": "4", "fore": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8", "ate": "8",
+    "be": "b", "bee": "b",
+    "see": "c", "sea": "c",
+    "dee": "d",
+    "ef": "f", "eff": "f",
+    "gee": "g",
+    "aitch": "h",
+    "before": "b4",
+}
+
+FILLER_WORDS = {
+    "pawn", "pawns", "to", "on", "the", "move", "go", "at", "and", "then",
+    "please", "check", "checkmate", "mate", "square",
+}
+
+CASTLE_WORDS = {"castle", "castles", "castling"}
+KINGSIDE_WORDS = {"kingside", "short"}
+QUEENSIDE_WORDS = {"queenside", "long"}
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9=+#-]+")
+_SAN_RE = re.compile(r"[NBRQK]?[a-h]?[1-8]?x?[a-h][1-8](=?[NBRQ])?[+#]?")
+_SQUARE_RE = re.compile(r"[a-h][1-8]")
+_LOWER_SAN_RE = re.compile(r"[nrqk][a-h][1-8]")
+_COORDS_RE = re.compile(r"[a-h1-8]+")
+_PROMOTION_RE = re.compile(r"[a-h1-8]*[1-8][qrbn]")
+
+
+# ---------------------------------------------------------
+# Canonical keys
+# ---------------------------------------------------------
+def canonical_key(text: str) -> str:
+    """
+    Reduce a phrase to a compact key shared by all ways of saying a move.
+
+    Example: "knight to f three", "Night f3" and "Nf3" all give "Nf3";
+    "g1 f3" gives "g1f3"; "castle kingside" gives "OO". Returns "" when
+    nothing move-like is found (e.g. "castle" without a side).
+    """
+    tokens = _TOKEN_RE.findall(text)
+    lowered = [token.lower() for token in tokens]
+
+    if any(t in ("o-o-o", "0-0-0") for t in lowered):
+        return "OOO"
+    if any(t in ("o-o", "0-0") for t in lowered):
+        return "OO"
+    if CASTLE_WORDS.intersection(lowered):
+        if QUEENSIDE_WORDS.intersection(lowered) or "queen" in lowered:
+            return "OOO"
+        if KINGSIDE_WORDS.intersection(lowered) or "king" in lowered:
+            return "OO"
+        return ""
+
+    key = []
+    for token, lower in zip(tokens, lowered):
+        if _SAN_RE.fullmatch(token):
+            # Already notation ("Nf3", "exd5", "e8=Q+")
+            key.append(token.replace("=", "").rstrip("+#"))
+        elif lower in WORD_KEYS:
+            key.append(WORD_KEYS[lower])
+        elif lower in FILLER_WORDS:
+            continue
+        elif _LOWER_SAN_RE.fullmatch(lower):
+            # Lower-case SAN from the transcriber ("nf3"); "b" stays a file
+            key.append(lower[0].upper() + lower[1:])
+        elif _COORDS_RE.fullmatch(lower):
+            key.append(lower)
+        elif _PROMOTION_RE.fullmatch(lower):
+            # UCI promotion ("e7e8q")
+            key.append(lower[:-1] + lower[-1].upper())
+
+    return "".join(key)
+
+
+def destination(key: str) -> str | None:
+    """Return the destination square of a canonical key (its last square)."""
+    squares = _SQUARE_RE.findall(key)
+    return squares[-1] if squares else None
+
+
+# ---------------------------------------------------------
+# Spoken forms of a single move
+# ---------------------------------------------------------
+def spoken_forms(board: chess.Board, move: chess.Move) -> list[str]:
+    """
+    Return the ways a player might say a legal move, most natural first.
+
+    Example (1. Nf3): ["knight to f3", "knight f3", "g1 f3", "Nf3"]
+    """
+    if board.is_castling(move):
+        side = "kingside" if board.is_kingside_castling(move) else "queenside"
+        return [f"castle {side}", "short castle" if side == "kingside" else "long castle",
+                "O-O" if side == "kingside" else "O-O-O"]
+
+    piece = board.piece_type_at(move.from_square)
+    name = PIECE_NAMES[piece]
+    from_sq = chess.square_name(move.from_square)
+    to_sq = chess.square_name(move.to_square)
+    san = board.san(move).rstrip("+#")
+
+    forms = []
+    if board.is_capture(move):
+        if piece == chess.PAWN:
+            forms.append(f"{from_sq[0]} takes {to_sq}")
+        forms.append(f"{name} takes {to_sq}")
+    elif piece == chess.PAWN:
+        forms.append(to_sq)
+        forms.append(f"pawn to {to_sq}")
+    else:
+        forms.append(f"{name} to {to_sq}")
+        forms.append(f"{name} {to_sq}")
+
+    if move.promotion:
+        promo = PIECE_NAMES[move.promotion]
+        forms = [f"{form} {promo}" for form in forms]
+        forms.append(f"{from_sq} {to_sq} {promo}")
+    else:
+        forms.append(f"{from_sq} {to_sq}")
+
+    forms.append(san)
+    return forms
+
+
+# ---------------------------------------------------------
+# Per-position decoding context
+# ---------------------------------------------------------
+class DecodingContext:
+    """
+    Whisper decoding hints built from the legal moves of a position.
+
+    Both values are cached per position (board transposition key), so
+    repeated utterances in the same position cost a dict lookup.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._cache = OrderedDict()
+
+    def get(self, board: chess.Board) -> tuple[str, str]:
+        """Return (initial_prompt, hotwords) for the position on board."""
+        key = board._transposition_key()
+        entry = self._cache.get(key)
+
+        if entry is None:
+            entry = self._build(board)
+            self._cache[key] = entry
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        return entry
+
+    def _build(self, board: chess.Board) -> tuple[str, str]:
+        phrases = []
+        words = {"takes", "to", "castle", "kingside", "queenside"}
+
+        for move in board.legal_moves:
+            forms = spoken_forms(board, move)
+            phrases.append(forms[0])
+            words.update(forms[0].split())
+
+        # Prompt reads like a previous transcript so Whisper copies the style
+        prompt = "Chess moves: "
+        for phrase in phrases:
+            if len(prompt) + len(phrase) + 2 > MAX_PROMPT_CHARS:
+                break
+            prompt += phrase + ", "
+        prompt = prompt.rstrip(", ") + "."
+
+        hotwords = " ".join(sorted(words))
+        return prompt, hotwords
@@ -1,17 +1,76 @@
+import time
+_import_start = time.perf_counter()
+
+import asyncio
+from app.orchestrator import Orchestrator, Session
+from app.recorder import SessionRecorder
+from app.startup import ModelWarmup
+from app.tracing import Tracer
 from chess_rules import game_interface as gi
-from voice_input import intent_classifier as intent
-from voice_input import move_parser as mp
-from voice_input import speech_to_text as SpeechRecognizer
+from voice_input.intent_classifier import IntentClassifier, RemoteIntentClassifier
+from voice_input.speech_to_text import SpeechRecognizer, RemoteSpeechRecognizer
+from voice_input.cascade import DecodingCascade
 from voice_output.text_to_speech import TextToSpeech
+from voice_output.phrase_cache import PhraseCache
 import os
 # TODO: Remove redundant tts.speak...
 
+IMPORT_TIME = time.perf_counter() - _import_start
+
+# Tones instead of spoken confirmations (for fast time controls)
+EARCON_MODE = False
+
+# Directory for utterances.jsonl / metrics.prom (None: keep in memory),
+# and whether to run the sampling profiler (writes profile.txt on exit)
+TRACE_DIR = None
+PROFILE = False
+
+# Trailing silence (seconds) that ends a spoken command
+END_SILENCE = 0.25
+
+# Play a move as soon as the partial transcript pins it down, before the
+# user has finished speaking (re-decodes while listening: more CPU)
+EARLY_COMMIT = False
+
+# Decode with tiny.en first and escalate (wider beam, then base.en) only
+# when the transcript is unsure or doesn't name a legal move/command
+CASCADE = False
+
+# Socket of a running model server (python -m voice_input.model_server)
+# to use instead of loading Whisper and the intent encoder in this process
+MODEL_SERVER = None
+
+# Directory to keep a session log in (transcripts, moves, audio; see
+# python -m app.recorder for PGN export and replay), or None
+RECORD_DIR = None
+
+# Rendered once and replayed from the phrase cache
+FIXED_PROMPTS = [
+    "Ready",
+    "Invalid move",
+    "Could not understand move. Please try again.",
+    "Which side? Kingside or queenside?",
+    "Please say kingside or queenside.",
+    "Castled kingside",
+    "Castled queenside",
+    "Cannot castle.",
+    "Cannot castle on that side.",
+    "Castling is not legal in this position.",
+    "That square doesn't match any legal move. Please try again.",
+    "I didn't understand. Please say the square, like 'a1' or 'h8'.",
+]
+# Most played moves in master games, announced as "Moved ..."
+COMMON_MOVES = [
+    "e4", "d4", "Nf3", "c4", "e5", "d5", "Nc6", "Nf6", "c5", "e6",
+    "Nc3", "g3", "Bg2", "Be7", "d6", "c6", "Bb5", "Bc4", "Be2", "h3",
+]
+
 # Global game state and TTS
 game = None
 tts = None
 recognizer = None
-waiting_for_clarification = False
-pending_move = None
+intent = None
+tracer = None
 
 def setup_ffmpeg():
     """Add ffmpeg to system PATH."""
@@ -42,159 +101,100 @@ def setup_microphone():
     return mic_index
 
 
-def handle_clarification(text: str) -> bool:
-    # TODO: check/define scope of function (if it will work only for ambiguity or also for illegal moves...)
-    global waiting_for_clarification, pending_move
-    
-    if pending_move == "castle":
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ["kingside", "short", "king"]):
-            castle_move = "O-O"
-        elif any(word in text_lower for word in ["queenside", "long", "queen"]):
-            castle_move = "O-O-O"
-        else:
-            tts.speak("Please say kingside or queenside.")
-            return True  # Stay in clarification mode   
-        
-        success, error = game.play_move(castle_move)
-                        
-        if success: 
-            side = "queenside" if castle_move == "O-O-O" else "kingside"
-            # TODO: Add logic for actually castling...
-            tts.speak(f"Castled {side}")
-            waiting_for_clarification = False
-            pending_move = None
-        else:
-            tts.speak("Cannot castle on that side.")
-            waiting_for_clarification = False
-            pending_move = None
-    
-    # TODO: check implementation inside move_parser.py
-    from_square = mp.extract_square_disambiguation(text) 
-    
-    if from_square:
-        success, error = game.handle_ambiguous_move(pending_move, from_square)
-        
-        if success: 
-            tts.speak(f"Moved {pending_move} from {from_square}")
-            
-            waiting_for_clarification = False 
-            pending_move = None
-            
-            if game.is_game_over():
-                result = game.get_result()
-                tts.speak(f"Game over. {result}")
-                return False
-            
-        else: 
-            tts.speak("That square doesn't match any legal move. Please try again.")
-            return True
-    else:
-        tts.speak("I didn't understand. Please say the square, like 'a1' or 'h8'.")
-        return True
-    
-    return True
-
-
-def handle_speech(text: str):
-    """Process recognized speech and execute chess commands."""
-    intent_type = intent.predict(text)
-    
-    if intent_type == "move":
-        parsed_move = mp.parse_move(text)
-        
-        if not parsed_move:
-            tts.speak("Could not understand move. Please try again.")
-            return True
-        
-        success, error = game.play_move(parsed_move)
-        
-        if success:
-            # TODO: Execute move logic...
-            tts.speak(f"Moved {parsed_move}")            
-        elif error == "ambiguous":
-            # Handle disambiguation
-            prompt = game.get_disambiguation_prompt(parsed_move)
-            tts.speak(prompt)
-            # TODO: Listen for clarification, then call:
-            # game.handle_ambiguous_move(parsed_move, from_square)
-        else:
-            tts.speak("Invalid move")
-    
-    elif intent_type == "castle":
-        castle_result = game.parse_castling_intent(text)
-        
-        if castle_result is None:
-            tts.speak("Castling is not legal in this position.")
-            return True
-        
-        # Check if ambiguous
-        if isinstance(castle_result, tuple) and castle_result[0] == "ambiguous":
-            # Both castling options available - ask for clarification
-            tts.speak("Which side? Kingside or queenside?")
-            waiting_for_clarification = True
-            pending_move = "castle"
+def understood(text: str) -> bool:
+    """Cascade check: the transcript is a playable move or another command."""
+    # Runs on the transcription thread while moves may be played
+    with game.lock:
+        if game.resolve_spoken_move(text):
             return True
-        
-        success, error = game.play_move(castle_result)
-        
-        if success:
-            side = "queenside" if castle_result == "O-O-O" else "kingside"
-            tts.speak(f"Castled {side}")
-        else:
-            tts.speak("Cannot castle.")
-        
-    # elif intent_type == "resign":
-        # tts.speak("Resigning game.")
-        # # TODO: Implement resign logic
-        # return False
-        
-    # elif intent_type == "draw":
-        # tts.speak("Offering draw.")
-        # TODO: Implement draw offer logic (also accepting draw logic...)
-        
-    # elif intent_type == "new_game":
-        # game.board.reset()
-        # tts.speak("Starting new game.")
-        # TODO: Implement logic for actually searching new game
-        
-    # elif intent_type == "rematch":
-        # TODO: Implement logic for offering/accepting rematch
-        
-    # elif intent_type == "repeat":
-        # TODO: Implement repeat last announcement
-        # tts.speak(last_announcement)
-    
-    # else:
-        # tts.speak("I didn't understand that command.")
-    
-    # TODO: Handle other intents...
-    # if intent_type == "":
-    
-    return True
+    return intent.predict(text) not in ("move", None)
 
 
 def main():
     """Main application entry point."""
-    setup_ffmpeg()
-    mic_index = setup_microphone()
+    global game, tts, recognizer, intent, tracer
     
-    # Initialize speech recognizer
-    recognizer = SpeechRecognizer(
-        mic_index=mic_index,
-        phrase_time_limit=4
-    )
+    setup_ffmpeg()
+    tracer = Tracer(TRACE_DIR, profile=PROFILE)
+    game = gi.GameState()
+    tts = TextToSpeech(earcons=EARCON_MODE, cache=PhraseCache(), tracer=tracer)
+    tts.prewarm(FIXED_PROMPTS + [f"Moved {move}" for move in COMMON_MOVES])
+    
+    # Models load in parallel on background threads while the user picks 
+    # a microphone
+    if MODEL_SERVER:
+        recognizer = RemoteSpeechRecognizer(
+            MODEL_SERVER,
+            phrase_time_limit=4,
+            end_silence=END_SILENCE,
+            board=game.board,
+            board_lock=game.lock,
+            preload=False
+        )
+        intent = RemoteIntentClassifier(MODEL_SERVER, preload=False)
+    else:
+        recognizer = SpeechRecognizer(
+            phrase_time_limit=4,
+            end_silence=END_SILENCE,
+            board=game.board,
+            board_lock=game.lock,
+            preload=False,
+            cascade=DecodingCascade(accept=understood) if CASCADE else None
+        )
+        intent = IntentClassifier(preload=False)
+    
+    warmup = ModelWarmup({"whisper": recognizer, "intent": intent})
+    warmup.record("app", "import", IMPORT_TIME)
+    warmup.start()
+    
+    recognizer.select_microphone(setup_microphone())
+    
+    if not warmup.ready:
+        print("Loading models...")
+    warmup.wait()
+    print(warmup.report())
+    if warmup.errors:
+        print(f"Retrying {', '.join(warmup.errors)}...")
+        warmup.retry()
+        warmup.wait()
+        print(warmup.report())
+    if not warmup.ok:
+        # Playing on would only fail (or stall on a reload) at the first move
+        tts.speak("Could not load the speech models. Exiting.")
+        tts.close()
+        recognizer.cleanup()
+        tracer.close()
+        raise SystemExit(1)
+    tts.speak("Ready")
     
     print("\nVoice Chess Interface Started")
     print("Say 'stop' to exit\n")
     
+    recorder = SessionRecorder(RECORD_DIR) if RECORD_DIR else None
+
+    # Capture, transcription, commands and server events run as separate
+    # stages; our own speech is not transcribed, talking over it cuts it off
+    orchestrator = Orchestrator(
+        recognizer,
+        intent,
+        Session(game, tts, tracer, recorder=recorder),
+        gate=tts.speaking,
+        on_barge_in=tts.interrupt,
+        early_commit=EARLY_COMMIT
+    )
+    
     try:
-        recognizer.listen_loop(callback=handle_speech)
+        asyncio.run(orchestrator.run())
     except KeyboardInterrupt:
         print("\nStopping...")
     finally:
         recognizer.cleanup()
+        if recognizer.cascade:
+            print(recognizer.cascade.report(recognizer.model_name))
+        tts.close()
+        tracer.close()
+        if recorder:
+            recorder.close()
         print("Goodbye!")
 
         
@@ -0,0 +1,125 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Script items for a stream connection:
+#   dict            -> one NDJSON event
+#   ""              -> keep-alive blank line
+#   ("sleep", s)    -> pause before the next item
+#   "drop"          -> cut the connection without finishing the response
+
+
+class StubLichess:
+    """
+    Local stand-in for the Lichess Board API, replaying scripted streams.
+
+    Each stream connection takes the next script from `streams`; once they
+    run out, the connection is answered with 404. Move submissions are
+    accepted after `move_delay` seconds unless the UCI is in `reject`.
+    """
+
+    def __init__(self, streams: list[list] | None = None, move_delay: float = 0.0,
+                 reject: set[str] | None = None) -> None:
+        self.streams = list(streams or [])
+        self.move_delay = move_delay
+        self.reject = set(reject or ())
+        self.connections = 0
+        self.requests = []
+        self.moves = []
+        # Client ports seen by move submissions (one per TCP connection)
+        self.move_ports = set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                stub.requests.append(("GET", self.path, self.headers.get("Authorization")))
+                if not self.path.startswith("/api/board/game/stream/") or not stub.streams:
+                    self._reply(404, {"error": "Not found"})
+                    return
+
+                stub.connections += 1
+                script = stub.streams.pop(0)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for item in script:
+                    if item == "drop":
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        self.close_connection = True
+                        return
+                    if isinstance(item, tuple):
+                        time.sleep(item[1])
+                        continue
+                    line = (json.dumps(item) if item else "") + "\n"
+                    self._chunk(line.encode())
+
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_POST(self) -> None:
+                stub.requests.append(("POST", self.path, self.headers.get("Authorization")))
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 6 or parts[:3] != ["api", "board", "game"] or parts[4] != "move":
+                    self._reply(404, {"error": "Not found"})
+                    return
+
+                stub.move_ports.add(self.client_address[1])
+                time.sleep(stub.move_delay)
+                uci = parts[5]
+                if uci in stub.reject:
+                    self._reply(400, {"error": f"Piece on {uci[:2]} cannot move to {uci[2:4]}"})
+                else:
+                    stub.moves.append(uci)
+                    self._reply(200, {"ok": True})
+
+            def _chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _reply(self, code: int, body: dict) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.handler = Handler
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubLichess":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def game_full(moves: str = "", status: str = "started", white: str = "alice", black: str = "bob",
+              initial_fen: str = "startpos") -> dict:
+    return {
+        "type": "gameFull", "id": "abcd1234", "initialFen": initial_fen,
+        "white": {"id": white}, "black": {"id": black},
+        "state": {"type": "gameState", "moves": moves, "status": status},
+    }
+
+
+def game_state(moves: str, status: str = "started") -> dict:
+    return {"type": "gameState", "moves": moves, "status": status}
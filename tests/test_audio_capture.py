@@ -0,0 +1,160 @@
+import wave
+import numpy as np
+from voice_input.audio_capture import AudioCapture, FileSource, SAMPLE_RATE
+
+
+def write_wav(path, samples):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+
+
+def utterance(seconds):
+    # Tone burst standing in for speech
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return 0.5 * np.sin(2 * np.pi * 220 * t)
+
+
+def silence(seconds):
+    rng = np.random.default_rng(0)
+    return 0.001 * rng.standard_normal(int(seconds * SAMPLE_RATE))
+
+
+def capture_segments(path, **kwargs):
+    capture = AudioCapture(FileSource(path), **kwargs)
+    capture.start()
+    segments = []
+    while (segment := capture.next_segment(timeout=5)) is not None:
+        segments.append(segment)
+    capture.stop()
+    return segments
+
+
+def test_two_utterances(tmp_path):
+    path = tmp_path / "two.wav"
+    write_wav(path, np.concatenate([
+        silence(0.5), utterance(0.6), silence(1.0), utterance(0.4), silence(1.0)
+    ]))
+
+    segments = capture_segments(path)
+
+    assert len(segments) == 2
+    # Utterance + pre-roll + trailing pause
+    assert 0.6 < len(segments[0]) / SAMPLE_RATE < 1.8
+    assert 0.4 < len(segments[1]) / SAMPLE_RATE < 1.6
+
+
+def test_phrase_time_limit(tmp_path):
+    path = tmp_path / "long.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(3.0), silence(1.0)]))
+
+    segments = capture_segments(path, phrase_time_limit=1)
+
+    assert len(segments) >= 2
+    assert all(len(s) <= 1.1 * SAMPLE_RATE for s in segments)
+
+
+def test_ring_buffer_wraps(tmp_path):
+    path = tmp_path / "wrap.wav"
+    write_wav(path, np.concatenate([silence(1.5), utterance(0.5), silence(1.0)]))
+
+    segments = capture_segments(path, buffer_seconds=2)
+
+    assert len(segments) == 1
+    assert np.abs(segments[0]).max() > 0.4
+
+
+def test_gate_ignores_tts_but_allows_barge_in(tmp_path):
+    import threading
+
+    path = tmp_path / "gated.wav"
+    # "TTS echo" picked up while gated, then the user speaking loudly over it
+    echo = 0.1 * utterance(0.6)
+    write_wav(path, np.concatenate([echo, 0.1 * silence(0.3), echo, 2 * utterance(0.5), silence(1.0)]))
+
+    gate = threading.Event()
+    gate.set()
+    barge_ins = []
+    segments = capture_segments(path, gate=gate, on_barge_in=lambda: barge_ins.append(True))
+
+    assert len(barge_ins) == 1
+    assert len(segments) == 1
+    assert 0.4 < len(segments[0]) / SAMPLE_RATE < 1.8
+
+
+def test_endpoint_follows_trailing_silence(tmp_path):
+    path = tmp_path / "short.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.4), silence(2.0)]))
+
+    # Microphone-sized reads are re-framed to 30 ms
+    capture = AudioCapture(FileSource(path, chunk_size=1024), pause_threshold=0.25)
+    capture.start()
+    segment = capture.next_segment(timeout=5)
+    capture.stop()
+
+    start, end, speech_end = capture.last_bounds
+    assert abs(speech_end / SAMPLE_RATE - 0.7) <= 0.03
+    # Ends within one frame of the trailing-silence window, not the phrase limit
+    assert 0.25 <= (end - speech_end) / SAMPLE_RATE <= 0.25 + 0.03
+    assert len(segment) == end - start
+
+
+def test_short_blips_are_dropped(tmp_path):
+    path = tmp_path / "click.wav"
+    write_wav(path, np.concatenate([silence(0.5), utterance(0.03), silence(1.0), utterance(0.4), silence(1.0)]))
+
+    segments = capture_segments(path)
+
+    assert len(segments) == 1
+    assert len(segments[0]) / SAMPLE_RATE > 0.4
+
+
+def test_custom_vad(tmp_path):
+    path = tmp_path / "vad.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.5), silence(1.0)]))
+
+    frames = []
+    def vad(frame):
+        frames.append(len(frame))
+        return False
+
+    # A classifier that never hears speech yields no utterances
+    assert capture_segments(path, vad=vad) == []
+    assert set(frames) == {480}
+
+
+def test_partial_utterance_while_speaking():
+    import threading
+    from voice_input.audio_capture import AudioSource
+
+    class Stalled(AudioSource):
+        # Speech that is still going on when the source stops delivering
+        def __init__(self):
+            self.chunks = [silence(0.3), utterance(0.5)]
+            self.waiting = threading.Event()
+            self.release = threading.Event()
+
+        def read(self):
+            if self.chunks:
+                return self.chunks.pop(0).astype(np.float32)
+            self.waiting.set()
+            self.release.wait(5)
+            return None
+
+    source = Stalled()
+    capture = AudioCapture(source)
+    capture.start()
+    assert source.waiting.wait(5)
+
+    start, samples = capture.partial()
+    assert capture.next_segment(timeout=0.1) is None and not capture.finished
+    assert 0.5 <= len(samples) / SAMPLE_RATE <= 0.75
+
+    source.release.set()
+    segment = capture.next_segment(timeout=5)
+    capture.stop()
+    assert capture.last_bounds[0] == start
+    assert len(segment) >= len(samples)
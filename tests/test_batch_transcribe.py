@@ -0,0 +1,34 @@
+import json
+from voice_input.batch_transcribe import completed, load_entries, split_threads
+
+
+def test_directory_and_manifest_inputs(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.wav").write_bytes(b"")
+    (tmp_path / "two.WAV").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("")
+    assert [e["file"] for e in load_entries(tmp_path)] == ["a/one.wav", "two.WAV"]
+
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{"file": "a/one.wav", "text": "e four"}]))
+    entry = load_entries(manifest)[0]
+    assert entry["path"] == str(tmp_path / "a" / "one.wav") and entry["text"] == "e four"
+
+    jsonl = tmp_path / "manifest.jsonl"
+    jsonl.write_text('{"file": "two.WAV"}\n\n')
+    assert [e["file"] for e in load_entries(jsonl)] == ["two.WAV"]
+
+
+def test_resume_skips_done_and_drops_partial_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert completed(output) == set()
+
+    output.write_text('{"file": "a.wav", "transcript": "e4"}\n{"file": "b.wav", "transcr')
+    assert completed(output) == {"a.wav"}
+    assert output.read_text().endswith("}\n")
+
+
+def test_split_threads():
+    assert split_threads(None, cpus=16) == (4, 4)
+    assert split_threads(None, cpus=2) == (1, 2)
+    assert split_threads(3, cpus=8) == (3, 2)
@@ -0,0 +1,59 @@
+from voice_input.cascade import DecodingCascade
+
+TIERS = [(None, 1), (None, 5), ("base.en", 5)]
+
+
+def result(text, avg_logprob=-0.2, no_speech_prob=0.1):
+    return {"text": text, "avg_logprob": avg_logprob, "no_speech_prob": no_speech_prob}
+
+
+def scripted(*results):
+    calls = []
+    def decode_tier(name, beam_size):
+        calls.append((name, beam_size))
+        return dict(results[len(calls) - 1])
+    return decode_tier, calls
+
+
+def test_confident_first_tier_is_kept():
+    cascade = DecodingCascade(TIERS)
+    decode_tier, calls = scripted(result("e four"))
+    assert cascade.run(decode_tier)["text"] == "e four"
+    assert calls == [(None, 1)]
+    assert cascade.last_tier == 0
+
+
+def test_escalates_on_low_confidence_and_rejection():
+    cascade = DecodingCascade(TIERS, accept=lambda text: text == "knight f3")
+    decode_tier, calls = scripted(
+        result("night of tree", avg_logprob=-1.2),   # unsure
+        result("night of three"),                    # sure, but no move
+        result("knight f3"),
+    )
+    kept = cascade.run(decode_tier)
+    assert kept["text"] == "knight f3" and kept["tier"] == 2
+    assert calls == TIERS
+
+    stats = cascade.stats()
+    assert [t["used"] for t in stats["tiers"]] == [0, 0, 1]
+    assert [t["decodes"] for t in stats["tiers"]] == [1, 1, 1]
+
+
+def test_no_speech_does_not_escalate():
+    cascade = DecodingCascade(TIERS)
+    decode_tier, calls = scripted(result(None, None, None))
+    assert cascade.run(decode_tier)["text"] is None
+    assert len(calls) == 1
+
+
+def test_best_guess_when_every_tier_is_unsure():
+    cascade = DecodingCascade(TIERS)
+    decode_tier, _ = scripted(
+        result("a", avg_logprob=-1.5),
+        result("b", avg_logprob=-0.9),
+        result("c", avg_logprob=-1.1),
+    )
+    assert cascade.run(decode_tier)["text"] == "b"
+    stats = cascade.stats()
+    assert stats["exhausted"] == 1 and stats["tiers"][1]["used_rate"] == 1.0
+    assert "tier 2 base.en beam 5" in cascade.report()
@@ -0,0 +1,69 @@
+import chess
+from chess_rules.game_interface import GameState
+from voice_input.early_commit import EarlyCommit, partial_due
+
+
+def committer(*moves, fen=None, stable=2):
+    game = GameState()
+    if fen:
+        game.update_from_fen(fen)
+    for move in moves:
+        assert game.play_move(move)[0]
+    return EarlyCommit(game.board, game.move_index, stable=stable)
+
+
+def test_commits_after_stable_partials():
+    early = committer()
+    assert early.update("knight", 1) is None
+    assert early.update("knight to f", 1) is None
+    assert early.update("knight to f three", 1) is None
+    assert early.update("knight to f three", 1) == "Nf3"
+    assert early.commits == 1
+
+
+def test_new_utterance_restarts_the_streak():
+    early = committer()
+    assert early.update("e four", 1) is None
+    assert early.update("e four", 2) is None
+    assert early.update("e4", 2) == "e4"
+
+
+def test_changing_move_restarts_the_streak():
+    early = committer()
+    assert early.update("e three", 1) is None
+    assert early.update("e four", 1) is None
+    assert early.update("e four", 1) == "e4"
+
+
+def test_holds_prefix_of_a_longer_move():
+    # "O-O" could still become "O-O-O" while both castles are legal
+    both = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+    early = committer(fen=both, stable=1)
+    assert early.update("O-O", 1) is None
+    assert early.held == 1
+    assert early.update("O-O-O", 1) == "O-O-O"
+
+    early = committer(fen="r3k2r/8/8/8/8/8/8/R3K2R w Kkq - 0 1", stable=1)
+    assert early.update("O-O", 1) == "O-O"
+
+
+def test_illegal_partials_are_ignored():
+    early = committer("e4", "d5", stable=1)
+    assert early.update("e4", 1) is None
+    assert early.update("e takes d5", 1) == "exd5"
+
+
+def test_never_commits_ambiguous_moves():
+    # Both knights can reach d2
+    early = committer(fen="4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1", stable=1)
+    assert early.update("knight d2", 1) is None
+    assert early.update("knight b1 d2", 1) == "Nbd2"
+
+
+def test_partial_due_on_interval_and_once_at_a_pause():
+    interval, pause = 4800, 1600
+    assert partial_due(5000, 0, 0, interval, pause)
+    assert not partial_due(6000, 5000, 0, interval, pause)
+    # The speaker stopped at 6000 and has been quiet for 1600 samples
+    assert partial_due(7600, 5000, 1600, interval, pause)
+    assert not partial_due(8000, 7600, 2000, interval, pause)
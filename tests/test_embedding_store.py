@@ -0,0 +1,42 @@
+import numpy as np
+from voice_input.embedding_store import EmbeddingStore
+
+
+def test_roundtrip_and_incremental_add(tmp_path):
+    store = EmbeddingStore("test/model", tmp_path)
+    vectors = np.eye(3, dtype=np.float32)
+    store.add(["a", "b", "c"], vectors)
+
+    reopened = EmbeddingStore("test/model", tmp_path)
+    found, missing = reopened.lookup(["b", "d", "a"])
+    assert missing == ["d"]
+    assert np.array_equal(found["b"], vectors[1])
+    assert np.array_equal(found["a"], vectors[0])
+
+    # Stored phrases and duplicates don't shift rows
+    reopened.add(["a", "d", "d"], np.array([[9, 9, 9], [0, 0, 2], [0, 0, 3]], dtype=np.float32))
+    found, missing = EmbeddingStore("test/model", tmp_path).lookup(["a", "c", "d"])
+    assert not missing
+    assert np.array_equal(found["a"], vectors[0])
+    assert np.array_equal(found["c"], vectors[2])
+    assert np.array_equal(found["d"], [0, 0, 2])
+
+
+def test_models_do_not_mix(tmp_path):
+    EmbeddingStore("model-a", tmp_path).add(["a"], np.ones((1, 2), dtype=np.float32))
+    found, missing = EmbeddingStore("model-b", tmp_path).lookup(["a"])
+    assert missing == ["a"]
+
+
+def test_add_unmaps_before_writing(tmp_path):
+    import weakref
+    store = EmbeddingStore("test/model", tmp_path)
+    store.add(["a"], np.ones((1, 2), dtype=np.float32))
+    store.lookup(["a"])
+    mapped = weakref.ref(store._matrix)
+
+    # Windows cannot truncate a file that is still mapped
+    store.add(["b"], np.zeros((1, 2), dtype=np.float32))
+    assert mapped() is None
+    found, _ = store.lookup(["a", "b"])
+    assert np.array_equal(found["b"], [0, 0])
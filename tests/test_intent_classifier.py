@@ -0,0 +1,102 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from voice_input.intent_backends import BACKENDS
+from voice_input.intent_classifier import IntentClassifier
+
+# Never read the developer's own ~/.handsfreechess/intents.json or
+# embedding store
+ISOLATED = {"phrases_path": Path(tempfile.mkdtemp()) / "intents.json", "store_dir": None}
+
+# The torch-free backend keeps these tests runnable without sentence_transformers
+classifier = IntentClassifier(backend="ngram", **ISOLATED)
+
+
+def test_fast_path():
+    assert classifier.fast_path("e2e4") == "move"
+    assert classifier.fast_path("nf3") == "move"
+    assert classifier.fast_path("castle kingside") == "castle"
+    assert classifier.fast_path("i resign") is None
+    assert classifier.predict("E4.") == "move"
+    assert classifier.predict("Resign!") == "resign"
+
+
+def test_ngram_backend():
+    assert classifier.predict("knight to f3") == "move"
+    assert classifier.predict("can we call it a draw") == "draw"
+    assert classifier.predict("say that again") == "repeat"
+    assert classifier.predict("hello there") is None
+
+
+def test_embedding_cache_is_bounded():
+    small = IntentClassifier(backend="ngram", cache_size=2, **ISOLATED)
+    for text in ["one thing", "another thing", "a third thing", "one thing"]:
+        small.predict(text)
+
+    stats = small.stats()
+    assert stats["cache_size"] == 2
+    assert stats["cache_hit_rate"] == 0.0
+    small.predict("one thing")
+    assert small.stats()["cache_hit_rate"] > 0
+
+
+def test_add_phrase(tmp_path):
+    phrases = tmp_path / "intents.json"
+    learner = IntentClassifier(backend="ngram", phrases_path=phrases, store_dir=tmp_path)
+    assert learner.predict("abandon ship") is None
+
+    learner.add_phrase("resign", "abandon ship")
+    assert learner.predict("abandon ship now") == "resign"
+
+    # Persisted for the next launch
+    assert "abandon ship" in IntentClassifier(backend="ngram", phrases_path=phrases, store_dir=tmp_path).intents["resign"]
+
+
+def test_predict_batch_matches_predict():
+    texts = ["e4", "knight to f3", "can we call it a draw", "hello there", "knight to f3", "Resign!"]
+    batch = IntentClassifier(backend="ngram", **ISOLATED)
+    assert batch.predict_batch(texts) == [classifier.predict(text) for text in texts]
+    assert batch.last_paths == ["fast_path", "cache_miss", "cache_miss", "cache_miss", "cache_miss", "fast_path"]
+    assert batch.predict_batch(["knight to f3"]) == ["move"]
+    assert batch.last_paths == ["cache_hit"]
+
+
+def test_intent_without_phrases_is_dropped(tmp_path):
+    phrases = tmp_path / "intents.json"
+    phrases.write_text('{"takeback": [], "draw": []}', encoding="utf-8")
+    user = IntentClassifier(backend="ngram", phrases_path=phrases, store_dir=None)
+    assert "takeback" not in user.intent_names
+    texts = ["knight to f3", "can we call it a draw", "hello there"]
+    assert user.predict_batch(texts) == [classifier.predict(text) for text in texts]
+
+
+def test_concurrent_predict_and_batch():
+    # The cascade's accept check calls predict() on the transcription
+    # thread while the intent worker runs predict_batch()
+    backend = BACKENDS["ngram"]()
+    encode, busy, overlaps = backend.encode, threading.Lock(), []
+
+    def exclusive_encode(texts):
+        if not busy.acquire(blocking=False):
+            overlaps.append(texts)
+            return encode(texts)
+        try:
+            time.sleep(0.001)
+            return encode(texts)
+        finally:
+            busy.release()
+    backend.encode = exclusive_encode
+
+    shared = IntentClassifier(backend=backend, cache_size=4, **ISOLATED)
+    texts = [f"play the move number {n}" for n in range(20)]
+    threads = [threading.Thread(target=lambda: [shared.predict(t) for t in texts * 5]),
+               threading.Thread(target=lambda: [shared.predict_batch(texts) for _ in range(5)])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == []
+    stats = shared.stats()
+    assert stats["calls"] == 2 * 5 * len(texts) and stats["cache_size"] == 4
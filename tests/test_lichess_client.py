@@ -0,0 +1,157 @@
+import time
+import chess
+from chess_rules.game_interface import LiChess
+from chess_rules.lichess_client import LichessClient
+from tests.lichess_stub import StubLichess, game_full, game_state
+
+
+def lichess(stub, username="alice"):
+    client = LichessClient("token", base_url=stub.url, read_timeout=2.0)
+    return LiChess("token", username=username, client=client)
+
+
+def follow(game, game_id="abcd1234", timeout=5.0):
+    received = []
+    stream = game.start_stream(game_id, on_moves=received.append)
+    stream.join(timeout)
+    return stream, received
+
+
+def test_incremental_moves():
+    script = [
+        game_full("e2e4"), "",
+        game_state("e2e4 e7e5"),
+        game_state("e2e4 e7e5 g1f3"),
+        game_state("e2e4 e7e5 g1f3", status="resign"),
+    ]
+    with StubLichess([script]) as stub:
+        game = lichess(stub)
+        stream, received = follow(game)
+
+    assert stream.finished
+    assert received == [["e4"], ["e5"], ["Nf3"]]
+    assert [m.uci() for m in game.board.move_stack] == ["e2e4", "e7e5", "g1f3"]
+    assert game.status == "resign"
+    assert stub.requests[0][2] == "Bearer token"
+
+
+def test_takeback_replays_from_initial_position():
+    fen = "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"
+    script = [
+        game_full("e2e4 e8d8", initial_fen=fen),
+        game_state("e2e4"),
+        game_state("e2e4 e8e7", status="draw"),
+    ]
+    with StubLichess([script]) as stub:
+        game = lichess(stub)
+        follow(game)
+
+    assert game.board.fen().startswith("8/4k3/8/8/4P3/8/8/4K3")
+    assert [m.uci() for m in game.board.move_stack] == ["e2e4", "e8e7"]
+
+
+def test_reconnects_after_drop():
+    first = [game_full("e2e4"), game_state("e2e4 e7e5"), "drop"]
+    second = [game_full("e2e4 e7e5 d2d4"), game_state("e2e4 e7e5 d2d4", status="mate")]
+    with StubLichess([first, second]) as stub:
+        game = lichess(stub, username="bob")
+        stream, received = follow(game)
+
+    assert stub.connections == 2
+    assert stream.reconnects == 1
+    assert received == [["e4"], ["e5"], ["d4"]]
+    assert game.player_color == chess.BLACK
+
+
+def test_unknown_game_stops():
+    with StubLichess([]) as stub:
+        game = lichess(stub)
+        stream, received = follow(game, game_id="missing")
+
+    assert stream.error is not None
+    assert not stream.finished
+    assert received == []
+
+
+def test_events_arrive_while_stream_is_open():
+    script = [game_full(""), game_state("d2d4"), ("sleep", 1.0), game_state("d2d4 d7d5", status="aborted")]
+    with StubLichess([script]) as stub:
+        game = lichess(stub)
+        received = []
+        start = time.perf_counter()
+        stream = game.start_stream("abcd1234", on_moves=lambda moves: received.append((moves, time.perf_counter() - start)))
+        stream.join(5.0)
+
+    # The first move is delivered before the server sends the next line
+    assert received[0][0] == ["d4"] and received[0][1] < 0.5
+    assert received[1][0] == ["d5"]
+
+
+def test_fetch_game_state():
+    with StubLichess([[game_full("e2e4 c7c5")]]) as stub:
+        game = lichess(stub)
+        fen = game.fetch_game_state("abcd1234")
+
+    assert fen == game.board.fen()
+    assert len(game.board.move_stack) == 2
+
+
+def connected(stub, **kwargs):
+    game = lichess(stub, **kwargs)
+    game.game_id = "abcd1234"
+    return game
+
+
+def test_move_applied_before_server_answers():
+    with StubLichess(move_delay=0.3) as stub:
+        game = connected(stub)
+        start = time.perf_counter()
+        assert game.play_move("e4") == (True, "move_executed")
+        elapsed = time.perf_counter() - start
+        assert game.board.peek().uci() == "e2e4"
+        assert game.last_submission.result(5.0)
+
+    assert elapsed < 0.1
+    assert stub.moves == ["e2e4"]
+    timing = game.move_timings[0]
+    assert timing["accepted"] and timing["move"] == "e2e4" and timing["seconds"] >= 0.3
+
+
+def test_rejected_move_is_rolled_back():
+    rejected = []
+    with StubLichess(reject={"e2e4"}) as stub:
+        game = connected(stub)
+        game.on_rejected = lambda move, reason: rejected.append((move, reason))
+        game.play_move("e4")
+        assert not game.last_submission.result(5.0)
+
+    assert game.board.move_stack == []
+    assert game.pending == []
+    assert rejected == [("e4", "Piece on e2 cannot move to e4")]
+    assert game.resolve_spoken_move("e4") == "e4"
+
+
+def test_submissions_reuse_connection():
+    with StubLichess() as stub:
+        game = connected(stub)
+        for move in ["e4", "e5", "Nf3", "Nc6"]:
+            game.play_move(move)
+            game.last_submission.result(5.0)
+
+    assert stub.moves == ["e2e4", "e7e5", "g1f3", "b8c6"]
+    assert len(stub.move_ports) == 1
+
+
+def test_stream_lagging_behind_optimistic_move():
+    with StubLichess() as stub:
+        game = connected(stub)
+        game.handle_event(game_full("e2e4 e7e5"))
+        game.play_move("Nf3")
+        # An older state arrives before our move is echoed: keep it
+        assert game.handle_event(game_state("e2e4 e7e5")) == []
+        assert game.board.peek().uci() == "g1f3"
+        # The echo of our own move is not announced as a new move
+        assert game.handle_event(game_state("e2e4 e7e5 g1f3")) == []
+        assert game.pending == []
+        assert game.handle_event(game_state("e2e4 e7e5 g1f3 b8c6")) == ["Nc6"]
+        game.last_submission.result(5.0)
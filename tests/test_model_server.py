@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from voice_input.intent_classifier import IntentClassifier, RemoteIntentClassifier
+from voice_input.model_server import ModelClient, ModelServer
+from tests.test_intent_classifier import ISOLATED
+
+intent = IntentClassifier(backend="ngram", **ISOLATED)
+
+
+class RecordingRecognizer:
+    """Stands in for SpeechRecognizer on the server: keeps what it was given."""
+
+    model_name = "recording"
+    cascade = None
+
+    def __init__(self):
+        self.board = None
+        self.heard = []
+
+    def transcribe(self, audio, escalate=True):
+        self.heard.append((np.array(audio), self.board.fen() if self.board else None, escalate))
+        return f"{len(audio)} samples"
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ModelServer(RecordingRecognizer(), intent, tmp_path / "models.sock").start()
+    yield server
+    server.close()
+
+
+def test_classify_matches_in_process(server):
+    texts = ["e4", "knight to f3", "can we call it a draw", "hello there"]
+    remote = RemoteIntentClassifier(server.path)
+
+    assert remote.predict_batch(texts) == intent.predict_batch(texts)
+    assert remote.predict("Resign!") == "resign"
+    assert remote.last_path == "fast_path"
+    assert server.requests["classify"] == 2
+    remote.close()
+
+
+def test_audio_goes_through_shared_memory(server):
+    client = ModelClient(server.path)
+    rng = np.random.default_rng(0)
+    short = rng.standard_normal(16000).astype(np.float32)
+    # Longer than the first block: the client moves to a bigger one
+    long = rng.standard_normal(16000 * 8).astype(np.float32)
+    fen = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+    assert client.transcribe(short, fen)["text"] == "16000 samples"
+    assert client.transcribe(long, escalate=False)["text"] == "128000 samples"
+    client.close()
+
+    (first, board, escalate), (second, no_board, partial) = server.recognizer.heard
+    assert np.array_equal(first, short) and np.array_equal(second, long)
+    assert board == fen and escalate
+    assert no_board is None and not partial
+
+
+def test_errors_are_returned_to_the_client(tmp_path):
+    server = ModelServer(None, intent, tmp_path / "models.sock").start()
+    client = ModelClient(server.path)
+
+    with pytest.raises(RuntimeError, match="does not serve speech recognition"):
+        client.transcribe(np.zeros(160, dtype=np.float32))
+    # The connection is still usable
+    assert client.classify(["e4"])["intents"] == ["move"]
+
+    with pytest.raises(OSError, match="already listening"):
+        ModelServer(None, intent, server.path).start()
+    client.close()
+    server.close()
@@ -0,0 +1,80 @@
+import chess
+from chess_rules.game_interface import GameState
+from chess_rules.move_index import MoveIndex
+
+
+def play(*moves):
+    game = GameState()
+    for move in moves:
+        assert game.play_move(move)[0]
+    return game
+
+
+def test_spoken_variants():
+    game = GameState()
+    for text in ["knight to f three", "night f3", "Knight f3", "g1 f3", "Nf3"]:
+        assert game.resolve_spoken_move(text) == "Nf3"
+
+
+def test_pawn_moves():
+    game = GameState()
+    assert game.resolve_spoken_move("e4") == "e4"
+    assert game.resolve_spoken_move("pawn to e four") == "e4"
+    assert game.resolve_spoken_move("before") == "b4"
+
+
+def test_capture_without_takes():
+    game = play("e4", "e5", "Nf3", "Nc6", "Bb5", "a6")
+    assert game.resolve_spoken_move("bishop takes c6") == "Bxc6"
+    assert game.resolve_spoken_move("bishop c6") == "Bxc6"
+    assert game.resolve_spoken_move("night takes e five") == "Nxe5"
+
+
+def test_castling():
+    game = play("e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5")
+    assert game.resolve_spoken_move("castle kingside") == "O-O"
+    assert game.resolve_spoken_move("castle") is None
+
+
+def test_fuzzy_never_changes_piece_or_square():
+    game = GameState()
+    assert game.resolve_spoken_move("knight f4") is None
+    assert game.resolve_spoken_move("g1 f4") is None
+    # Extra token between the squares is tolerated
+    assert game.resolve_spoken_move("e to e4") == "e4"
+
+
+def test_ambiguous_returns_none():
+    game = GameState()
+    game.update_from_fen("4k3/8/8/8/8/8/4K3/R6R w - - 0 1")
+    assert game.resolve_spoken_move("rook to d1") is None
+    assert game.resolve_spoken_move("a1 d1") == "Rad1"
+    assert game.resolve_spoken_move("Rhd1") == "Rhd1"
+
+
+def test_incremental_matches_rebuild():
+    game = play("e4", "e5", "Nf3", "Nc6", "Bb5", "Nd4", "Nxe5")
+    fresh = MoveIndex(game.board.copy())
+    incremental = game.move_index
+    incremental.update()
+
+    side = incremental._sides[game.board.turn]
+    rebuilt = fresh._sides[fresh.board.turn]
+    assert {m: sorted(k) for m, k in side.keys.items()} == \
+           {m: sorted(k) for m, k in rebuilt.keys.items()}
+
+
+def test_follows_external_pushes():
+    game = GameState()
+    game.board.push_san("e4")
+    assert game.resolve_spoken_move("e5") == "e5"
+
+
+def test_other_piece_on_the_same_square():
+    game = GameState()
+    game.update_from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+    assert game.resolve_spoken_move("rook a3") == "Ra3"
+    # Same from/to squares, different piece: its keys must be rebuilt
+    game.update_from_fen("4k3/8/8/8/8/8/8/Q3K3 w - - 0 1")
+    assert game.resolve_spoken_move("rook a3") is None
+    assert game.resolve_spoken_move("queen a3") == "Qa3"
@@ -22,12 +22,79 @@ def test_promotion_UCI():
     assert mp.parse_move("e7e8q") == "e7e8=Q"
 
 
+# Regression corpus: (utterance, expected parse_move output)
+CORPUS = [
+    ("knight to e5", "Ne5"),
+    ("knight to f three", "Nf3"),
+    ("Knight to F3.", "Nf3"),
+    ("move the rook to a7", "Ra7"),
+    ("rook to a seven", "Ra7"),
+    ("queen to d8", "Qd8"),
+    ("bishop takes f3", "Bxf3"),
+    ("bishop captures on f3", "Bxf3"),
+    ("pawn takes e4", "xe4"),
+    ("e takes d5", "exd5"),
+    ("b takes c3", "bxc3"),
+    ("e four", "e4"),
+    ("the pawn on e four", "e4"),
+    ("pawn e8 queen", "e8=Q"),
+    ("promote to queen on e8", "e8=Q"),
+    ("e8=q", "e8=Q"),
+    ("knight g1 to f3", "Ng1f3"),
+    ("king's knight to f3", "Nf3"),
+    ("queenside rook to d1", "Rd1"),
+    ("castle queenside", None),
+    ("hello", None),
+    # Spelled ranks never join onto a letter inside a word
+    ("I'm done", None),
+    ("gone", None),
+    ("height", None),
+    ("knight to gone", None),
+    # Notation
+    ("Nf3", "Nf3"),
+    ("nf3", "Nf3"),
+    ("exd5", "exd5"),
+    ("Qxd8+", "Qxd8"),
+    ("e8=Q", "e8=Q"),
+    ("e2e4", "e2e4"),
+    ("e2 e4", "e2e4"),
+    ("e7 e8 queen", "e7e8=Q"),
+    ("e7e8q", "e7e8=Q"),
+]
+
+
+def test_regression_corpus():
+    for text, expected in CORPUS:
+        assert mp.parse_move(text) == expected, text
+
+
+# Promotion only when it is one
+def test_promotion_not_triggered_by_moving_piece():
+    assert mp.extract_promotion("bishop to e8") is None
+    assert mp.extract_promotion("queen takes e8") is None
+    assert mp.extract_promotion("e8 knight") == "N"
+    assert mp.extract_promotion("promote to bishop") == "B"
+
+
+def test_square_disambiguation():
+    assert mp.extract_square_disambiguation("a1") == "a1"
+    assert mp.extract_square_disambiguation("a one") == "a1"
+    assert mp.extract_square_disambiguation("the rook on H eight") == "h8"
+    assert mp.extract_square_disambiguation("from b 2") == "b2"
+    assert mp.extract_square_disambiguation("the other one") is None
+    assert mp.extract_square_disambiguation("I'm done") is None
+    assert mp.extract_square_disambiguation("what a height") is None
+
+
 if __name__ == "__main__":
     test_basic_move()
     test_capture()
     test_promotion()
     test_basic_move_UCI()    
     test_promotion_UCI()
+    test_regression_corpus()
+    test_promotion_not_triggered_by_moving_piece()
+    test_square_disambiguation()
     print("All tests passed!")
     
 # python -m tests.test_move_parser
\ No newline at end of file
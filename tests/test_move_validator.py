@@ -0,0 +1,55 @@
+import chess
+from chess_rules.move_validator import MoveClarifier
+
+
+def clarifier(fen=None, *moves):
+    board = chess.Board(fen) if fen else chess.Board()
+    for move in moves:
+        board.push_san(move)
+    return MoveClarifier(board)
+
+
+def test_san_and_uci():
+    v = clarifier()
+    assert v.validate_move("Nf3") == (True, None)
+    assert v.validate_move("g1f3") == (True, None)
+    assert v.validate_move("e4") == (True, None)
+    assert v.validate_move("e5") == (False, "illegal")
+
+
+def test_capture_requires_capture():
+    v = clarifier()
+    assert v.validate_move("xe4") == (False, "illegal")
+
+    v = clarifier(None, "e4", "d5")
+    assert v.validate_move("xd5") == (True, None)
+    assert v.execute_move("exd5")
+    assert v.board.peek() == chess.Move.from_uci("e4d5")
+
+
+def test_ambiguous_rooks():
+    v = clarifier("4k3/8/8/8/8/8/4K3/R6R w - - 0 1")
+    assert v.is_ambiguous("Rd1")
+    assert v.validate_move("Rd1") == (False, "ambiguous")
+    assert v.validate_move("Rad1") == (True, None)
+    assert sorted(v.get_disambiguation_options("Rd1")) == [("Rad1", "a1"), ("Rhd1", "h1")]
+    assert v.resolve_ambiguous_move("Rd1", "h1") == "Rhd1"
+
+
+def test_castling_and_promotion():
+    v = clarifier("4k3/P7/8/8/8/8/8/4K2R w K - 0 1")
+    assert v.validate_move("0-0") == (True, None)
+    assert v.validate_move("O-O-O") == (False, "illegal")
+    assert v.validate_move("a7a8=Q") == (True, None)
+    assert v.validate_move("a8=N") == (True, None)
+
+
+def test_cache_follows_board():
+    board = chess.Board()
+    v = MoveClarifier(board)
+    assert v.validate_move("e4") == (True, None)
+    board.push_san("e4")
+    assert v.validate_move("e4") == (False, "illegal")
+    assert v.validate_move("e5") == (True, None)
+    board.pop()
+    assert v.validate_move("e4") == (True, None)
@@ -0,0 +1,219 @@
+import asyncio
+import time
+import chess
+import numpy as np
+import pytest
+from app.orchestrator import Orchestrator, Session
+from app.tracing import Tracer
+from chess_rules.game_interface import GameState
+from voice_input.audio_capture import AudioCapture, FileSource, SAMPLE_RATE
+from voice_input.intent_classifier import IntentClassifier
+from tests.test_audio_capture import write_wav, utterance, silence
+from tests.test_intent_classifier import ISOLATED
+
+intent = IntentClassifier(backend="ngram", **ISOLATED)
+
+
+class FakeTTS:
+    def __init__(self):
+        self.said = []
+
+    def speak(self, text, priority=None, key=None):
+        self.said.append(text)
+
+    def notify(self, event, text=None, priority=None):
+        self.said.append(text or event)
+
+
+class ScriptedRecognizer:
+    """Stands in for SpeechRecognizer: real capture, scripted transcripts."""
+
+    cascade = None
+
+    def __init__(self, transcripts, decode_seconds=0.0):
+        self.transcripts = list(transcripts)
+        self.decode_seconds = decode_seconds
+
+    def capture(self, source, **kwargs):
+        return AudioCapture(source, **kwargs)
+
+    def transcribe(self, audio, escalate=True):
+        time.sleep(self.decode_seconds)
+        return self.transcripts.pop(0)
+
+
+def speech_file(tmp_path, count):
+    path = tmp_path / "commands.wav"
+    parts = [silence(0.3)]
+    for _ in range(count):
+        parts += [utterance(0.4), silence(0.6)]
+    write_wav(path, np.concatenate(parts))
+    return FileSource(path)
+
+
+def test_session_keeps_clarification_state():
+    game = GameState()
+    game.update_from_fen("4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1")
+    tts = FakeTTS()
+    session = Session(game, tts)
+
+    assert session.handle("knight d2", "move")
+    assert session.state == Session.CLARIFY_SQUARE and session.pending_move
+
+    assert session.handle("the one on f1", None)
+    assert not session.waiting_for_clarification
+    assert game.board.peek().uci() == "f1d2"
+
+
+def test_session_castle_clarification():
+    game = GameState()
+    game.update_from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    session = Session(game, FakeTTS())
+
+    assert session.handle("castle", "castle")
+    assert session.state == Session.CLARIFY_CASTLE
+    assert session.handle("queenside", None)
+    assert game.board.peek().uci() == "e1c1"
+    assert session.state == Session.IDLE
+
+
+def test_pipeline_plays_commands_in_order(tmp_path):
+    game = GameState()
+    tts = FakeTTS()
+    tracer = Tracer()
+    recognizer = ScriptedRecognizer(["e4", "knight to c six"])
+    orchestrator = Orchestrator(recognizer, intent, Session(game, tts, tracer))
+
+    asyncio.run(orchestrator.run(speech_file(tmp_path, 2)))
+
+    assert [m.uci() for m in game.board.move_stack] == ["e2e4", "b8c6"]
+    assert tts.said == ["Moved e4", "Moved Nc6"]
+    assert tracer.prometheus().count('stage="stt",le="+Inf"} 2') == 1
+
+
+class StreamedGame(GameState):
+    # Minimal stand-in for LiChess: events carry one UCI move
+    player_color = chess.WHITE
+
+    def handle_event(self, event):
+        move = self.board.parse_uci(event["move"])
+        san = self.board.san(move)
+        self.board.push(move)
+        return [san]
+
+
+def test_server_events_do_not_wait_for_decoding(tmp_path):
+    game = StreamedGame()
+    game.board.push_san("e4")
+    tts = FakeTTS()
+    # A slow decode is in flight when the opponent's move arrives
+    recognizer = ScriptedRecognizer(["rematch"], decode_seconds=0.5)
+    orchestrator = Orchestrator(recognizer, intent, Session(game, tts))
+
+    async def scenario():
+        run = asyncio.create_task(orchestrator.run(speech_file(tmp_path, 1)))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        await asyncio.to_thread(orchestrator._post_event, {"move": "e7e5"})
+        while "Black played e5" not in tts.said:
+            await asyncio.sleep(0.005)
+        latency = time.perf_counter() - started
+        await run
+        return latency
+
+    assert asyncio.run(scenario()) < 0.2
+    assert recognizer.transcripts == []
+
+
+class BrokenCastling(GameState):
+    def parse_castling_intent(self, text):
+        raise AttributeError("player_color")
+
+
+def test_failing_command_is_skipped(tmp_path):
+    game = BrokenCastling()
+    tts = FakeTTS()
+    recognizer = ScriptedRecognizer(["castle to the left", "e4"])
+    orchestrator = Orchestrator(recognizer, intent, Session(game, tts))
+
+    asyncio.run(asyncio.wait_for(orchestrator.run(speech_file(tmp_path, 2)), 5))
+
+    assert [m.uci() for m in game.board.move_stack] == ["e2e4"]
+    assert tts.said == ["Sorry, something went wrong with that command.", "Moved e4"]
+
+
+def test_failing_stage_ends_the_run(tmp_path):
+    class BrokenCapture(ScriptedRecognizer):
+        def capture(self, source, **kwargs):
+            capture = AudioCapture(source, **kwargs)
+            capture.next_segment = lambda timeout=None: 1 / 0
+            return capture
+
+    orchestrator = Orchestrator(BrokenCapture([]), intent, Session(GameState(), FakeTTS()))
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(asyncio.wait_for(orchestrator.run(speech_file(tmp_path, 1)), 5))
+
+
+def test_early_commit_beats_the_endpointer(tmp_path):
+    # Speech ends at 0.85 s and the capture closes the utterance 0.25 s later;
+    # the 0.3 s partials miss the end of the move, only the pause one has it
+    path = tmp_path / "move.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.55), silence(0.8)]))
+    events = []
+
+    class PartialRecognizer(ScriptedRecognizer):
+        def capture(self, source, **kwargs):
+            capture = AudioCapture(source, **kwargs)
+            next_segment = capture.next_segment
+
+            def timed(timeout=None):
+                segment = next_segment(timeout)
+                if segment is not None:
+                    events.append(("segment", time.perf_counter()))
+                return segment
+            capture.next_segment = timed
+            return capture
+
+        def transcribe(self, audio, escalate=True):
+            # The move is only heard once all of it has been spoken
+            return "e4" if np.sum(np.abs(audio) > 0.1) > 0.45 * SAMPLE_RATE else "e"
+
+    class TimedTTS(FakeTTS):
+        def speak(self, text, priority=None, key=None):
+            events.append((text, time.perf_counter()))
+            super().speak(text)
+
+        def notify(self, event, text=None, priority=None):
+            events.append((text or event, time.perf_counter()))
+            super().notify(event, text)
+
+    game = GameState()
+    tracer = Tracer()
+    orchestrator = Orchestrator(PartialRecognizer([]), intent, Session(game, TimedTTS(), tracer),
+                                early_commit=True)
+    asyncio.run(orchestrator.run(FileSource(path, realtime=True)))
+
+    assert [m.uci() for m in game.board.move_stack] == ["e2e4"]
+    assert [name for name, _ in events] == ["Moved e4", "segment"]
+    assert tracer.prometheus().count('outcome="early_committed"') >= 1
+
+
+def test_mate_from_a_partial_stops_the_pipeline(tmp_path):
+    path = tmp_path / "moves.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.5), silence(0.8), utterance(0.5), silence(0.8)]))
+
+    class PartialRecognizer(ScriptedRecognizer):
+        def transcribe(self, audio, escalate=True):
+            return "queen h4"
+
+    game = GameState()
+    for san in ["f3", "e5", "g4"]:
+        game.board.push_san(san)
+    tts = FakeTTS()
+    tracer = Tracer()
+    orchestrator = Orchestrator(PartialRecognizer([]), intent, Session(game, tts, tracer), early_commit=True)
+    asyncio.run(asyncio.wait_for(orchestrator.run(FileSource(path, realtime=True)), 10))
+
+    assert game.board.is_checkmate()
+    assert tts.said[-1].startswith("Game over")
+    assert 'outcome="early_committed"' not in tracer.prometheus()
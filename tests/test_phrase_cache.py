@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from tests.test_audio_capture import write_wav
+from voice_output.phrase_cache import PhraseCache
+
+
+def render(tmp_path, name, seconds=0.1):
+    # Stand-in for a pyttsx3 save_to_file result
+    path = tmp_path / f"{name}.tmp.wav"
+    write_wav(path, 0.1 * np.ones(int(seconds * 16000)))
+    return path
+
+
+def test_hit_after_add(tmp_path):
+    cache = PhraseCache(tmp_path / "cache")
+    assert cache.get("Invalid move") is None
+    assert cache.add("Invalid move", render(tmp_path, "a"))
+
+    samples, rate = cache.get("Invalid move")
+    assert rate == 16000 and len(samples) == 1600
+    assert "Invalid move" in cache
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_voice_is_part_of_the_key(tmp_path):
+    PhraseCache(tmp_path / "cache", voice="rate=180").add("Ready", render(tmp_path, "a"))
+    assert "Ready" not in PhraseCache(tmp_path / "cache", voice="rate=220")
+    assert "Ready" in PhraseCache(tmp_path / "cache", voice="rate=180")
+
+
+def test_disk_lru_eviction(tmp_path):
+    size = os.path.getsize(render(tmp_path, "probe"))
+    cache = PhraseCache(tmp_path / "cache", max_disk_bytes=int(2.5 * size))
+    cache.add("one", render(tmp_path, "1"))
+    cache.add("two", render(tmp_path, "2"))
+    cache.get("one")  # "two" is now least recently used
+    cache.add("three", render(tmp_path, "3"))
+
+    assert "one" in cache and "three" in cache
+    assert "two" not in cache
+    assert len(list((tmp_path / "cache").glob("*.wav"))) == 2
+
+
+def test_memory_bound(tmp_path):
+    cache = PhraseCache(tmp_path / "cache", max_memory_bytes=5000)
+    for name in ["a", "b", "c"]:
+        cache.add(name, render(tmp_path, name))  # 3200 bytes each
+    assert cache.stats()["memory_entries"] == 1
+    assert cache.stats()["disk_entries"] == 3
+    # Still served from disk
+    assert cache.get("a") is not None
+
+
+def test_frequent_phrases_survive_restart(tmp_path):
+    cache = PhraseCache(tmp_path / "cache")
+    for name in ["Moved e4", "Moved d4", "Ready"]:
+        cache.add(name, render(tmp_path, name.replace(" ", "_")))
+    for _ in range(3):
+        cache.get("Moved d4")
+    cache.get("Ready")
+    cache.flush()
+
+    reopened = PhraseCache(tmp_path / "cache")
+    assert reopened.frequent(2) == ["Moved d4", "Ready"]
+    assert reopened.preload(["Ready", "Invalid move"]) == ["Invalid move"]
+    assert reopened.stats()["memory_entries"] == 1
+
+
+def test_render_cut_short_is_not_an_entry(tmp_path):
+    cache = PhraseCache(tmp_path / "cache")
+    render(cache.tmp_dir, "crashed", seconds=1.0)
+
+    reopened = PhraseCache(tmp_path / "cache")
+    assert reopened.stats()["disk_entries"] == 0 and reopened.stats()["disk_bytes"] == 0
+    assert list(reopened.tmp_dir.iterdir()) == []
+    assert reopened.add("Ready", render(reopened.tmp_dir, "a"))
+    assert reopened.stats()["disk_entries"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+import io
+import chess.pgn
+import numpy as np
+from app.orchestrator import Orchestrator, Session
+from app.recorder import SessionLog, SessionRecorder, LOG, replay
+from app.tracing import Tracer
+from chess_rules.game_interface import GameState
+from tests.test_orchestrator import FakeTTS, ScriptedRecognizer, StreamedGame, intent, speech_file
+
+
+def test_records_a_game_through_the_pipeline(tmp_path):
+    recorder = SessionRecorder(tmp_path / "session")
+    game = GameState()
+    recognizer = ScriptedRecognizer(["e4", "banana", "knight to c six"])
+    orchestrator = Orchestrator(recognizer, intent, Session(game, FakeTTS(), Tracer(), recorder=recorder))
+
+    asyncio.run(orchestrator.run(speech_file(tmp_path, 3)))
+    recorder.close()
+
+    log = SessionLog(tmp_path / "session")
+    assert [g["game"] for g in log.games()] == [1]
+    first, missed, second = log.records(1)[1:]
+    assert (first["ply"], first["transcript"], first["played"]) == (0, "e4", ["e2e4"])
+    assert missed["ply"] == 1 and missed["played"] == []
+    assert second["played"] == ["b8c6"] and second["fen"] == game.board.fen()
+    # Random access by ply, and the audio comes back
+    assert [r["transcript"] for r in log.records(1, ply=1)] == ["banana", "knight to c six"]
+    assert len(log.audio(first)) > 0
+
+    pgn = log.to_pgn(1)
+    assert "1. e4" in pgn and "Nc6" in pgn
+    assert '"banana"' in pgn
+
+
+def test_server_moves_and_result(tmp_path):
+    recorder = SessionRecorder(tmp_path)
+    game = StreamedGame()
+    game.board.push_san("f3")
+    session = Session(game, FakeTTS(), recorder=recorder)
+
+    session.handle_event({"move": "e7e5"})
+    trace = session.tracer.create(transcript="g4")
+    session.handle("g4", "move", trace)
+    session.finish(trace)
+    session.handle_event({"move": "d8h4"})
+    recorder.close()
+
+    log = SessionLog(tmp_path)
+    types = [(r["type"], r["ply"]) for r in log.records(1)]
+    assert types == [("game", 0), ("move", 0), ("move", 1), ("utterance", 2), ("move", 3), ("result", 4)]
+    assert log.records(1)[-1]["result"] == "0-1"
+    pgn = chess.pgn.read_game(io.StringIO(log.to_pgn(1)))
+    assert pgn.board().variation_san(pgn.mainline_moves()) == "1. f3 e5 2. g4 Qh4#"
+    assert pgn.headers["Result"] == "0-1"
+
+
+def test_reopening_drops_a_partial_line(tmp_path):
+    recorder = SessionRecorder(tmp_path)
+    recorder.start_game()
+    recorder.result(1, 0, "*")
+    recorder.close()
+    with open(tmp_path / LOG, "ab") as f:
+        f.write(b'{"type":"move","game":1,"pl')
+
+    recorder = SessionRecorder(tmp_path)
+    assert recorder.start_game() == 2
+    recorder.close()
+
+    log = SessionLog(tmp_path)
+    assert [r["type"] for r in log.records()] == ["game", "result", "game"]
+    assert (tmp_path / LOG).read_bytes().count(b"\n") == 3
+
+
+def test_replay_reproduces_recorded_outcomes(tmp_path):
+    recorder = SessionRecorder(tmp_path, keep_audio=False)
+    game = GameState()
+    session = Session(game, FakeTTS(), recorder=recorder)
+    for text in ["e4", "e5", "knight f3", "resign please", "knight c6"]:
+        trace = session.tracer.create(transcript=text)
+        session.handle(text, intent.predict(text), trace)
+        session.finish(trace, np.zeros(160, dtype=np.float32))
+    recorder.close()
+
+    results = replay(SessionLog(tmp_path), 1, intent)
+    assert [r["ply"] for r in results] == [0, 1, 2, 3, 3]
+    assert not any(r["changed"] for r in results)
+    assert results[-1]["replayed"]["played"] == ["b8c6"]
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from app.orchestrator import Orchestrator
+from app.sessions import SessionManager, parse_board
+from app.shared_models import BatchWorker, SharedModels
+from chess_rules.game_interface import GameState
+from tests.test_orchestrator import FakeTTS, ScriptedRecognizer, intent, speech_file
+
+
+def manager_with(boards, recognizer=None):
+    recognizer = recognizer or ScriptedRecognizer([])
+    recognizer.board = recognizer.board_lock = None
+    manager = SessionManager(SharedModels(recognizer, intent), FakeTTS())
+    games = [GameState() for _ in range(boards)]
+    for game in games:
+        manager.add(game)
+    return manager, games
+
+
+def test_parse_board():
+    assert parse_board("Board two, knight f3") == ("2", "knight f3")
+    assert parse_board("on board 12 e4") == ("12", "e4")
+    assert parse_board("game alice castle") == ("alice", "castle")
+    assert parse_board("board three") == ("3", "")
+    assert parse_board("knight f3") == (None, "knight f3")
+
+
+def test_commands_are_routed_by_board():
+    manager, (first, second) = manager_with(2)
+
+    async def play():
+        assert await manager.command("board two, e4")
+        # No board named: the one spoken to last
+        assert await manager.command("knight to c six")
+        assert await manager.command("board 1 d4")
+        assert await manager.command("d4", name="2")
+
+    asyncio.run(play())
+    assert [m.uci() for m in first.board.move_stack] == ["d2d4"]
+    assert [m.uci() for m in second.board.move_stack] == ["e2e4", "b8c6", "d2d4"]
+    assert manager.focus is manager.sessions["1"]
+    assert manager.models.recognizer.board is first.board
+    manager.models.close()
+
+
+def test_clarification_is_kept_per_board():
+    manager, (first, second) = manager_with(2)
+    first.update_from_fen("4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1")
+    session = manager.sessions["1"]
+
+    async def play():
+        await manager.command("knight d2")
+        assert session.waiting_for_clarification
+        await manager.command("board two e4")
+        await manager.command("board one, the one on f1")
+
+    asyncio.run(play())
+    assert not session.waiting_for_clarification
+    assert first.board.peek().uci() == "f1d2"
+    assert second.board.peek().uci() == "e2e4"
+    manager.models.close()
+
+
+def test_batch_worker_batches_waiting_requests():
+    started, release = threading.Event(), threading.Event()
+    sizes = []
+
+    def run_batch(items):
+        started.set()
+        release.wait(5)
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    worker = BatchWorker(run_batch, max_batch=4)
+    first = worker.submit(0)
+    started.wait(5)
+    # Queued while the first batch runs: taken together, four at a time
+    rest = [worker.submit(n) for n in range(1, 7)]
+    release.set()
+
+    assert first.result(5) == 0
+    assert [f.result(5) for f in rest] == [2, 4, 6, 8, 10, 12]
+    assert sizes == [1, 4, 2]
+    worker.close()
+    assert worker.stats()["mean_batch"] == 7 / 3
+
+
+def test_pipeline_with_several_boards(tmp_path):
+    recognizer = ScriptedRecognizer(["board two e4", "e5", "board three"])
+    manager, (first, second) = manager_with(2, recognizer)
+    manager.add(GameState(), name="3")
+
+    asyncio.run(Orchestrator(recognizer, intent, manager).run(speech_file(tmp_path, 3)))
+
+    assert first.board.move_stack == []
+    assert [m.uci() for m in second.board.move_stack] == ["e2e4", "e7e5"]
+    assert manager.focus is manager.sessions["3"]
+    assert manager.tts.said[-1] == "Board 3"
+    manager.models.close()
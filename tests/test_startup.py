@@ -0,0 +1,32 @@
+from app.startup import ModelWarmup
+
+
+class Component:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.load_timings = {"load": 0.001}
+        self.warm = False
+
+    def load_model(self):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("model file missing")
+
+    def warmup(self):
+        self.warm = True
+
+
+def test_failures_are_reported_and_retried():
+    flaky = Component(failures=1)
+    warmup = ModelWarmup({"whisper": flaky, "intent": Component()})
+    warmup.start()
+    assert warmup.wait(5)
+
+    assert warmup.ready and not warmup.ok
+    assert list(warmup.errors) == ["whisper"]
+    assert "FAILED whisper: OSError: model file missing" in warmup.report()
+
+    warmup.retry()
+    assert warmup.wait(5)
+    assert warmup.ok and flaky.warm
+    assert "FAILED" not in warmup.report()
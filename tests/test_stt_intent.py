@@ -1,4 +1,154 @@
-from voice_input import speech_to_text as stt
-from voice_input import intent_classifier as ic
+import importlib
+import sys
+import threading
+import types
+import chess
+import numpy as np
+import pytest
+from app.tracing import Tracer
+from voice_input.audio_capture import FileSource, SAMPLE_RATE
+from voice_input.cascade import DecodingCascade
+from tests.test_audio_capture import write_wav, utterance, silence
 
-# TODO: Implement testing
\ No newline at end of file
+
+class FakeMicrophone:
+    def __init__(self, device_index=None, sample_rate=None):
+        self.device_index = device_index
+
+    @staticmethod
+    def list_microphone_names():
+        return ["Built-in Microphone", "USB Headset"]
+
+
+class FakeWhisper:
+    """Stands in for faster_whisper.WhisperModel: script(audio) -> (text, avg_logprob)."""
+
+    def __init__(self, script):
+        self.script = script
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        text, avg_logprob = self.script(audio)
+        segments = []
+        if text:
+            segments.append(types.SimpleNamespace(
+                text=f" {text}", tokens=[1] * len(text.split()), avg_logprob=avg_logprob, no_speech_prob=0.05
+            ))
+        return iter(segments), None
+
+
+@pytest.fixture
+def stt(monkeypatch):
+    # speech_recognition is only needed for the microphone
+    monkeypatch.setitem(sys.modules, "speech_recognition",
+                        types.SimpleNamespace(Microphone=FakeMicrophone, AudioData=object))
+    monkeypatch.delitem(sys.modules, "voice_input.speech_to_text", raising=False)
+    return importlib.import_module("voice_input.speech_to_text")
+
+
+def recognizer(stt, script, **kwargs):
+    recognizer = stt.SpeechRecognizer(preload=False, **kwargs)
+    recognizer.model = FakeWhisper(script)
+    return recognizer
+
+
+def spoken(audio):
+    # Seconds of tone in the buffer
+    return np.sum(np.abs(audio) > 0.1) / SAMPLE_RATE
+
+
+def test_transcribe_primes_the_decoder_with_legal_moves(stt):
+    board = chess.Board()
+    r = recognizer(stt, lambda audio: ("e4", -0.2) if spoken(audio) else (None, None),
+                   board=board, board_lock=threading.Lock())
+
+    assert r.transcribe(utterance(0.5)) == "e4"
+    assert r.transcribe(silence(0.5)) is None
+    call = r.model.calls[0]
+    assert call["beam_size"] == 1 and call["vad_filter"]
+    assert (call["initial_prompt"], call["hotwords"]) == r.decoding_context.get(board)
+
+
+def test_cascade_escalates_to_the_larger_model(stt):
+    cascade = DecodingCascade([(None, 1), ("base.en", 5)])
+    r = recognizer(stt, lambda audio: ("night of three", -1.5), cascade=cascade)
+    r.models["base.en"] = FakeWhisper(lambda audio: ("knight f3", -0.2))
+
+    assert r.transcribe(utterance(0.5)) == "knight f3"
+    assert cascade.last_tier == 1
+    assert [c["beam_size"] for c in r.model.calls] == [1]
+    assert [c["beam_size"] for c in r.models["base.en"].calls] == [5]
+
+    # Partials never escalate
+    assert r.transcribe(utterance(0.5), escalate=False) == "night of three"
+    assert len(r.models["base.en"].calls) == 1
+
+
+def test_find_mic_index(stt):
+    assert stt.SpeechRecognizer.find_mic_index("USB") == 1
+    assert stt.SpeechRecognizer.find_mic_index("Bluetooth") is None
+
+
+def test_listen_loop_traces_each_utterance(stt, tmp_path):
+    path = tmp_path / "two.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.4), silence(0.6), utterance(0.4), silence(0.6)]))
+    transcripts = iter(["e4", None])
+    r = recognizer(stt, lambda audio: (next(transcripts), -0.2))
+    heard = []
+    tracer = Tracer()
+
+    r.listen_loop(heard.append, FileSource(path), tracer=tracer)
+
+    assert heard == ["e4"]
+    metrics = tracer.prometheus()
+    assert 'handsfreechess_stage_seconds_count{stage="stt"} 2' in metrics
+    assert 'handsfreechess_utterances_total{outcome="no_speech"} 1' in metrics
+
+
+def test_listen_loop_stops_when_callback_returns_false(stt, tmp_path):
+    path = tmp_path / "two.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.4), silence(0.6), utterance(0.4), silence(0.6)]))
+    r = recognizer(stt, lambda audio: ("resign", -0.2))
+    heard = []
+
+    r.listen_loop(lambda text: heard.append(text) or False, FileSource(path))
+    assert heard == ["resign"]
+
+
+def test_listen_loop_skips_the_utterance_committed_from_a_partial(stt, tmp_path):
+    path = tmp_path / "move.wav"
+    write_wav(path, np.concatenate([silence(0.3), utterance(0.55), silence(0.8)]))
+    # The move is only heard once all of it has been spoken
+    r = recognizer(stt, lambda audio: ("e4", -0.2) if spoken(audio) > 0.45 else ("e", -0.2))
+    partials = []
+    heard = []
+
+    def on_partial(text, start):
+        partials.append((text, start))
+        return text == "e4"
+
+    r.listen_loop(heard.append, FileSource(path, realtime=True), on_partial=on_partial)
+
+    assert partials[-1][0] == "e4"
+    assert len({start for _, start in partials}) == 1
+    assert heard == []
+    assert all(c["beam_size"] == 1 for c in r.model.calls)
+
+
+def test_listen_loop_ignores_our_own_voice(stt, tmp_path):
+    path = tmp_path / "gated.wav"
+    # "TTS echo" picked up while gated, then the user speaking loudly over it
+    echo = 0.1 * utterance(0.6)
+    write_wav(path, np.concatenate([echo, 0.1 * silence(0.3), echo, 2 * utterance(0.5), silence(1.0)]))
+    r = recognizer(stt, lambda audio: ("stop", -0.2))
+    gate = threading.Event()
+    gate.set()
+    heard = []
+    barge_ins = []
+
+    r.listen_loop(heard.append, FileSource(path), gate=gate, on_barge_in=lambda: barge_ins.append(True))
+
+    assert heard == ["stop"]
+    assert len(r.model.calls) == 1
+    assert barge_ins == [True]
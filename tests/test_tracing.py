@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+from app.shared_models import BatchWorker
+from app.tracing import Tracer
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_utterance_record_and_exports(tmp_path):
+    tracer = Tracer(tmp_path)
+    tracer.begin(audio_seconds=1.2)
+    with tracer.stage("stt"):
+        time.sleep(0.01)
+    tracer.record(transcript="knight f3", intent="move", intent_score=0.91)
+    with tracer.stage("parse"):
+        pass
+    tracer.record(move="Nf3", outcome="played")
+    record = tracer.end()
+
+    assert record["stages_ms"]["stt"] >= 10
+    assert record["total_ms"] >= record["stages_ms"]["stt"]
+    assert record["move"] == "Nf3" and record["audio_seconds"] == 1.2
+
+    lines = (tmp_path / "utterances.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["transcript"] == "knight f3"
+
+    metrics = (tmp_path / "metrics.prom").read_text()
+    assert 'handsfreechess_stage_seconds_count{stage="stt"} 1' in metrics
+    assert 'handsfreechess_stage_seconds_bucket{stage="stt",le="+Inf"} 1' in metrics
+    assert 'handsfreechess_utterances_total{outcome="played"} 1' in metrics
+
+
+def test_stage_without_utterance_is_still_counted():
+    tracer = Tracer()
+    with tracer.stage("intent"):
+        pass
+    tracer.observe("tts_first_audio", 0.2)
+    assert tracer.end() is None
+    metrics = tracer.prometheus()
+    assert 'handsfreechess_stage_seconds_count{stage="intent"} 1' in metrics
+    assert 'handsfreechess_stage_seconds_bucket{stage="tts_first_audio",le="0.25"} 1' in metrics
+
+
+def test_profiler_attributes_samples_to_stage(tmp_path):
+    tracer = Tracer(tmp_path, profile=True, interval=0.001)
+    with tracer.stage("parse"):
+        busy(0.2)
+    tracer.close()
+
+    report = (tmp_path / "profile.txt").read_text()
+    assert "== parse" in report
+    assert "busy (test_tracing.py" in report
+
+
+def test_profiler_samples_the_batch_worker(tmp_path):
+    tracer = Tracer(tmp_path, profile=True, interval=0.001)
+    worker = BatchWorker(lambda items: [busy(seconds) for seconds in items], name="stt")
+    future = worker.submit(0.2, tracer, "stt")
+    with tracer.stage("stt", profile=False):
+        future.result()
+    worker.close()
+    tracer.close()
+
+    report = (tmp_path / "profile.txt").read_text()
+    assert "== stt" in report
+    assert "busy (test_tracing.py" in report
+    assert "_run (shared_models.py" in report
+
+
+def test_overlapping_async_stages_leave_nothing_active():
+    tracer = Tracer()
+    loop_thread = threading.get_ident()
+    stt_done = asyncio.Event()
+
+    async def stt():
+        with tracer.stage("stt"):
+            await asyncio.sleep(0.01)
+        stt_done.set()
+
+    async def intent():
+        await asyncio.sleep(0)
+        with tracer.stage("intent"):
+            assert tracer._active[loop_thread] == ("stt", "intent")
+            await stt_done.wait()
+            assert tracer._active[loop_thread] == ("intent",)
+
+    async def main():
+        await asyncio.gather(stt(), intent())
+
+    asyncio.run(main())
+    assert tracer._active == {}
@@ -1,3 +1,80 @@
-from voice_output import text_to_speech as tts
+import numpy as np
+from voice_output.text_to_speech import SpeechQueue, Message, URGENT, NORMAL, LOW
 
-# TODO: Implement testing
\ No newline at end of file
+
+def drain(queue):
+    texts = []
+    while (message := queue.get(timeout=0)) is not None:
+        texts.append(message.text)
+    return texts
+
+
+def test_priority_then_arrival_order():
+    queue = SpeechQueue()
+    queue.put(Message("hint", LOW))
+    queue.put(Message("first", NORMAL))
+    queue.put(Message("second", NORMAL))
+    assert drain(queue) == ["first", "second", "hint"]
+
+
+def test_urgent_drops_stale_messages():
+    queue = SpeechQueue()
+    queue.put(Message("Moved e4", NORMAL))
+    queue.put(Message("Game over", URGENT))
+    assert queue.put(Message("Black played e5", URGENT)) == 0
+
+    queue.put(Message("Moved Nf3", NORMAL))
+    assert queue.put(Message("Black played Nc6", URGENT)) == 1
+    assert drain(queue) == ["Game over", "Black played e5", "Black played Nc6"]
+
+
+def test_key_replaces_older_message():
+    queue = SpeechQueue()
+    queue.put(Message("Ten minutes left", LOW, key="clock"))
+    queue.put(Message("Which rook?", NORMAL))
+    assert queue.put(Message("Nine minutes left", LOW, key="clock")) == 1
+    assert drain(queue) == ["Which rook?", "Nine minutes left"]
+
+
+def test_drop_keeps_urgent():
+    queue = SpeechQueue()
+    queue.put(Message("Game over", URGENT))
+    queue.put(Message("Moved e4", NORMAL))
+    queue.put(Message("hint", LOW))
+    assert queue.drop(NORMAL) == 2
+    assert len(queue) == 1
+    assert drain(queue) == ["Game over"]
+
+
+def test_earcons_are_short_and_click_free():
+    from voice_output.earcons import build_earcons, EARCON_RATE, EARCONS
+
+    earcons = build_earcons()
+    assert set(earcons) == set(EARCONS) == {"accepted", "illegal", "ambiguous", "check"}
+    for samples in earcons.values():
+        assert samples.dtype == np.int16
+        assert 0 < len(samples) / EARCON_RATE <= 0.25
+        assert abs(int(samples[0])) < 500 and abs(int(samples[-1])) < 500
+        assert np.abs(samples).max() < 32767
+
+
+def test_broken_speech_driver_does_not_hang(monkeypatch, capsys):
+    import sys
+    import types
+    from voice_output.text_to_speech import TextToSpeech
+
+    def init():
+        raise RuntimeError("no SAPI5 voice")
+    monkeypatch.setitem(sys.modules, "pyttsx3", types.SimpleNamespace(init=init))
+
+    tts = TextToSpeech()
+    tts.speak("Moved e4")
+    assert tts.wait(timeout=5)
+    tts.close()
+    assert isinstance(tts.error, RuntimeError)
+    assert "[speech] Moved e4" in capsys.readouterr().out
+
+    # Once the worker has stopped, messages are printed straight away
+    tts.speak("Game over")
+    assert tts.wait(timeout=0)
+    assert "[speech] Game over" in capsys.readouterr().out
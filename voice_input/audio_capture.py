@@ -0,0 +1,440 @@
+import queue
+import threading
+import time
+import wave
+import numpy as np
+from typing import Callable, Optional
+
+# Whisper expects mono float32 audio at 16 kHz
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHUNK_SIZE = 480  # 30 ms at 16 kHz
+
+
+def pcm_to_float(data: bytes) -> np.ndarray:
+    """Convert 16-bit little-endian PCM to float32 samples in [-1.0, 1.0]."""
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+# ---------------------------------------------------------
+# Audio sources
+# ---------------------------------------------------------
+
+class AudioSource:
+    """
+    Something that produces mono float32 audio at SAMPLE_RATE.
+
+    Subclasses implement open/read/close. read() returns None once the
+    source is exhausted (files); live sources block until audio arrives.
+    """
+
+    def open(self) -> None:
+        pass
+
+    def read(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """
+    Live microphone input through an sr.Microphone opened at 16 kHz.
+
+    Args:
+        mic: speech_recognition Microphone (sample_rate must be SAMPLE_RATE)
+    """
+
+    def __init__(self, mic) -> None:
+        self.mic = mic
+        self.stream = None
+
+    def open(self) -> None:
+        self.stream = self.mic.__enter__().stream
+
+    def read(self) -> Optional[np.ndarray]:
+        return pcm_to_float(self.stream.read(self.mic.CHUNK))
+
+    def close(self) -> None:
+        if self.stream is not None:
+            self.mic.__exit__(None, None, None)
+            self.stream = None
+
+
+class FileSource(AudioSource):
+    """
+    Stand-in for the microphone that plays back a 16-bit WAV file.
+
+    Args:
+        path: WAV file to read (mono 16 kHz; other rates are resampled)
+        chunk_size: Samples returned per read
+        realtime: Sleep between chunks so audio arrives at speaking pace
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, realtime: bool = False) -> None:
+        self.path = path
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.samples = None
+        self.position = 0
+
+    def open(self) -> None:
+        with wave.open(str(self.path), "rb") as wav:
+            if wav.getsampwidth() != SAMPLE_WIDTH:
+                raise ValueError(f"{self.path}: expected 16-bit PCM")
+            samples = pcm_to_float(wav.readframes(wav.getnframes()))
+            channels = wav.getnchannels()
+            rate = wav.getframerate()
+
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        if rate != SAMPLE_RATE:
+            duration = len(samples) / rate
+            target = np.linspace(0, duration, int(duration * SAMPLE_RATE), endpoint=False)
+            samples = np.interp(target, np.arange(len(samples)) / rate, samples)
+
+        self.samples = samples.astype(np.float32)
+        self.position = 0
+        self._next_time = time.monotonic()
+
+    def read(self) -> Optional[np.ndarray]:
+        if self.position >= len(self.samples):
+            return None
+
+        chunk = self.samples[self.position:self.position + self.chunk_size]
+        self.position += len(chunk)
+
+        if self.realtime:
+            self._next_time += len(chunk) / SAMPLE_RATE
+            delay = self._next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        return chunk
+
+
+# ---------------------------------------------------------
+# Voice activity detection
+# ---------------------------------------------------------
+
+class WebRtcVAD:
+    """
+    Frame classifier backed by webrtcvad (optional dependency).
+
+    Far less fooled by fans, keyboards and music than the energy
+    threshold. Frames must be 10, 20 or 30 ms; AudioCapture feeds it
+    CHUNK_SIZE (30 ms) frames.
+
+    Args:
+        aggressiveness: 0 (keeps most audio) to 3 (most eager to call
+            a frame silence)
+    """
+
+    FRAME_SIZES = (SAMPLE_RATE // 100, SAMPLE_RATE // 50, 3 * SAMPLE_RATE // 100)
+
+    def __init__(self, aggressiveness: int = 2) -> None:
+        import webrtcvad
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def __call__(self, frame: np.ndarray) -> bool:
+        if len(frame) not in self.FRAME_SIZES:
+            return False
+        pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16)
+        return self.vad.is_speech(pcm.tobytes(), SAMPLE_RATE)
+
+
+def make_vad(kind: str = "auto") -> Optional[Callable[[np.ndarray], bool]]:
+    """
+    Frame classifier for AudioCapture.
+
+    Args:
+        kind: "webrtc", "energy" (noise-floor threshold, no dependency) or
+            "auto" (webrtc when installed)
+
+    Returns:
+        A callable taking a float32 frame, or None for the energy threshold
+    """
+    if kind == "energy":
+        return None
+    if kind == "webrtc":
+        return WebRtcVAD()
+    if kind != "auto":
+        raise ValueError(f"Unknown VAD: {kind}")
+    try:
+        return WebRtcVAD()
+    except ImportError:
+        return None
+
+
+# ---------------------------------------------------------
+# Capture thread
+# ---------------------------------------------------------
+
+class AudioCapture:
+    """
+    Background capture into a preallocated ring buffer.
+
+    The capture thread never stops reading, so audio spoken while Whisper
+    is decoding is kept. Audio is cut into 30 ms frames as it arrives; each
+    frame updates a rolling noise-floor estimate and is classified as
+    speech or not (energy threshold, or the `vad` callable). An utterance
+    ends as soon as pause_threshold seconds of non-speech follow it, so
+    decoding starts right after the user stops talking instead of waiting
+    for the phrase limit. Finished utterances are queued as sample offsets
+    and copied out of the ring on demand.
+
+    Args:
+        source: AudioSource to read from
+        buffer_seconds: Size of the ring buffer
+        phrase_time_limit: Maximum seconds per utterance
+        pause_threshold: Seconds of trailing silence that end an utterance
+        min_speech: Utterances with less speech than this (seconds) are
+            dropped (clicks, coughs)
+        energy_ratio: How far above the noise floor counts as speech
+        pre_roll: Seconds kept before the detected speech onset
+        gate: Event set while our own TTS is playing (TextToSpeech.speaking);
+            audio is then ignored unless it is loud enough to be the user
+            talking over it
+        barge_in_ratio: How far above the TTS echo level counts as barge-in
+        on_barge_in: Called when the user talks over the TTS (e.g.
+            TextToSpeech.interrupt)
+        vad: Optional frame classifier (see make_vad) used instead of the
+            energy threshold
+    """
+
+    def __init__(
+        self,
+        source: AudioSource,
+        buffer_seconds: float = 30,
+        phrase_time_limit: float = 4,
+        pause_threshold: float = 0.25,
+        min_speech: float = 0.09,
+        energy_ratio: float = 3.0,
+        pre_roll: float = 0.2,
+        gate: Optional[threading.Event] = None,
+        barge_in_ratio: float = 4.0,
+        on_barge_in: Optional[Callable[[], None]] = None,
+        vad: Optional[Callable[[np.ndarray], bool]] = None
+    ) -> None:
+        self.source = source
+        self.buffer = np.zeros(int(buffer_seconds * SAMPLE_RATE), dtype=np.float32)
+        self.phrase_limit = int(phrase_time_limit * SAMPLE_RATE)
+        self.pause_samples = int(pause_threshold * SAMPLE_RATE)
+        self.min_speech = int(min_speech * SAMPLE_RATE)
+        self.energy_ratio = energy_ratio
+        self.pre_roll = int(pre_roll * SAMPLE_RATE)
+        self.gate = gate
+        self.barge_in_ratio = barge_in_ratio
+        self.on_barge_in = on_barge_in
+        self.vad = vad
+        self.barge_ins = 0
+        self.echo_level = None
+
+        # Total samples ever written; ring position is written % len(buffer)
+        self.written = 0
+        self.noise_floor = None
+        # (start, end, speech_end) offsets of the last segment returned
+        self.last_bounds = None
+
+        self._lock = threading.Lock()
+        self._segments = queue.Queue()
+        self._thread = None
+        self._running = threading.Event()
+        self._finished = threading.Event()
+
+        # Segmenter state
+        self._speech_start = None
+        self._last_voice = 0
+        self._voiced = 0
+        self._loud_chunks = 0
+        self._partial = np.zeros(0, dtype=np.float32)
+
+    def start(self) -> None:
+        """Open the source and start the capture thread."""
+        self.source.open()
+        self._running.set()
+        self._finished.clear()
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the capture thread and close the source."""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.source.close()
+
+    def next_segment(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Block until the next utterance is available.
+
+        Returns:
+            float32 samples of the utterance, or None once the source is
+            exhausted (or on timeout)
+        """
+        while True:
+            try:
+                start, end, speech_end = self._segments.get(timeout=0.05)
+            except queue.Empty:
+                if self._finished.is_set() and self._segments.empty():
+                    return None
+                if timeout is not None:
+                    timeout -= 0.05
+                    if timeout <= 0:
+                        return None
+                continue
+
+            segment = self.read(start, end)
+            if segment is not None:
+                self.last_bounds = (start, end, speech_end)
+                return segment
+
+    @property
+    def finished(self) -> bool:
+        """True once the source is exhausted and every segment was taken."""
+        return self._finished.is_set() and self._segments.empty()
+
+    def partial(self) -> Optional[tuple[int, np.ndarray]]:
+        """
+        The utterance still being spoken, for early decoding.
+
+        Returns:
+            (start offset, samples so far), or None between utterances.
+            The start offset matches last_bounds[0] of the final segment.
+        """
+        start = self._speech_start
+        if start is None:
+            return None
+        samples = self.read(start, self.written)
+        return (start, samples) if samples is not None else None
+
+    @property
+    def trailing_silence(self) -> int:
+        """
+        Samples of non-speech since the utterance in progress last had
+        speech: the pause that will end it once it reaches pause_threshold
+        (0 between utterances).
+        """
+        if self._speech_start is None:
+            return 0
+        return self.written - self._last_voice
+
+    def read(self, start: int, end: int) -> Optional[np.ndarray]:
+        """
+        Copy samples [start, end) out of the ring buffer.
+
+        Returns:
+            The samples, or None if they were already overwritten
+        """
+        size = len(self.buffer)
+        with self._lock:
+            if self.written - start > size or end > self.written:
+                return None
+
+            first, last = start % size, end % size
+            if first < last or end == start:
+                return self.buffer[first:last].copy()
+            return np.concatenate((self.buffer[first:], self.buffer[:last]))
+
+    def _run(self) -> None:
+        try:
+            while self._running.is_set():
+                chunk = self.source.read()
+                if chunk is None:
+                    break
+                for frame in self._frames(chunk):
+                    self._write(frame)
+                    self._segment(frame)
+
+            # Flush an utterance still in progress when the source ends
+            if len(self._partial):
+                self._write(self._partial)
+                self._segment(self._partial)
+            if self._speech_start is not None:
+                self._finish()
+        finally:
+            self._finished.set()
+
+    def _frames(self, chunk: np.ndarray):
+        # Microphones deliver whatever buffer size they were opened with;
+        # segment on fixed 30 ms frames so endpointing has the same
+        # resolution (and webrtcvad gets a size it accepts)
+        if len(self._partial):
+            chunk = np.concatenate((self._partial, chunk))
+        whole = len(chunk) - len(chunk) % CHUNK_SIZE
+        self._partial = chunk[whole:]
+        for start in range(0, whole, CHUNK_SIZE):
+            yield chunk[start:start + CHUNK_SIZE]
+
+    def _finish(self) -> None:
+        if self._voiced >= self.min_speech:
+            self._segments.put((self._speech_start, self.written, self._last_voice))
+        self._speech_start = None
+
+    def _write(self, chunk: np.ndarray) -> None:
+        size = len(self.buffer)
+        with self._lock:
+            position = self.written % size
+            head = min(len(chunk), size - position)
+            self.buffer[position:position + head] = chunk[:head]
+            self.buffer[:len(chunk) - head] = chunk[head:]
+            self.written += len(chunk)
+
+    def _segment(self, chunk: np.ndarray) -> None:
+        energy = float(np.sqrt(np.mean(chunk * chunk))) if len(chunk) else 0.0
+
+        if self.noise_floor is None:
+            self.noise_floor = max(energy, 1e-4)
+
+        if self.gate is not None and not self.gate.is_set():
+            self.echo_level = None
+        elif self.gate is not None and self._speech_start is None:
+            # Our own TTS is playing: skip it (and keep it out of the noise
+            # floor) unless two chunks in a row are well above the echo
+            # level, which means the user cut in
+            if self.echo_level is None:
+                self.echo_level = max(energy, self.noise_floor)
+            threshold = max(self.echo_level, self.noise_floor * self.energy_ratio) * self.barge_in_ratio
+            if energy > threshold:
+                self._loud_chunks += 1
+            else:
+                self._loud_chunks = 0
+                self.echo_level = max(0.95 * self.echo_level + 0.05 * energy, self.noise_floor)
+            if self._loud_chunks < 2:
+                return
+            self._loud_chunks = 0
+            self.barge_ins += 1
+            if self.on_barge_in:
+                self.on_barge_in()
+            self._speech_start = max(self.written - 2 * len(chunk) - self.pre_roll, 0)
+            self._last_voice = self.written
+            self._voiced = 2 * len(chunk)
+            return
+
+        if self.vad is not None:
+            is_voice = self.vad(chunk)
+        else:
+            is_voice = energy > self.noise_floor * self.energy_ratio
+
+        if not is_voice:
+            # Rolling estimate: only quiet chunks move the floor
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * max(energy, 1e-4)
+
+        if self._speech_start is None:
+            if is_voice:
+                self._speech_start = max(self.written - len(chunk) - self.pre_roll, 0)
+                self._last_voice = self.written
+                self._voiced = len(chunk)
+            return
+
+        if is_voice:
+            self._last_voice = self.written
+            self._voiced += len(chunk)
+
+        too_long = self.written - self._speech_start >= self.phrase_limit
+        paused = self.written - self._last_voice >= self.pause_samples
+
+        if too_long or paused:
+            self._finish()
@@ -0,0 +1,218 @@
+"""
+Batch transcription of recorded utterances.
+
+Usage:
+    python -m voice_input.batch_transcribe recordings/ -o results.jsonl
+    python -m voice_input.batch_transcribe manifest.json -o results.jsonl --workers 4
+
+Input is a directory (every .wav below it) or a JSON/JSONL manifest of
+{"file": ..., "text": <reference, optional>, "fen": <position, optional>}
+entries, with paths relative to the manifest. Files are decoded in a
+process pool with one WhisperModel per worker and the CPU threads split
+between workers, using the same decoding settings as SpeechRecognizer
+(including the legal-move prompt when a FEN is given).
+
+Results stream to the output as JSON lines (transcript, avg_logprob,
+parsed move, timing) as soon as each file is done. Re-running with the
+same output resumes: files already in it are skipped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".ogg", ".m4a"}
+
+
+# ---------------------------------------------------------
+# Inputs and resume
+# ---------------------------------------------------------
+def load_entries(source: Path) -> list[dict]:
+    """Entries to transcribe from a directory or a JSON/JSONL manifest."""
+    if source.is_dir():
+        return [
+            {"file": str(path.relative_to(source)), "path": str(path)}
+            for path in sorted(source.rglob("*")) if path.suffix.lower() in AUDIO_EXTENSIONS
+        ]
+
+    text = source.read_text(encoding="utf-8")
+    if source.suffix == ".jsonl":
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        entries = json.loads(text)
+
+    for entry in entries:
+        entry["path"] = str(source.parent / entry["file"])
+    return entries
+
+
+def completed(output: Path) -> set[str]:
+    """
+    Files already in an output file. A line cut off by an interrupted
+    run is removed so appended results start on a fresh line.
+    """
+    if not output.exists():
+        return set()
+
+    data = output.read_bytes()
+    end = data.rfind(b"\n") + 1
+    if end < len(data):
+        with open(output, "r+b") as f:
+            f.truncate(end)
+
+    done = set()
+    for line in data[:end].decode("utf-8").splitlines():
+        try:
+            done.add(json.loads(line)["file"])
+        except (ValueError, KeyError):
+            continue
+    return done
+
+
+def split_threads(workers: Optional[int], cpus: Optional[int] = None) -> tuple[int, int]:
+    """
+    (workers, cpu_threads per worker). CTranslate2 stops scaling well past
+    ~4 threads per model, so by default every 4 cores get their own worker.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    workers = workers or max(1, cpus // 4)
+    return workers, max(1, cpus // workers)
+
+
+# ---------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------
+_worker = {}
+
+
+def _init_worker(model_name: str, compute_type: str, cpu_threads: int, vad_min_silence: int) -> None:
+    from faster_whisper import WhisperModel
+    from chess_rules.spoken_moves import DecodingContext
+
+    _worker["model"] = WhisperModel(
+        model_name, device="cpu", compute_type=compute_type,
+        cpu_threads=cpu_threads, num_workers=1
+    )
+    _worker["context"] = DecodingContext()
+    _worker["vad_min_silence"] = vad_min_silence
+
+
+def _load_audio(path: str):
+    # WAV goes through the same in-memory path as live audio; other
+    # formats are decoded by faster-whisper (PyAV)
+    if path.lower().endswith(".wav"):
+        from voice_input.audio_capture import FileSource
+        source = FileSource(path)
+        source.open()
+        return source.samples, len(source.samples) / 16000
+    return path, None
+
+
+def _transcribe(entry: dict) -> dict:
+    import chess
+    from voice_input import move_parser as mp
+    from chess_rules.move_index import MoveIndex
+    from voice_input.speech_to_text import decode
+
+    result = {"file": entry["file"]}
+    try:
+        audio, seconds = _load_audio(entry["path"])
+        board = chess.Board(entry["fen"]) if entry.get("fen") else None
+        hints = _worker["context"].get(board) if board is not None else None
+
+        start = time.perf_counter()
+        decoded = decode(_worker["model"], audio, _worker["vad_min_silence"], hints)
+        elapsed = time.perf_counter() - start
+
+        text = decoded["text"] or ""
+        move = None
+        if board is not None and text:
+            legal = MoveIndex(board).lookup(text)
+            move = board.san(legal) if legal else None
+        result.update({
+            "transcript": decoded["text"],
+            "avg_logprob": decoded["avg_logprob"],
+            "no_speech_prob": decoded["no_speech_prob"],
+            "parsed_move": mp.parse_move(text) if text else None,
+            "legal_move": move,
+            "decode_ms": round(1000 * elapsed, 1),
+            "audio_seconds": seconds,
+            "worker": os.getpid(),
+        })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    if "text" in entry:
+        result["reference"] = entry["text"]
+        result["exact"] = (result.get("transcript") or "").lower().strip(" .!?") \
+            == entry["text"].lower().strip(" .!?")
+    return result
+
+
+# ---------------------------------------------------------
+# Driver
+# ---------------------------------------------------------
+def run(entries: list[dict], output: Path, workers: int, cpu_threads: int,
+        model_name: str, compute_type: str, vad_min_silence: int) -> Iterator[dict]:
+    """Transcribe entries in a process pool, appending each result to output."""
+    context = multiprocessing.get_context("spawn")
+    initargs = (model_name, compute_type, cpu_threads, vad_min_silence)
+
+    with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool, \
+            open(output, "a", encoding="utf-8") as out:
+        for result in pool.imap_unordered(_transcribe, entries, chunksize=1):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            yield result
+
+
+def main():
+    from voice_input.speech_to_text import DEFAULT_MODEL, DEFAULT_COMPUTE_TYPE, DEFAULT_VAD_MIN_SILENCE
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", type=Path, help="Directory of audio files or a JSON/JSONL manifest")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="JSONL results file")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per 4 cores)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--compute-type", default=DEFAULT_COMPUTE_TYPE)
+    parser.add_argument("--vad-min-silence", type=int, default=DEFAULT_VAD_MIN_SILENCE)
+    args = parser.parse_args()
+
+    entries = load_entries(args.source)
+    done = completed(args.output)
+    todo = [entry for entry in entries if entry["file"] not in done]
+    workers, cpu_threads = split_threads(args.workers)
+    print(f"{len(entries)} files, {len(done)} already done, {len(todo)} to go "
+          f"({workers} workers x {cpu_threads} threads)")
+    if not todo:
+        return
+
+    start = time.perf_counter()
+    decode_time = audio_time = 0.0
+    errors = exact = references = 0
+    for n, result in enumerate(run(todo, args.output, workers, cpu_threads, args.model,
+                                   args.compute_type, args.vad_min_silence), 1):
+        errors += "error" in result
+        decode_time += result.get("decode_ms", 0) / 1000
+        audio_time += result.get("audio_seconds") or 0
+        if "reference" in result:
+            references += 1
+            exact += result["exact"]
+        if n % 50 == 0 or n == len(todo):
+            rate = n / (time.perf_counter() - start)
+            print(f"  {n}/{len(todo)}  {rate:.1f} files/s")
+
+    wall = time.perf_counter() - start
+    print(f"Done in {wall:.1f} s; mean decode {1000 * decode_time / len(todo):.0f} ms, "
+          f"{errors} errors")
+    if audio_time:
+        print(f"Throughput {audio_time / wall:.1f}x realtime")
+    if references:
+        print(f"Exact transcript match {exact / references:.1%} ({references} with reference)")
+
+
+if __name__ == "__main__":
+    main()
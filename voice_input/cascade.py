@@ -0,0 +1,123 @@
+import time
+from typing import Callable, Optional
+
+# Tiers, cheapest first: (model name or None for the recognizer's own
+# model, beam size)
+DEFAULT_CASCADE = [(None, 1), (None, 5), ("Systran/faster-whisper-base.en", 5)]
+
+# A tier's result is kept when it clears both thresholds (and the accept()
+# check); otherwise the next tier decodes the same audio again
+MIN_AVG_LOGPROB = -0.6
+MAX_NO_SPEECH_PROB = 0.6
+
+
+class DecodingCascade:
+    """
+    Confidence-driven escalation between Whisper decoding settings.
+
+    Every utterance is decoded by the cheapest tier first. The result is
+    kept unless it looks unreliable (low avg_logprob, high no_speech_prob)
+    or the accept() check rejects the text (e.g. it names no legal move);
+    then the next tier decodes the same audio. Per-tier usage and decode
+    cost are counted for stats().
+
+    Args:
+        tiers: (model name or None, beam size) per tier, cheapest first
+        accept: Optional check on a transcript; False escalates
+        min_avg_logprob: Lowest token-weighted avg_logprob kept
+        max_no_speech_prob: Highest no_speech_prob kept
+    """
+
+    def __init__(
+        self,
+        tiers: list[tuple[Optional[str], int]] = DEFAULT_CASCADE,
+        accept: Optional[Callable[[str], bool]] = None,
+        min_avg_logprob: float = MIN_AVG_LOGPROB,
+        max_no_speech_prob: float = MAX_NO_SPEECH_PROB
+    ) -> None:
+        self.tiers = list(tiers)
+        self.accept = accept
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech_prob = max_no_speech_prob
+
+        # Tier whose transcript was kept last, for tracing
+        self.last_tier = None
+        self._stats = [{"used": 0, "decodes": 0, "time": 0.0} for _ in self.tiers]
+        self._exhausted = 0
+
+    @property
+    def models(self) -> set[str]:
+        """Model names the tiers need besides the recognizer's own."""
+        return {name for name, _ in self.tiers if name}
+
+    def run(self, decode_tier: Callable[[Optional[str], int], dict]) -> dict:
+        """
+        Decode one utterance.
+
+        Args:
+            decode_tier: decode_tier(model name, beam size) -> result of
+                speech_to_text.decode() for the utterance
+
+        Returns:
+            The result that was kept, with its "tier". If no tier is
+            confident, the one with the best avg_logprob wins.
+        """
+        best = None
+        for tier, (name, beam_size) in enumerate(self.tiers):
+            start = time.perf_counter()
+            result = decode_tier(name, beam_size)
+            stats = self._stats[tier]
+            stats["decodes"] += 1
+            stats["time"] += time.perf_counter() - start
+            result["tier"] = tier
+
+            if self.confident(result):
+                best = result
+                break
+            if result["text"] and (best is None or result["avg_logprob"] > best["avg_logprob"]):
+                best = result
+        else:
+            self._exhausted += 1
+            best = best or result
+
+        self._stats[best["tier"]]["used"] += 1
+        self.last_tier = best["tier"]
+        return best
+
+    def confident(self, result: dict) -> bool:
+        if result["text"] is None:
+            # Nothing survived the VAD: a bigger decoder won't find speech
+            return True
+        if result["no_speech_prob"] is not None and result["no_speech_prob"] > self.max_no_speech_prob:
+            return False
+        if result["avg_logprob"] is not None and result["avg_logprob"] < self.min_avg_logprob:
+            return False
+        return self.accept is None or bool(self.accept(result["text"]))
+
+    def stats(self) -> dict:
+        """
+        How often each tier's transcript was kept, and what one decode at
+        that tier costs (the latency it adds when an utterance escalates).
+        """
+        utterances = sum(s["used"] for s in self._stats)
+        tiers = []
+        for (name, beam_size), s in zip(self.tiers, self._stats):
+            tiers.append({
+                "model": name,
+                "beam_size": beam_size,
+                "used": s["used"],
+                "used_rate": s["used"] / utterances if utterances else 0.0,
+                "decodes": s["decodes"],
+                "mean_ms": 1000 * s["time"] / s["decodes"] if s["decodes"] else 0.0,
+            })
+        return {"utterances": utterances, "exhausted": self._exhausted, "tiers": tiers}
+
+    def report(self, default_model: str = "primary") -> str:
+        stats = self.stats()
+        lines = [f"Decoding cascade: {stats['utterances']} utterances, "
+                 f"{stats['exhausted']} unsure after every tier"]
+        for tier, t in enumerate(stats["tiers"]):
+            lines.append(f"  tier {tier} {t['model'] or default_model} beam {t['beam_size']}: "
+                         f"kept {t['used_rate']:.0%} ({t['used']}), "
+                         f"{t['decodes']} decodes, {t['mean_ms']:.0f} ms each")
+        return "\n".join(lines)
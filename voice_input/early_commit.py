@@ -0,0 +1,126 @@
+import chess
+from typing import Hashable, Optional
+from voice_input import move_parser as mp
+from chess_rules.move_index import MoveIndex
+from chess_rules.spoken_moves import canonical_key
+
+
+def partial_due(samples: int, seen: int, silence: int, interval: int, pause: int) -> bool:
+    """
+    Whether the utterance in progress should be decoded again.
+
+    Args:
+        samples: Samples of the utterance so far (AudioCapture.partial())
+        seen: Samples of it already decoded
+        silence: Trailing non-speech (AudioCapture.trailing_silence)
+        interval: New samples that warrant another decode while speaking
+        pause: Trailing silence after which the speaker has probably
+            finished; must be shorter than the capture's pause_threshold
+
+    Returns:
+        True after `interval` new samples, and once as soon as the speaker
+        pauses, so the whole command is decoded before the utterance is
+        closed
+    """
+    if samples - seen >= interval:
+        return True
+    speech_end = samples - silence
+    return silence >= pause and seen < speech_end + pause
+
+
+class EarlyCommit:
+    """
+    Decides when a partial transcript is safe to act on.
+
+    While an utterance is still being spoken, its growing audio is
+    re-transcribed every few hundred milliseconds and once more as soon
+    as the speaker pauses (see SpeechRecognizer.listen_loop), and each
+    partial transcript is passed to update(). A move is committed only
+    when:
+
+    - the transcript names exactly one legal move (an exact spoken-form
+      match in the MoveIndex, or a parse_move result that is legal)
+    - no longer spoken form of any legal move starts with it, so "e4"
+      is held while "e4 takes d5" or a promotion is still possible
+    - the same move came out of `stable` consecutive partials of the
+      same utterance
+
+    The first partial holding the whole move is usually the one taken at
+    the pause, and the utterance is closed (pause_threshold) before another
+    can follow, so anything above stable=1 hands the move to the final
+    decode; the extension check above is what keeps prefixes out.
+
+    Args:
+        board: Board the moves are played on (e.g. GameState.board)
+        index: MoveIndex for that board (e.g. GameState.move_index)
+        stable: Consecutive partials that must agree before committing
+    """
+
+    def __init__(self, board: chess.Board, index: Optional[MoveIndex] = None, stable: int = 1) -> None:
+        self.board = board
+        self.index = index or MoveIndex(board)
+        self.stable = stable
+        self.commits = 0
+        self.held = 0  # partials that named a move but could still extend
+
+        self._utterance = None
+        self._move = None
+        self._streak = 0
+
+    def reset(self) -> None:
+        self._move = None
+        self._streak = 0
+
+    def candidate(self, text: str) -> Optional[chess.Move]:
+        """The single legal move text names, if it cannot still grow into another."""
+        key = canonical_key(text)
+        if not key:
+            return None
+
+        move = None
+        exact = [m for m, distance, _ in self.index.candidates(text) if distance == 0]
+        if len(exact) == 1:
+            move = exact[0]
+        elif not exact:
+            parsed = mp.parse_move(text)
+            try:
+                move = self.board.parse_san(parsed) if parsed else None
+            except ValueError:
+                move = None
+
+        if move is not None and self.index.has_extension(text):
+            self.held += 1
+            return None
+        return move
+
+    def update(self, text: str, utterance: Hashable = None) -> Optional[str]:
+        """
+        Feed the latest partial transcript of an utterance.
+
+        Args:
+            text: Transcript of the audio heard so far
+            utterance: Identifies the utterance (e.g. its start offset);
+                a new value starts a new streak
+
+        Returns:
+            SAN of the move to commit now, or None to keep listening
+        """
+        if utterance != self._utterance:
+            self._utterance = utterance
+            self.reset()
+
+        move = self.candidate(text)
+        if move is None:
+            self.reset()
+            return None
+        if move == self._move:
+            self._streak += 1
+        else:
+            self._move, self._streak = move, 1
+        if self._streak < self.stable:
+            return None
+
+        self.commits += 1
+        san = self.board.san(move)
+        self.reset()
+        return san
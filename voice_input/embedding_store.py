@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from pathlib import Path
+
+DEFAULT_STORE_DIR = Path.home() / ".cache" / "handsfreechess" / "embeddings"
+
+
+def phrase_hash(phrase: str) -> str:
+    return hashlib.sha1(phrase.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk cache of phrase embeddings for one model.
+
+    Rows live in a raw float32 file that is memory-mapped for reads and
+    only ever appended to; a small JSON index maps phrase hash -> row.
+    Files are keyed by model name, so switching models never mixes rows.
+
+    Args:
+        model_name: Encoder identifier (e.g. "all-MiniLM-L6-v2")
+        store_dir: Directory holding the store files
+    """
+
+    def __init__(self, model_name: str, store_dir: str | Path = DEFAULT_STORE_DIR) -> None:
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.dir = Path(store_dir)
+        self.data_path = self.dir / f"{slug}.f32"
+        self.index_path = self.dir / f"{slug}.json"
+
+        self.dim = None
+        self.rows = {}
+        self._matrix = None
+
+        if self.index_path.exists():
+            index = json.loads(self.index_path.read_text())
+            self.dim = index["dim"]
+            self.rows = index["rows"]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _map(self) -> np.ndarray:
+        if self._matrix is None or len(self._matrix) < len(self.rows):
+            self._matrix = np.memmap(
+                self.data_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim)
+            )
+        return self._matrix
+
+    def lookup(self, phrases: list[str]) -> tuple[dict[str, np.ndarray], list[str]]:
+        """
+        Returns:
+            ({phrase: embedding} for stored phrases, [phrases not stored])
+        """
+        found, missing = {}, []
+        matrix = self._map() if self.rows else None
+        for phrase in phrases:
+            row = self.rows.get(phrase_hash(phrase))
+            if row is None:
+                missing.append(phrase)
+            else:
+                found[phrase] = np.array(matrix[row])
+        return found, missing
+
+    def add(self, phrases: list[str], embeddings: np.ndarray) -> None:
+        """Append embeddings for new phrases and persist the index."""
+        # Skip phrases that are stored already so rows stay aligned
+        new = {}
+        for phrase, embedding in zip(phrases, embeddings):
+            key = phrase_hash(phrase)
+            if key not in self.rows:
+                new.setdefault(key, embedding)
+        if not new:
+            return
+
+        embeddings = np.ascontiguousarray(np.stack(list(new.values())), dtype=np.float32)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d embeddings, got {embeddings.shape[1]}")
+
+        # Unmap before writing: Windows refuses to truncate a mapped file.
+        # lookup() hands out copies, so this is the only reference
+        self._matrix = None
+
+        # Write at the offset the index expects; rows left over from a run 
+        # that crashed before updating the index are overwritten
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.data_path, "r+b" if self.data_path.exists() else "wb") as f:
+            f.seek(len(self.rows) * self.dim * 4)
+            f.write(embeddings.tobytes())
+            f.truncate()
+
+        for key in new:
+            self.rows[key] = len(self.rows)
+
+        # Write the index atomically so a crash never leaves it half-written
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"dim": self.dim, "rows": self.rows}))
+        os.replace(tmp, self.index_path)
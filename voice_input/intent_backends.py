@@ -0,0 +1,104 @@
+import re
+import zlib
+import numpy as np
+
+# Both backends produce L2-normalized float32 rows, so IntentClassifier can
+# score either with the same matmul. Thresholds differ because the score
+# distributions differ; each backend carries its own default.
+
+
+class MiniLMBackend:
+    """
+    SentenceTransformer encoder (all-MiniLM-L6-v2). Best accuracy on
+    free-form phrasing, but imports torch (hundreds of MB of RSS).
+    """
+
+    name = "all-MiniLM-L6-v2"
+    default_threshold = 0.5
+    # Embeddings depend only on the phrase, so they can be stored on disk
+    cacheable = True
+
+    def __init__(self) -> None:
+        self.model = None
+        self._model_class = None
+
+    def import_dependencies(self) -> None:
+        from sentence_transformers import SentenceTransformer
+        self._model_class = SentenceTransformer
+
+    def load(self) -> None:
+        self.model = self._model_class(self.name)
+
+    def fit(self, examples: list[str]) -> None:
+        pass
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32)
+
+
+class NgramBackend:
+    """
+    Character n-gram TF-IDF vectors with feature hashing, pure NumPy.
+
+    Loads in milliseconds and needs no torch. IDF weights are fitted on the
+    intent example phrases; n-grams are hashed with crc32 so vectors are
+    stable across processes.
+
+    Args:
+        ngram_range: Smallest and largest character n-gram
+        dimensions: Size of the hashed feature space
+    """
+
+    name = "char-ngram-tfidf"
+    default_threshold = 0.3
+    # IDF weights depend on the whole phrase set, and encoding is cheap
+    cacheable = False
+
+    _WORD_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, ngram_range: tuple[int, int] = (2, 4), dimensions: int = 4096) -> None:
+        self.ngram_range = ngram_range
+        self.dimensions = dimensions
+        self.idf = np.ones(dimensions, dtype=np.float32)
+
+    def import_dependencies(self) -> None:
+        pass
+
+    def load(self) -> None:
+        pass
+
+    def _features(self, text: str) -> list[int]:
+        words = self._WORD_RE.findall(text.lower())
+        grams = [f"w:{word}" for word in words]
+
+        padded = " " + " ".join(words) + " "
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+        return [zlib.crc32(gram.encode()) % self.dimensions for gram in grams]
+
+    def fit(self, examples: list[str]) -> None:
+        document_frequency = np.zeros(self.dimensions, dtype=np.float32)
+        for example in examples:
+            document_frequency[list(set(self._features(example)))] += 1
+
+        # Smoothed IDF; n-grams never seen in the examples get the max weight
+        self.idf = (np.log((1 + len(examples)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            np.add.at(vectors[row], self._features(text), 1.0)
+
+        vectors *= self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+BACKENDS = {
+    "minilm": MiniLMBackend,
+    "ngram": NgramBackend,
+}
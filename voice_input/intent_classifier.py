@@ -1,80 +1,437 @@
-from sentence_transformers import SentenceTransformer, util
+from collections import OrderedDict
+import functools
+import json
+import numpy as np
+import re
+import threading
+import time
+from pathlib import Path
+from voice_input.embedding_store import EmbeddingStore, DEFAULT_STORE_DIR
+from voice_input.intent_backends import BACKENDS
+from voice_input.model_server import DEFAULT_SOCKET, ModelClient
 # TODO: Add missing intents such as check material, and others
+
+# Inputs that are unambiguous without the transformer
+_PUNCTUATION_RE = re.compile(r"[^\w\s=+#-]")
+_SPACES_RE = re.compile(r"\s+")
+_UCI_RE = re.compile(r"[a-h][1-8]\s?[a-h][1-8]\s?[qrbn]?")
+_SAN_RE = re.compile(r"[nbrqk]?[a-h]?[1-8]?x?[a-h][1-8](=?[nbrq])?[+#]?")
+_CASTLE_RE = re.compile(r"\b(castle|castles|castling|o-o(-o)?|0-0(-0)?)\b")
+
+
+def normalize(text: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace ("E4." -> "e4")."""
+    text = _PUNCTUATION_RE.sub("", text.lower())
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+DEFAULT_PHRASES_PATH = Path(__file__).parent / "data" / "intents.json"
+USER_PHRASES_PATH = Path.home() / ".handsfreechess" / "intents.json"
+
+
+def load_phrases(*paths) -> dict[str, list[str]]:
+    """
+    Merge intent example phrases from JSON files ({intent: [phrases]}).
+    
+    Later files extend earlier ones; missing files are skipped, and so
+    are intents left without phrases (they would have no scores of their own).
+    """
+    intents = {}
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            continue
+        for intent, phrases in json.loads(path.read_text(encoding="utf-8")).items():
+            examples = intents.setdefault(intent, [])
+            examples.extend(p for p in phrases if p not in examples)
+    return {intent: examples for intent, examples in intents.items() if examples}
+
+
+def _locked(method):
+    # Sessions, the cascade's accept check and model server connections
+    # classify from different threads; the embedding cache and counters
+    # are shared
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class IntentClassifier:
-    def __init__(self) -> None:
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    def __init__(
+        self,
+        cache_size: int = 512,
+        preload: bool = True,
+        backend="minilm",
+        phrases_path=None,
+        store_dir=DEFAULT_STORE_DIR
+    ) -> None:
+        # The encoder backend is either a name from BACKENDS ("minilm", or 
+        # the torch-free "ngram") or an instance with the same interface.
+        # Its dependencies are imported in load_model(), so the fast path 
+        # works while the model is still loading.
+        # Example phrases come from data/intents.json plus the user's own 
+        # phrases file (phrases_path, default ~/.handsfreechess/intents.json).
+        # store_dir=None disables the on-disk embedding store.
+        self.backend = BACKENDS[backend]() if isinstance(backend, str) else backend
+        self.load_timings = {}
+        self._load_lock = threading.Lock()
+        self._lock = threading.RLock()
                 
-        self.intents = {
-            "castle": [
-                "castle",
-                "castle kingside",
-                "castle queenside",
-                "short castle",
-                "long castle",
-            ],
-            "move": [
-                # Natural language patterns (diverse phrasing)
-                "knight to e5",
-                "pawn takes e4",
-                "move the rook to a7",
-                "bishop captures on f3",
-                "promote to queen",
-                # Algebraic/UCI patterns
-                "knight f3",
-                "e2 e4",
-                "e7 e8 queen",
-            ],
-            "resign": [
-                "resign",
-                "I give up",
-                "forfeit the game",
-            ],
-            "draw": [
-                "offer a draw",
-                "propose draw",
-                "I want a draw",
-            ],
-            "new_game": [
-                "new game",
-                "start a new game",
-                "let's play again",
-            ],
-            "rematch": [
-                "rematch",
-                "run it back",
-                "one more game",
-            ],
-            "repeat": [
-                "repeat that",
-                "what did you say",
-                "say it again",
-            ],    
-                    
-        }
+        self.phrases_path = Path(phrases_path) if phrases_path else USER_PHRASES_PATH
+        self.intents = load_phrases(DEFAULT_PHRASES_PATH, self.phrases_path)
+        
+        # Embeddings of example phrases persist across launches
+        self.store = None
+        if store_dir is not None and getattr(self.backend, "cacheable", False):
+            self.store = EmbeddingStore(self.backend.name, store_dir)
         
-        # Pre-embed the examples 
-        self.intent_embeddings = {
-            intent: self.model.encode(examples, convert_to_tensor=True)
+        # Exact example phrases resolve without a forward pass
+        self.phrase_intents = {
+            normalize(example): intent
             for intent, examples in self.intents.items()
+            for example in examples
+        }
+        
+        self.intent_names = list(self.intents)
+        self.example_matrix = None
+        sizes = [len(self.intents[intent]) for intent in self.intent_names]
+        self.group_offsets = np.cumsum([0] + sizes[:-1])
+        
+        # LRU cache of query embeddings keyed by normalized text
+        self.cache_size = cache_size
+        self.embedding_cache = OrderedDict()
+        
+        self._stats = {
+            "calls": 0, "fast_path": 0, "cache_hits": 0, "cache_misses": 0,
+            "fast_path_time": 0.0, "cache_hit_time": 0.0, "cache_miss_time": 0.0,
         }
+        # Score and route of the last predict() ("fast_path", "cache_hit",
+        # "cache_miss"), and per text of the last predict_batch(), for tracing
+        self.last_score = None
+        self.last_path = None
+        self.last_scores = []
+        self.last_paths = []
+        
+        if preload:
+            self.load_model()
+    
+    def load_model(self) -> None:
+        """
+        Import the backend's dependencies, load the encoder and embed the 
+        examples (thread-safe, does nothing if already loaded). 
+        Timings go to self.load_timings.
+        """
+        with self._load_lock:
+            if self.example_matrix is not None:
+                return
+            
+            start = time.perf_counter()
+            self.backend.import_dependencies()
+            imported = time.perf_counter()
+            
+            self.backend.load()
+            loaded = time.perf_counter()
+            
+            # Pre-embed the examples as one normalized matrix so scoring is a 
+            # single matmul; examples are grouped by intent, offsets mark groups
+            examples = [e for intent in self.intent_names for e in self.intents[intent]]
+            self.backend.fit(examples)
+            self.example_matrix = self._encode_examples(examples)
+            
+            self.load_timings["import"] = imported - start
+            self.load_timings["load"] = loaded - imported
+            self.load_timings["embed_examples"] = time.perf_counter() - loaded
+    
+    def warmup(self) -> None:
+        """Run one uncached forward pass so the first real query is fast."""
+        self.load_model()
+        self._encode(["warm up the encoder"])
+    
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self.backend.encode(texts)
+    
+    def _encode_examples(self, examples: list[str]) -> np.ndarray:
+        """Embed example phrases, encoding only those missing from the store."""
+        if self.store is None:
+            return self._encode(examples)
+        
+        found, missing = self.store.lookup(examples)
+        if missing:
+            embeddings = self._encode(missing)
+            self.store.add(missing, embeddings)
+            found.update(zip(missing, embeddings))
+        
+        return np.stack([found[example] for example in examples]).astype(np.float32)
+    
+    @_locked
+    def add_phrase(self, intent: str, phrase: str, persist: bool = True) -> None:
+        """
+        Teach the classifier a new example phrase at runtime.
+        
+        Only the new phrase is encoded; its row is inserted into the example
+        matrix in place. With persist=True the phrase is also appended to 
+        the user's phrases file so it is there on the next launch.
+        """
+        examples = self.intents.setdefault(intent, [])
+        if phrase in examples:
+            return
+        examples.append(phrase)
+        self.phrase_intents[normalize(phrase)] = intent
+        
+        if intent not in self.intent_names:
+            self.intent_names.append(intent)
+        sizes = [len(self.intents[name]) for name in self.intent_names]
+        self.group_offsets = np.cumsum([0] + sizes[:-1])
+        
+        if self.example_matrix is not None:
+            if getattr(self.backend, "cacheable", False):
+                # Insert the row at the end of the intent's group
+                row = int(self.group_offsets[self.intent_names.index(intent)]) + len(examples) - 1
+                embedding = self._encode_examples([phrase])
+                self.example_matrix = np.insert(self.example_matrix, row, embedding[0], axis=0)
+            else:
+                # Backend weights depend on the whole phrase set (cheap to redo)
+                all_examples = [e for name in self.intent_names for e in self.intents[name]]
+                self.backend.fit(all_examples)
+                self.example_matrix = self._encode(all_examples)
+                self.embedding_cache.clear()
+        
+        if persist:
+            user_phrases = load_phrases(self.phrases_path)
+            user_phrases.setdefault(intent, []).append(phrase)
+            self.phrases_path.parent.mkdir(parents=True, exist_ok=True)
+            self.phrases_path.write_text(json.dumps(user_phrases, indent=4), encoding="utf-8")
+    
+    def fast_path(self, text: str) -> None | str:
+        """Classify obvious inputs (UCI, SAN, castling, exact example phrases)."""
+        if text in self.phrase_intents:
+            return self.phrase_intents[text]
+        if _CASTLE_RE.search(text):
+            return "castle"
+        if _UCI_RE.fullmatch(text) or _SAN_RE.fullmatch(text):
+            return "move"
+        return None
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Return the (cached) normalized embedding of normalized text."""
+        embedding = self.embedding_cache.get(text)
+        if embedding is not None:
+            self.embedding_cache.move_to_end(text)
+            self._stats["cache_hits"] += 1
+            return embedding
+        
+        embedding = self._encode([text])[0]
+        self.embedding_cache[text] = embedding
+        if len(self.embedding_cache) > self.cache_size:
+            self.embedding_cache.popitem(last=False)
+        self._stats["cache_misses"] += 1
+        return embedding
+    
+    def _intent_scores(self, normalized: str) -> np.ndarray:
+        self.load_model()
+        # One matmul against every example, then the max within each intent
+        similarities = self.example_matrix @ self.embed(normalized)
+        return np.maximum.reduceat(similarities, self.group_offsets)
     
-    def predict(self, text: str, threshold: float = 0.5) -> None | str:
-        text_emb = self.model.encode(text, convert_to_tensor=True)
+    @_locked
+    def scores(self, text: str) -> dict[str, float]:
+        """Cosine similarity of text to the closest example of each intent."""
+        return dict(zip(self.intent_names, self._intent_scores(normalize(text)).tolist()))
+    
+    @_locked
+    def predict(self, text: str, threshold: float | None = None) -> None | str:
+        """
+        Classify text into one of self.intents.
+        
+        Args:
+            text: Transcribed utterance
+            threshold: Minimum similarity to accept; defaults to the 
+                       backend's calibrated value (0.5 for MiniLM)
+        
+        Returns:
+            Intent name or None if nothing is close enough
+        """
+        if threshold is None:
+            threshold = self.backend.default_threshold
+        
+        start = time.perf_counter()
+        self._stats["calls"] += 1
+        normalized = normalize(text)
+        
+        intent = self.fast_path(normalized)
+        if intent is not None:
+            self._stats["fast_path"] += 1
+            self._stats["fast_path_time"] += time.perf_counter() - start
+            self.last_score, self.last_path = 1.0, "fast_path"
+            return intent
+        
+        hits = self._stats["cache_hits"]
+        best = self._intent_scores(normalized)
+        
+        index = int(best.argmax())
+        best_intent = self.intent_names[index]
+        best_score = float(best[index])
+        
+        path = "cache_hit" if self._stats["cache_hits"] > hits else "cache_miss"
+        self._stats[f"{path}_time"] += time.perf_counter() - start
+        self.last_score, self.last_path = best_score, path
+
+        return best_intent if best_score > threshold else None
+
+    @_locked
+    def predict_batch(self, texts: list[str], threshold: float | None = None) -> list[None | str]:
+        """
+        predict() for several texts at once (e.g. from different game
+        sessions). Texts missing from the embedding cache are encoded in
+        a single forward pass and scored with one matmul.
+
+        Returns:
+            Intent name or None per text; scores and routes per text are
+            kept in self.last_scores / self.last_paths
+        """
+        if threshold is None:
+            threshold = self.backend.default_threshold
+
+        start = time.perf_counter()
+        self._stats["calls"] += len(texts)
+        normalized = [normalize(text) for text in texts]
+        intents = [self.fast_path(text) for text in normalized]
+        scores = [1.0 if intent is not None else None for intent in intents]
+        paths = ["fast_path" if intent is not None else None for intent in intents]
+        self._stats["fast_path"] += sum(path is not None for path in paths)
+
+        rows = [i for i, path in enumerate(paths) if path is None]
+        if rows:
+            self.load_model()
+            embeddings = [None] * len(rows)
+            missing = {}
+            for n, i in enumerate(rows):
+                embedding = self.embedding_cache.get(normalized[i])
+                if embedding is not None:
+                    self.embedding_cache.move_to_end(normalized[i])
+                    self._stats["cache_hits"] += 1
+                    embeddings[n], paths[i] = embedding, "cache_hit"
+                else:
+                    missing.setdefault(normalized[i], []).append(n)
+                    paths[i] = "cache_miss"
 
-        best_intent = None
-        best_score = -1
+            if missing:
+                encoded = self._encode(list(missing))
+                for (text, positions), embedding in zip(missing.items(), encoded):
+                    for n in positions:
+                        embeddings[n] = embedding
+                    self.embedding_cache[text] = embedding
+                    if len(self.embedding_cache) > self.cache_size:
+                        self.embedding_cache.popitem(last=False)
+                self._stats["cache_misses"] += sum(len(p) for p in missing.values())
 
-        for intent, examples_emb in self.intent_embeddings.items():
-            scores = util.cos_sim(text_emb, examples_emb)
-            score = scores.max().item()
+            # (texts, examples) similarities, then the max within each intent
+            similarities = np.stack(embeddings) @ self.example_matrix.T
+            best = np.maximum.reduceat(similarities, self.group_offsets, axis=1)
+            for n, i in enumerate(rows):
+                index = int(best[n].argmax())
+                scores[i] = float(best[n, index])
+                intents[i] = self.intent_names[index] if scores[i] > threshold else None
 
-            if score > best_score:
-                best_score = score
-                best_intent = intent
+        # Batch time is shared out evenly over its texts
+        share = (time.perf_counter() - start) / max(len(texts), 1)
+        for path in paths:
+            self._stats[f"{path}_time"] += share
+        self.last_scores, self.last_paths = scores, paths
+        return intents
+
+    @_locked
+    def stats(self) -> dict:
+        """
+        Per-path call counts, hit rates and mean latency (ms).
+        """
+        s = self._stats
+        calls = max(s["calls"], 1)
+        lookups = max(s["cache_hits"] + s["cache_misses"], 1)
+        
+        def mean_ms(total, count):
+            return 1000 * total / count if count else 0.0
         
-        # Log confidence for debugging 
-        # if best_intent and best_score > threshold:
-        #     print(f"  Confidence: {best_score:.2f}")
+        return {
+            "calls": s["calls"],
+            "fast_path_rate": s["fast_path"] / calls,
+            "cache_hit_rate": s["cache_hits"] / lookups,
+            "cache_size": len(self.embedding_cache),
+            "fast_path_ms": mean_ms(s["fast_path_time"], s["fast_path"]),
+            "cache_hit_ms": mean_ms(s["cache_hit_time"], s["cache_hits"]),
+            "cache_miss_ms": mean_ms(s["cache_miss_time"], s["cache_misses"]),
+            "mean_ms": mean_ms(
+                s["fast_path_time"] + s["cache_hit_time"] + s["cache_miss_time"], calls
+            ),
+        }
 
-        return best_intent if best_score > threshold else None
-    
\ No newline at end of file
+
+class RemoteIntentClassifier:
+    """
+    Drop-in IntentClassifier whose encoder runs in a model server
+    (python -m voice_input.model_server), so this process loads no model.
+
+    Args:
+        socket_path: Unix socket of the server
+        preload: Connect now. Pass False to connect later with
+                 load_model() (e.g. on a background thread)
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, preload: bool = True) -> None:
+        self.socket_path = socket_path
+        self.client = None
+        self.load_timings = {}
+        self._load_lock = threading.Lock()
+
+        self.last_score = None
+        self.last_path = None
+        self.last_scores = []
+        self.last_paths = []
+
+        if preload:
+            self.load_model()
+
+    def load_model(self) -> None:
+        """Connect to the server (thread-safe, does nothing if connected)."""
+        with self._load_lock:
+            if self.client is not None:
+                return
+            start = time.perf_counter()
+            client = ModelClient(self.socket_path)
+            client.request("ping")
+            self.client = client
+            self.load_timings["connect"] = time.perf_counter() - start
+
+    def warmup(self) -> None:
+        self.load_model()
+        self.predict("warm up the encoder")
+
+    def predict(self, text: str, threshold: float | None = None) -> None | str:
+        """See IntentClassifier.predict."""
+        intent = self.predict_batch([text], threshold)[0]
+        self.last_score, self.last_path = self.last_scores[0], self.last_paths[0]
+        return intent
+
+    def predict_batch(self, texts: list[str], threshold: float | None = None) -> list[None | str]:
+        """See IntentClassifier.predict_batch."""
+        self.load_model()
+        reply = self.client.classify(texts, threshold)
+        self.last_scores, self.last_paths = reply["scores"], reply["paths"]
+        return reply["intents"]
+
+    def add_phrase(self, intent: str, phrase: str, persist: bool = True) -> None:
+        """Teach the server's classifier a new phrase (for every client)."""
+        self.load_model()
+        self.client.request("add_phrase", intent=intent, phrase=phrase, persist=persist)
+
+    def stats(self) -> dict:
+        """The server's IntentClassifier.stats(), over all its clients."""
+        self.load_model()
+        return self.client.request("stats")["intent"]
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
@@ -0,0 +1,367 @@
+"""
+Local inference server keeping Whisper and the intent encoder resident.
+
+Usage:
+    python -m voice_input.model_server [--socket PATH --model Systran/faster-whisper-tiny.en]
+    python -m voice_input.model_server --intent-backend ngram --no-stt
+
+Processes that would otherwise each load their own models (the app, test
+harnesses, accessibility front-ends) connect over a Unix socket with
+RemoteSpeechRecognizer / RemoteIntentClassifier instead. Requests and
+replies are length-prefixed JSON. Audio does not go through the socket:
+the client writes float32 samples into a shared memory block it owns and
+sends only the block's name and the sample count; the server decodes
+straight from that memory.
+
+Each connection is served on its own thread. Whisper and the intent
+encoder are each used by one request at a time.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_SOCKET = Path(tempfile.gettempdir()) / "handsfreechess-models.sock"
+
+# Audio block a client allocates first: 5 s at 16 kHz
+DEFAULT_AUDIO_CAPACITY = 5 * 16000
+
+_HEADER = struct.Struct("!I")
+
+# Shared memory blocks created by this process (client and server may
+# share one, e.g. in tests)
+_created = set()
+
+
+# ---------------------------------------------------------
+# Wire format
+# ---------------------------------------------------------
+def send_message(sock: socket.socket, message: dict) -> None:
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock: socket.socket) -> Optional[dict]:
+    """Next message, or None once the other side has closed."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    data = _recv_exact(sock, _HEADER.unpack(header)[0])
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer += chunk
+    return bytes(buffer)
+
+
+class SharedAudio:
+    """
+    Client-side float32 buffer in shared memory, reused between requests
+    and replaced by a larger block when an utterance doesn't fit.
+
+    Args:
+        capacity: Samples the first block holds
+    """
+
+    def __init__(self, capacity: int = DEFAULT_AUDIO_CAPACITY) -> None:
+        self.capacity = capacity
+        self.block = None
+
+    def write(self, audio: np.ndarray) -> tuple[str, int]:
+        """Copy audio into the block; returns (block name, samples)."""
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.block is None or len(audio) > self.capacity:
+            self.close()
+            self.capacity = max(self.capacity, len(audio))
+            self.block = shared_memory.SharedMemory(create=True, size=4 * self.capacity)
+            _created.add(self.block._name)
+
+        np.ndarray(len(audio), dtype=np.float32, buffer=self.block.buf)[:] = audio
+        return self.block.name, len(audio)
+
+    def close(self) -> None:
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            _created.discard(self.block._name)
+            self.block = None
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """Open a client's block without this process taking ownership of it."""
+    block = shared_memory.SharedMemory(name=name)
+    # Before Python 3.13 attaching registers the block with this process's
+    # resource tracker, which would unlink it when the server exits
+    if block._name not in _created:
+        resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+# ---------------------------------------------------------
+# Server
+# ---------------------------------------------------------
+class ModelServer:
+    """
+    Serves transcription and intent classification to other processes.
+
+    Args:
+        recognizer: Loaded SpeechRecognizer, or None to serve intents only
+        intent: Loaded IntentClassifier, or None to serve speech only
+        path: Unix socket path
+    """
+
+    def __init__(self, recognizer=None, intent=None, path=DEFAULT_SOCKET) -> None:
+        self.recognizer = recognizer
+        self.intent = intent
+        self.path = Path(path)
+        self.requests = {}
+
+        self._stt_lock = threading.Lock()
+        self._intent_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self) -> "ModelServer":
+        """Listen on the socket and serve on a background thread."""
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="model-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self.path.unlink(missing_ok=True)
+
+    def _bind(self) -> None:
+        if self.path.exists():
+            # Left over from a server that did not shut down cleanly?
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(str(self.path))
+            except ConnectionRefusedError:
+                self.path.unlink()
+            else:
+                raise OSError(f"A model server is already listening on {self.path}")
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                server._serve_connection(self.request)
+
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.path), Handler)
+        self._server.daemon_threads = True
+
+    def _serve_connection(self, sock: socket.socket) -> None:
+        blocks = {}  # client audio blocks attached on this connection
+        try:
+            while (request := recv_message(sock)) is not None:
+                op = request.get("op")
+                self.requests[op] = self.requests.get(op, 0) + 1
+                try:
+                    reply = self.handle(request, blocks)
+                except Exception as e:
+                    reply = {"error": f"{type(e).__name__}: {e}"}
+                send_message(sock, reply)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            for block in blocks.values():
+                block.close()
+
+    def handle(self, request: dict, blocks: Optional[dict] = None) -> dict:
+        """Answer one request: ping, transcribe, classify, add_phrase or stats."""
+        op = request.get("op")
+        if op == "ping":
+            return {
+                "pid": os.getpid(),
+                "stt": self.recognizer.model_name if self.recognizer else None,
+                "intent": self.intent.backend.name if self.intent else None,
+            }
+        if op == "transcribe":
+            return self._transcribe(request, {} if blocks is None else blocks)
+        if op == "classify":
+            return self._classify(request)
+        if op == "add_phrase":
+            self._require(self.intent, "intent classification")
+            with self._intent_lock:
+                self.intent.add_phrase(request["intent"], request["phrase"], request.get("persist", True))
+            return {}
+        if op == "stats":
+            stats = {"requests": dict(self.requests)}
+            if self.intent:
+                stats["intent"] = self.intent.stats()
+            if self.recognizer and getattr(self.recognizer, "cascade", None):
+                stats["cascade"] = self.recognizer.cascade.stats()
+            return stats
+        raise ValueError(f"Unknown op: {op}")
+
+    @staticmethod
+    def _require(model, what: str) -> None:
+        if model is None:
+            raise RuntimeError(f"This server does not serve {what}")
+
+    def _transcribe(self, request: dict, blocks: dict) -> dict:
+        import chess
+        self._require(self.recognizer, "speech recognition")
+
+        if "path" in request:
+            audio = request["path"]
+        else:
+            name = request["shm"]
+            if name not in blocks:
+                # The client moved to a bigger block; drop the old ones
+                for old in blocks.values():
+                    old.close()
+                blocks.clear()
+                blocks[name] = attach(name)
+            audio = np.ndarray(request["samples"], dtype=np.float32, buffer=blocks[name].buf)
+
+        board = chess.Board(request["fen"]) if request.get("fen") else None
+        start = time.perf_counter()
+        with self._stt_lock:
+            self.recognizer.board = board
+            text = self.recognizer.transcribe(audio, request.get("escalate", True))
+            tier = self.recognizer.cascade.last_tier if getattr(self.recognizer, "cascade", None) else None
+        # The view must go before the block can be closed
+        del audio
+        return {"text": text, "tier": tier, "decode_ms": 1000 * (time.perf_counter() - start)}
+
+    def _classify(self, request: dict) -> dict:
+        self._require(self.intent, "intent classification")
+        with self._intent_lock:
+            intents = self.intent.predict_batch(request["texts"], request.get("threshold"))
+            return {"intents": intents, "scores": self.intent.last_scores, "paths": self.intent.last_paths}
+
+
+# ---------------------------------------------------------
+# Client
+# ---------------------------------------------------------
+class ModelClient:
+    """
+    Connection to a ModelServer. Safe to share between threads; requests
+    are sent one at a time.
+
+    Args:
+        path: Unix socket path of the server
+        timeout: Seconds to wait for a reply (None: no limit)
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout: Optional[float] = None) -> None:
+        self.path = Path(path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(str(self.path))
+        self.audio = SharedAudio()
+        self._lock = threading.Lock()
+
+    def request(self, op: str, **fields) -> dict:
+        """Send one request and wait for the reply; server errors raise RuntimeError."""
+        with self._lock:
+            return self._exchange({"op": op, **fields})
+
+    def transcribe(self, audio, fen: Optional[str] = None, escalate: bool = True) -> dict:
+        """
+        Args:
+            audio: float32 16 kHz NumPy buffer or path to an audio file
+            fen: Position whose legal moves prime the decoder
+            escalate: Run the server's decoding cascade, if it has one
+
+        Returns:
+            {"text": str or None, "tier": cascade tier or None, "decode_ms": ...}
+        """
+        if isinstance(audio, (str, Path)):
+            return self.request("transcribe", path=str(audio), fen=fen, escalate=escalate)
+        with self._lock:
+            # The block is rewritten by the next request, so it is filled
+            # under the same lock the reply is waited for with
+            name, samples = self.audio.write(audio)
+            return self._exchange({"op": "transcribe", "shm": name, "samples": samples,
+                                   "fen": fen, "escalate": escalate})
+
+    def _exchange(self, message: dict) -> dict:
+        send_message(self.sock, message)
+        reply = recv_message(self.sock)
+        if reply is None:
+            raise ConnectionError(f"Model server at {self.path} closed the connection")
+        if "error" in reply:
+            raise RuntimeError(f"Model server: {reply['error']}")
+        return reply
+
+    def classify(self, texts: list[str], threshold: Optional[float] = None) -> dict:
+        """{"intents": [...], "scores": [...], "paths": [...]} for texts."""
+        return self.request("classify", texts=texts, threshold=threshold)
+
+    def close(self) -> None:
+        self.sock.close()
+        self.audio.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--socket", type=Path, default=DEFAULT_SOCKET)
+    parser.add_argument("--model", help="Whisper model (default: SpeechRecognizer's)")
+    parser.add_argument("--compute-type", help="Default: SpeechRecognizer's")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Escalate unsure transcripts (confidence only; see DecodingCascade)")
+    parser.add_argument("--intent-backend", default="minilm", help="minilm or ngram")
+    parser.add_argument("--no-stt", action="store_true", help="Serve intent classification only")
+    parser.add_argument("--no-intent", action="store_true", help="Serve speech recognition only")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    recognizer = intent = None
+    if not args.no_stt:
+        from voice_input.cascade import DecodingCascade
+        from voice_input.speech_to_text import SpeechRecognizer, DEFAULT_MODEL, DEFAULT_COMPUTE_TYPE
+        recognizer = SpeechRecognizer(
+            model_name=args.model or DEFAULT_MODEL,
+            compute_type=args.compute_type or DEFAULT_COMPUTE_TYPE,
+            cascade=DecodingCascade() if args.cascade else None
+        )
+        recognizer.warmup()
+    if not args.no_intent:
+        from voice_input.intent_classifier import IntentClassifier
+        intent = IntentClassifier(backend=args.intent_backend)
+        intent.warmup()
+
+    server = ModelServer(recognizer, intent, args.socket)
+    print(f"Models ready in {time.perf_counter() - start:.1f} s; listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
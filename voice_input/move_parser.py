@@ -1,53 +1,125 @@
 import re
-# TODO: (Optional) make parser more strict (ie. detecting invalid promotions, 
+# TODO: (Optional) make parser more strict (ie. detecting invalid promotions,
 # producing promotions only when user says 'promote', etc.)
-# TODO: check if replacements dict can be reduced
-# TODO: check if extract square functions can be reduced/unified
+
+# ---------------------------------------------------------
+# Vocabulary
+# ---------------------------------------------------------
+NUMBER_WORDS = {
+    'one': '1', 'two': '2', 'three': '3', 'four': '4',
+    'five': '5', 'six': '6', 'seven': '7', 'eight': '8'
+}
+
+PIECE_WORDS = {
+    "knight": "N", "knights": "N",
+    "bishop": "B", "bishops": "B",
+    "rook": "R", "rooks": "R",
+    "queen": "Q", "queens": "Q",
+    "king": "K", "kings": "K",
+    "pawn": "P", "pawns": "P",
+}
+
+CAPTURE_WORDS = {"takes", "take", "captures", "capture", "x"}
+PROMOTE_WORDS = {"promote", "promotes", "promoting", "promotion", "="}
+CASTLE_WORDS = {"castle", "castles", "castling"}
+PROMOTION_LETTERS = {"q": "Q", "r": "R", "b": "B", "n": "N"}
+
+# ---------------------------------------------------------
+# Single-pass tokenizer
+# ---------------------------------------------------------
+# One compiled pattern scans the utterance left to right. Whole words only,
+# so "queenside" or "king's" can never turn into piece letters.
+# Digits may follow the file directly ("e4", "e 4"); spelled ranks need a
+# space, or "done", "gone" and "height" would read as d1, g1 and h8
+_RANK = r"\s*[1-8]|\s+(?:one|two|three|four|five|six|seven|eight)"
+_TOKEN_RE = re.compile(
+    r"\b(?P<uci>[a-h][1-8][a-h][1-8][qrbn]?)\b"
+    r"|\b(?P<san>[NBRQK][a-h]?[1-8]?x?[a-h][1-8]|[a-h]x[a-h][1-8])(?:=?(?P<san_promo>[NBRQ]))?[+#]?(?!\w)"
+    r"|\b(?P<file>[a-h])(?P<rank>" + _RANK + r")\b"
+    r"|(?P<word>[a-z]+(?:'[a-z]+)?|=)",
+    re.IGNORECASE
+)
+_SQUARE_RE = re.compile(r"[a-h][1-8]")
+
+# Every known word resolves to its token with a single dict lookup
+_WORD_TOKENS = {
+    **{word: ("piece", letter) for word, letter in PIECE_WORDS.items()},
+    **{word: ("capture", "x") for word in CAPTURE_WORDS},
+    **{word: ("promote", "=") for word in PROMOTE_WORDS},
+    **{word: ("castle", word) for word in CASTLE_WORDS},
+    **{file: ("file", file) for file in "abcdefgh"},
+}
+
+
+def tokenize(text: str) -> list[tuple[str, str]]:
+    """
+    Split an utterance into (kind, value) tokens in a single pass.
+
+    Kinds: "uci" ("e7e8q"), "san" ("Nf3", "exd5=Q"), "square" ("e4", also
+    from "e 4" / "e four"), "piece" ("N", "P"), "file" (a lone "e"),
+    "capture", "promote", "castle" and "word" for everything else.
+    """
+    tokens = []
+    for m in _TOKEN_RE.finditer(text):
+        group = m.lastgroup
+        if group == "word":
+            word = m.group("word").lower()
+            tokens.append(_WORD_TOKENS.get(word) or ("word", word))
+        elif group == "rank":
+            rank = m.group("rank").strip().lower()
+            tokens.append(("square", m.group("file").lower() + NUMBER_WORDS.get(rank, rank)))
+        elif group == "uci":
+            tokens.append(("uci", m.group("uci").lower()))
+        else:
+            tokens.append(("san", _normalize_san(m.group("san"), m.group("san_promo"))))
+    return tokens
+
+
+def _normalize_san(san: str, promo: str | None) -> str:
+    # Lower-case piece letters come from the transcriber ("nf3"); a lower-case
+    # "b" followed by a capture is a b-file pawn ("bxc3"), otherwise a bishop
+    if san[0] in "nrqk" or (san[0] == "b" and san[1] != "x"):
+        san = san[0].upper() + san[1:]
+    return san + (f"={promo.upper()}" if promo else "")
+
 
 # ---------------------------------------------------------
 # Normalize generic commands (excluding castling)
 # ---------------------------------------------------------
 def normalize_command(text) -> str:
-    text = text.lower()
-    
-    # fix spaced squares: “e 5”, “d   4”
-    text = re.sub(r"([a-h])\s+([1-8])", r"\1\2", text)
-    
-    replacements = {
-        "takes": "x",
-        "captures": "x",
-        "take": "x",
-        "capture": "x",
-        "pawn to ": "",
-        "move ": "",
-        "go to ": "",
-        "bishop ": "b",
-        "knight ": "n",
-        "rook ": "r",
-        "queen ": "q",
-        "king ": "k"
-    }
-    
-    for k, v in replacements.items():
-        text = text.replace(k, v)
-
-    return text
+    """Token values joined by spaces, e.g. "knight takes e 5" -> "N x e5"."""
+    return " ".join(value for kind, value in tokenize(text) if kind != "word")
 
 
 # ---------------------------------------------------------
 # Promotion extraction
 # ---------------------------------------------------------
 def extract_promotion(text) -> str | None:
-    # full words
-    if "queen" in text: return "Q"
-    if "rook" in text: return "R"
-    if "bishop" in text: return "B"
-    if "knight" in text: return "N"
-
-    # short form: =q or =n
-    m = re.search(r"=([qnrb])", text)
-    if m:
-        return m.group(1).upper()
+    """
+    Promotion piece, only when it is actually a promotion: a piece named
+    after the destination square ("e8 queen"), after "promote"/"="
+    ("promote to knight", "e8=q"), or in notation ("e8=Q", "e7e8q").
+    """
+    return _promotion(tokenize(text))
+
+
+def _promotion(tokens: list[tuple[str, str]]) -> str | None:
+    seen_square = False
+    promote = False
+
+    for kind, value in tokens:
+        if kind == "uci" and len(value) == 5:
+            return value[4].upper()
+        if kind == "san" and "=" in value:
+            return value[-1]
+        if kind == "square":
+            seen_square = True
+        elif kind == "promote":
+            promote = True
+        elif kind == "piece" and value != "P" and (seen_square or promote):
+            return value
+        elif promote and value in PROMOTION_LETTERS:
+            return PROMOTION_LETTERS[value]
 
     return None
 
@@ -56,68 +128,78 @@ def extract_promotion(text) -> str | None:
 # Basic square extraction
 # ---------------------------------------------------------
 def extract_square(text: str) -> str | None:
-    match = re.search(r"[a-h][1-8]", text)
+    match = _SQUARE_RE.search(text)
     return match.group(0) if match else None
 
 def extract_square_disambiguation(text: str) -> str | None:
-    text_lower = text.lower().strip()
-    match = extract_square(text_lower)
-    if match:
-        return match
-    
-    number_words = {
-        'one': '1', 'two': '2', 'three': '3', 'four': '4',
-        'five': '5', 'six': '6', 'seven': '7', 'eight': '8'
-    }
-    
-    for word, digit in number_words.items():
-        # Match patterns like "a one", "h eight"
-        pattern = r'([a-h])\s+' + word + r'\b'
-        match = re.search(pattern, text_lower)
-        if match:
-            return f"{match.group(1)}{digit}"
-    
+    """First square mentioned ("a1", "a one", "the rook on h 8")."""
+    for kind, value in tokenize(text):
+        if kind == "square":
+            return value
+        if kind in ("uci", "san"):
+            return extract_square(value)
     return None
 
 
 # ---------------------------------------------------------
 # Main move parser combining all logic
 # ---------------------------------------------------------
-def parse_move(text) -> None | str:   
-    raw_text = text.strip().lower()
-    
-    # Detect UCI notation: exactly 4 or 5 chars.
-    m = re.fullmatch(r"([a-h][1-8])([a-h][1-8])([qnrb])?", raw_text)
-    if m:
-        from_sq = m.group(1)
-        to_sq = m.group(2)
-        promo = m.group(3)
-        if promo:
-            promo = promo.upper()
-            return f"{from_sq}{to_sq}={promo}"
-        return f"{from_sq}{to_sq}"
-    
-    # If not UCI (SAN)
-    text = normalize_command(text)
-
-    # extract target square
-    square = extract_square(text)
-    if not square:
+def parse_move(text) -> None | str:
+    """
+    Parse an utterance into SAN ("Nf3", "exd5", "e8=Q") or UCI ("e2e4",
+    "e7e8=Q"). Returns None when no move is found; castling is handled by
+    GameState.parse_castling_intent.
+    """
+    tokens = tokenize(text.strip())
+
+    # Notation spoken or transcribed as-is
+    for kind, value in tokens:
+        if kind == "uci":
+            move = value[:4]
+            return f"{move}={value[4].upper()}" if len(value) == 5 else move
+        if kind == "san":
+            return value
+
+    if any(kind == "castle" for kind, _ in tokens):
         return None
 
-    # determine piece
-    if text.startswith(("b","n","r","q","k")):
-        piece = text[0].upper()
-    else:
-        piece = ""   # pawn
-
-    # capture?
-    capture = "x" if "x" in text else ""
+    squares = [i for i, (kind, _) in enumerate(tokens) if kind == "square"]
+    if not squares:
+        return None
 
-    # promotion?
-    promotion = extract_promotion(text)
+    target = squares[-1]
+    square = tokens[target][1]
+
+    # Moving piece: first piece named before the destination square that
+    # isn't the subject of "promote to ..."
+    piece = ""
+    for kind, value in tokens[:target]:
+        if kind == "promote":
+            break
+        if kind == "piece":
+            piece = "" if value == "P" else value
+            break
+
+    capture = "x" if any(kind == "capture" for kind, _ in tokens) else ""
+
+    # Origin: another square ("g1 f3") or a pawn's file ("e takes d5")
+    origin = ""
+    if len(squares) > 1:
+        origin = tokens[squares[-2]][1]
+    elif not piece:
+        for (kind, value), (next_kind, _) in zip(tokens, tokens[1:]):
+            if kind == "file" and next_kind == "capture":
+                origin = value
+                break
+
+    promotion = _promotion(tokens) if not piece else None
+
+    # Two squares and no piece is coordinate (UCI) notation
+    if len(origin) == 2 and not piece:
+        move = f"{origin}{square}"
+    else:
+        move = f"{piece}{origin}{capture}{square}"
 
-    move = f"{piece}{capture}{square}"
     if promotion:
         move += f"={promotion}"
 
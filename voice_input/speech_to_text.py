@@ -1,61 +1,111 @@
-from faster_whisper import WhisperModel
 import speech_recognition as sr
-import os
-from typing import Optional, Callable
+import numpy as np
+import threading
+import time
+from contextlib import nullcontext
+from typing import Optional, Callable, TYPE_CHECKING
+from voice_input.audio_capture import (
+    AudioCapture, AudioSource, MicrophoneSource, make_vad, pcm_to_float, SAMPLE_RATE, SAMPLE_WIDTH
+)
+from voice_input.cascade import DecodingCascade
+from voice_input.early_commit import partial_due
+from voice_input.model_server import DEFAULT_SOCKET, ModelClient
+from chess_rules.spoken_moves import DecodingContext
 # TODO: migrate to compartmentalization, 
 # add interface for microphone selection
 
-# ------------------------------------------------
-chosen_mic = "Micrófono (Realtek HD Audio Mic input)"
-chosen_mic = "Micrófono externo (Realtek(R) Audio)"
-os.environ["PATH"] += os.pathsep + r"C:\ffmpeg\ffmpeg-8.0.1-essentials_build\bin"
-# ------------------------------------------------
+# faster_whisper pulls in ctranslate2; it is imported when the model loads
+# so importing this module has no side effects
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
 
-# Find mic index
-mic_index = 1
-for index, name in enumerate(sr.Microphone.list_microphone_names()):
-    if chosen_mic in name:
-        mic_index = index    
-    
-print("Selected index:", mic_index)
-
-if mic_index is not None:
-    mic = sr.Microphone(device_index=mic_index)
-else:
-    mic = sr.Microphone() # Fallback to default device
-    
-r = sr.Recognizer()
-model = WhisperModel(
-    "Systran/faster-whisper-tiny.en", 
-    device="cpu", 
-    compute_type="int8",
-    cpu_threads=4,
-    num_workers=1
-)
+# Decoding defaults shared by SpeechRecognizer and the batch transcriber
+DEFAULT_MODEL = "Systran/faster-whisper-tiny.en"
+DEFAULT_COMPUTE_TYPE = "int8"
+DEFAULT_VAD_MIN_SILENCE = 250
 
-while True:
-    with mic as source:
-        r.adjust_for_ambient_noise(source)
-        print("Speak...")
-        audio = r.listen(source, phrase_time_limit=4)
 
-    wav_data = audio.get_wav_data()
+def audio_to_array(audio: sr.AudioData) -> np.ndarray:
+    """
+    Convert captured audio to the float32 16 kHz buffer Whisper consumes.
+    
+    Args:
+        audio: AudioData returned by speech_recognition
+        
+    Returns:
+        1-D float32 array with samples in [-1.0, 1.0]
+    """
+    raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+    return pcm_to_float(raw)
 
-    with open("temp.wav", "wb") as f:
-        f.write(wav_data)
 
+def transcribe(
+    model: "WhisperModel", 
+    audio, 
+    vad_min_silence: int = DEFAULT_VAD_MIN_SILENCE,
+    hints: Optional[tuple[str, str]] = None
+) -> Optional[str]:
+    """
+    Transcribe audio with the decoding settings shared by every caller.
+    
+    Args:
+        model: Loaded WhisperModel
+        audio: float32 16 kHz NumPy buffer (in-memory path) or 
+               path to an audio file (decoded through ffmpeg)
+        vad_min_silence: Minimum silence duration in ms for VAD
+        hints: Optional (initial_prompt, hotwords) biasing the decoder, 
+               see DecodingContext
+        
+    Returns:
+        Transcribed text or None if no speech detected
+    """
+    return decode(model, audio, vad_min_silence, hints)["text"]
+
+
+def decode(
+    model: "WhisperModel",
+    audio,
+    vad_min_silence: int = DEFAULT_VAD_MIN_SILENCE,
+    hints: Optional[tuple[str, str]] = None,
+    beam_size: int = 1
+) -> dict:
+    """
+    Like transcribe(), but also returns the decoder's confidence.
+    
+    Returns:
+        {"text": str or None,
+         "avg_logprob": token-weighted mean over segments (None if empty),
+         "no_speech_prob": highest over segments (None if empty),
+         "segments": number of segments}
+    """
+    initial_prompt, hotwords = hints if hints else (None, None)
+    
     segments, info = model.transcribe(
-        "temp.wav", 
-        vad_filter=True, 
-        vad_parameters={"min_silence_duration_ms": 250},
-        beam_size=1,
-        best_of=1
+        audio,
+        vad_filter=True,
+        vad_parameters={"min_silence_duration_ms": vad_min_silence},
+        beam_size=beam_size,
+        best_of=1,
+        initial_prompt=initial_prompt,
+        hotwords=hotwords
     )
-
-    text = "".join(segment.text for segment in segments)
     
-    if text:
-        print("You said:", text)
+    # The generator is lazy: decoding happens while it is consumed
+    segments = list(segments)
+    text = "".join(segment.text for segment in segments).strip()
+    
+    tokens = sum(len(segment.tokens) for segment in segments)
+    avg_logprob = None
+    if tokens:
+        avg_logprob = sum(s.avg_logprob * len(s.tokens) for s in segments) / tokens
+    
+    return {
+        "text": text if text else None,
+        "avg_logprob": avg_logprob,
+        "no_speech_prob": max((s.no_speech_prob for s in segments), default=None),
+        "segments": len(segments),
+    }
+
 
 class SpeechRecognizer:
     # TODO: Enhance speed and accuracy (maybe train own specialized model for chess-specific commands(?))
@@ -69,106 +119,299 @@ class SpeechRecognizer:
         device: Device to run on ("cpu" or "cuda")
         compute_type: Compute type for model ("int8", "float16", etc.)
         phrase_time_limit: Maximum seconds to listen per phrase
+        end_silence: Seconds of trailing silence that end an utterance
+                     (streaming endpointing while listening)
+        vad: Frame classifier for endpointing: "auto", "webrtc" or "energy"
+             (see audio_capture.make_vad)
         vad_min_silence: Minimum silence duration in ms for VAD
+        board: Optional chess.Board (e.g. GameState.board). When set, the
+               decoder is primed with the spoken forms of its legal moves.
+        board_lock: Lock held while reading board, if another thread
+                    plays moves on it (e.g. GameState.lock)
+        preload: Load the Whisper model now. Pass False to load it later 
+                 with load_model() (e.g. on a background thread)
+        cascade: Optional DecodingCascade: decode with its cheapest tier 
+                 first and escalate only when unsure. Models it needs
+                 are loaded with this one and stay resident.
     """
     
     def __init__(
         self,
         mic_index: Optional[int] = None,
-        model_name: str = "Systran/faster-whisper-tiny.en",
+        model_name: str = DEFAULT_MODEL,
         device: str = "cpu",
-        compute_type: str = "int8",
+        compute_type: str = DEFAULT_COMPUTE_TYPE,
         phrase_time_limit: float = 4,
-        vad_min_silence: int = 250
+        end_silence: float = 0.25,
+        vad: str = "auto",
+        vad_min_silence: int = DEFAULT_VAD_MIN_SILENCE,
+        board=None,
+        board_lock=None,
+        preload: bool = True,
+        cascade: Optional[DecodingCascade] = None
     ):
-        self.mic_index = mic_index
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
         self.phrase_time_limit = phrase_time_limit
+        self.end_silence = end_silence
+        self.vad = vad
         self.vad_min_silence = vad_min_silence
+        self.board = board
+        self.board_lock = board_lock
+        self.decoding_context = DecodingContext()
+        
+        self.cascade = cascade
         
         # Initialize microphone
-        if mic_index is not None:
-            self.mic = sr.Microphone(device_index=mic_index)
-        else:
-            self.mic = sr.Microphone()
+        self.select_microphone(mic_index)
         
-        # Initialize recognizer
-        self.recognizer = sr.Recognizer()
+        # Whisper model (loaded now or by load_model()), plus any other
+        # model the cascade escalates to
+        self.model = None
+        self.models = {}
+        self.load_timings = {}
+        self._load_lock = threading.Lock()
         
-        # Initialize Whisper model
-        self.model = WhisperModel(
-            model_name,
-            device=device,
-            compute_type=compute_type,
+        if preload:
+            self.load_model()
+    
+    def select_microphone(self, mic_index: Optional[int]) -> None:
+        """Use the microphone at mic_index (None for the system default)."""
+        self.mic_index = mic_index
+        
+        # Opened at 16 kHz so no resampling is needed
+        if mic_index is not None:
+            self.mic = sr.Microphone(device_index=mic_index, sample_rate=SAMPLE_RATE)
+        else:
+            self.mic = sr.Microphone(sample_rate=SAMPLE_RATE)
+    
+    def load_model(self) -> None:
+        """
+        Import faster_whisper and load the Whisper model (thread-safe, 
+        does nothing if already loaded). Timings go to self.load_timings.
+        """
+        with self._load_lock:
+            if self.model is not None:
+                return
+            
+            start = time.perf_counter()
+            from faster_whisper import WhisperModel
+            imported = time.perf_counter()
+            
+            self.model = self._load(WhisperModel, self.model_name)
+            loaded = time.perf_counter()
+            
+            for name in self.cascade.models if self.cascade else ():
+                if name != self.model_name:
+                    self.models[name] = self._load(WhisperModel, name)
+            
+            self.load_timings["import"] = imported - start
+            self.load_timings["load"] = loaded - imported
+            if self.models:
+                self.load_timings["load_cascade"] = time.perf_counter() - loaded
+    
+    def _load(self, WhisperModel, name: str) -> "WhisperModel":
+        return WhisperModel(
+            name,
+            device=self.device,
+            compute_type=self.compute_type,
             cpu_threads=4,
             num_workers=1
         )
+    
+    def warmup(self) -> None:
+        """Run one decode on silence so the first real utterance is fast."""
+        self.load_model()
+        # Segments are generated lazily; consume them to actually decode
+        segments, info = self.model.transcribe(
+            np.zeros(SAMPLE_RATE, dtype=np.float32), beam_size=1
+        )
+        list(segments)
         
-        print(f"Speech recognizer initialized with mic index: {mic_index}")
-        
+    def capture(self, source: Optional[AudioSource] = None, **kwargs) -> AudioCapture:
+        """AudioCapture with the recognizer's endpointing settings."""
+        return AudioCapture(
+            source or MicrophoneSource(self.mic),
+            phrase_time_limit=self.phrase_time_limit,
+            pause_threshold=self.end_silence,
+            vad=make_vad(self.vad),
+            **kwargs
+        )
+    
     def listen_once(self) -> Optional[str]:
         """
         Listen for a single phrase and return the transcribed text.
         
+        The phrase ends end_silence seconds after the user stops talking.
+        
         Returns:
             Transcribed text or None if no speech detected
         """
         try:
-            with self.mic as source:
-                self.recognizer.adjust_for_ambient_noise(source)
-                print("Listening...")
-                audio = self.recognizer.listen(
-                    source, 
-                    phrase_time_limit=self.phrase_time_limit
-                )
-            
-            # Save audio to temp file
-            wav_data = audio.get_wav_data()
-            with open("temp.wav", "wb") as f:
-                f.write(wav_data)
-            
-            # Transcribe
-            segments, info = self.model.transcribe(
-                "temp.wav",
-                vad_filter=True,
-                vad_parameters={"min_silence_duration_ms": self.vad_min_silence},
-                beam_size=1,
-                best_of=1
-            )
+            capture = self.capture()
+            capture.start()
+            print("Listening...")
+            try:
+                segment = capture.next_segment()
+            finally:
+                capture.stop()
             
-            text = "".join(segment.text for segment in segments).strip()
-            return text if text else None
+            return self.transcribe(segment) if segment is not None else None
             
         except Exception as e:
             print(f"Error during speech recognition: {e}")
             return None
+    
+    def transcribe(self, audio, escalate: bool = True) -> Optional[str]:
+        """
+        Transcribe audio with the recognizer's decoding settings.
         
-    def listen_loop(self, callback: Optional[Callable[[str], None]] = None):
+        Args:
+            audio: float32 16 kHz NumPy buffer or path to an audio file
+            escalate: Run the cascade (if any); False always decodes once
+                      with the default settings (e.g. partial transcripts)
+            
+        Returns:
+            Transcribed text or None if no speech detected
+        """
+        self.load_model()
+        hints = None
+        if self.board is not None:
+            with self.board_lock or nullcontext():
+                hints = self.decoding_context.get(self.board)
+        if not self.cascade or not escalate:
+            return transcribe(self.model, audio, self.vad_min_silence, hints)
+        
+        def decode_tier(name: Optional[str], beam_size: int) -> dict:
+            model = self.models.get(name, self.model)
+            return decode(model, audio, self.vad_min_silence, hints, beam_size=beam_size)
+        
+        return self.cascade.run(decode_tier)["text"]
+        
+    def listen_loop(
+        self,
+        callback: Optional[Callable[[str], None]] = None,
+        source: Optional[AudioSource] = None,
+        gate: Optional[threading.Event] = None,
+        on_barge_in: Optional[Callable[[], None]] = None,
+        tracer=None,
+        on_partial: Optional[Callable[[str, int], bool]] = None,
+        partial_interval: float = 0.3,
+        partial_pause: float = 0.1
+    ):
         # TODO: Remove print when implemented
         """
         Continuously listen for speech and process it.
         
+        Audio is captured on a background thread into a ring buffer, so
+        speech keeps being recorded while earlier utterances are decoded.
+        
         Args:
             callback: Optional function to call with transcribed text.
                      If None, prints the text. Return False to stop loop.
+            source: Optional AudioSource to read from instead of the
+                    microphone (e.g. a FileSource in tests). The loop ends
+                    when the source is exhausted.
+            gate: Optional event set while TTS is playing (e.g.
+                  TextToSpeech.speaking); our own voice is not transcribed
+            on_barge_in: Called when the user talks over the TTS
+            tracer: Optional app.tracing.Tracer; each utterance is traced
+                    from segment to the end of the callback
+            on_partial: Early-commit hook. While an utterance is still being
+                    spoken it is re-transcribed every partial_interval 
+                    seconds of new audio, and once more after partial_pause
+                    seconds of silence, and on_partial(text, utterance) is
+                    called (see EarlyCommit). Return True if the command
+                    was acted on: the final segment is then skipped.
+            partial_interval: Seconds of new audio between partial decodes
+            partial_pause: Silence after which the utterance so far is
+                    decoded; shorter than end_silence, so the move can be
+                    played before the utterance is closed
         """
-        while True:
-            text = self.listen_once()
-            
-            if text:
-                if callback:
-                    # If callback returns False, stop the loop
-                    if callback(text) == False:
-                        break
+        capture = self.capture(source, gate=gate, on_barge_in=on_barge_in)
+        capture.start()
+        print("Listening...")
+        
+        committed = None
+        decoded = (None, 0)  # utterance, samples already decoded
+        
+        try:
+            while True:
+                if on_partial is None:
+                    segment = capture.next_segment()
                 else:
-                    print(f"You said: {text}")
+                    segment = capture.next_segment(timeout=partial_pause / 2)
+                    if segment is None and not capture.finished:
+                        # Still speaking: try to act on what we have so far
+                        current = capture.partial()
+                        if current is None or current[0] == committed:
+                            continue
+                        start, samples = current
+                        seen = decoded[1] if decoded[0] == start else 0
+                        if not partial_due(len(samples), seen, capture.trailing_silence,
+                                           int(partial_interval * SAMPLE_RATE), int(partial_pause * SAMPLE_RATE)):
+                            continue
+                        decoded = (start, len(samples))
+                        
+                        try:
+                            with tracer.stage("stt_partial") if tracer else nullcontext():
+                                text = self.transcribe(samples, escalate=False)
+                        except Exception as e:
+                            print(f"Error during partial recognition: {e}")
+                            continue
+                        if text and on_partial(text, start):
+                            committed = start
+                        continue
+                
+                if segment is None:
+                    break
+                if committed is not None and capture.last_bounds[0] == committed:
+                    # Already acted on from a partial transcript
+                    continue
+                
+                if tracer:
+                    # Trailing silence waited for before decoding started
+                    start, end, speech_end = capture.last_bounds
+                    tracer.begin(
+                        audio_seconds=round(len(segment) / SAMPLE_RATE, 3),
+                        endpoint_ms=round(1000 * (end - speech_end) / SAMPLE_RATE, 1)
+                    )
+                try:
+                    try:
+                        with tracer.stage("stt") if tracer else nullcontext():
+                            text = self.transcribe(segment)
+                    except Exception as e:
+                        print(f"Error during speech recognition: {e}")
+                        if tracer:
+                            tracer.record(outcome="stt_error")
+                        continue
+                    
+                    if tracer:
+                        tracer.record(transcript=text)
+                        if self.cascade:
+                            tracer.record(stt_tier=self.cascade.last_tier)
+                    if text:
+                        if callback:
+                            # If callback returns False, stop the loop
+                            if callback(text) == False:
+                                break
+                        else:
+                            print(f"You said: {text}")
+                    elif tracer:
+                        tracer.record(outcome="no_speech")
+                finally:
+                    if tracer:
+                        tracer.end()
+        finally:
+            capture.stop()
                     
     def cleanup(self):
-        """Clean up temporary files."""
-        if os.path.exists("temp.wav"):
-            try:
-                os.remove("temp.wav")
-            except Exception as e:
-                print(f"Could not remove temp.wav: {e}")
+        """
+        Kept for backwards compatibility. Audio is transcribed in memory,
+        so there are no temporary files left to remove.
+        """
+        pass
     
     @staticmethod
     def list_microphones():
@@ -192,4 +435,130 @@ class SpeechRecognizer:
         for index, name in enumerate(sr.Microphone.list_microphone_names()):
             if mic_name in name:
                 return index
-        return None
\ No newline at end of file
+        return None
+
+
+class RemoteSpeechRecognizer(SpeechRecognizer):
+    """
+    Drop-in SpeechRecognizer whose Whisper model runs in a model server
+    (python -m voice_input.model_server), so this process loads none.
+    
+    Capture and endpointing stay local; each utterance reaches the server
+    through shared memory, with the board's position for the legal-move
+    prompt. Escalation happens on the server if it was started with
+    --cascade.
+    
+    Args:
+        socket_path: Unix socket of the server
+        preload: Connect now. Pass False to connect later with 
+                 load_model() (e.g. on a background thread)
+        Other arguments as SpeechRecognizer
+    """
+    
+    def __init__(
+        self,
+        socket_path=DEFAULT_SOCKET,
+        mic_index: Optional[int] = None,
+        phrase_time_limit: float = 4,
+        end_silence: float = 0.25,
+        vad: str = "auto",
+        board=None,
+        board_lock=None,
+        preload: bool = True
+    ):
+        super().__init__(
+            mic_index,
+            phrase_time_limit=phrase_time_limit,
+            end_silence=end_silence,
+            vad=vad,
+            board=board,
+            board_lock=board_lock,
+            preload=False
+        )
+        self.socket_path = socket_path
+        self.client = None
+        # Cascade tier the server kept for the last transcript, if any
+        self.last_tier = None
+        
+        if preload:
+            self.load_model()
+    
+    def load_model(self) -> None:
+        """Connect to the server (thread-safe, does nothing if connected)."""
+        with self._load_lock:
+            if self.client is not None:
+                return
+            
+            start = time.perf_counter()
+            client = ModelClient(self.socket_path)
+            self.model_name = client.request("ping")["stt"]
+            self.client = client
+            self.load_timings["connect"] = time.perf_counter() - start
+    
+    def warmup(self) -> None:
+        """Round trip with one second of silence."""
+        self.load_model()
+        self.client.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), escalate=False)
+    
+    def transcribe(self, audio, escalate: bool = True) -> Optional[str]:
+        """See SpeechRecognizer.transcribe."""
+        self.load_model()
+        fen = None
+        if self.board is not None:
+            with self.board_lock or nullcontext():
+                fen = self.board.fen()
+        
+        reply = self.client.transcribe(audio, fen, escalate)
+        self.last_tier = reply["tier"]
+        return reply["text"]
+    
+    def cleanup(self):
+        """Close the connection and free the shared audio buffer."""
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+# ------------------------------------------------
+# Standalone microphone test: python -m voice_input.speech_to_text
+# ------------------------------------------------
+if __name__ == "__main__":
+    import os
+    from faster_whisper import WhisperModel
+    
+    chosen_mic = "Micrófono (Realtek HD Audio Mic input)"
+    chosen_mic = "Micrófono externo (Realtek(R) Audio)"
+    os.environ["PATH"] += os.pathsep + r"C:\ffmpeg\ffmpeg-8.0.1-essentials_build\bin"
+    
+    # Find mic index
+    mic_index = 1
+    for index, name in enumerate(sr.Microphone.list_microphone_names()):
+        if chosen_mic in name:
+            mic_index = index    
+    
+    print("Selected index:", mic_index)
+
+    if mic_index is not None:
+        mic = sr.Microphone(device_index=mic_index, sample_rate=SAMPLE_RATE)
+    else:
+        mic = sr.Microphone(sample_rate=SAMPLE_RATE) # Fallback to default device
+    
+    r = sr.Recognizer()
+    model = WhisperModel(
+        "Systran/faster-whisper-tiny.en", 
+        device="cpu", 
+        compute_type="int8",
+        cpu_threads=4,
+        num_workers=1
+    )
+
+    while True:
+        with mic as source:
+            r.adjust_for_ambient_noise(source)
+            print("Speak...")
+            audio = r.listen(source, phrase_time_limit=4)
+
+        text = transcribe(model, audio_to_array(audio))
+    
+        if text:
+            print("You said:", text)
@@ -0,0 +1,45 @@
+import numpy as np
+
+EARCON_RATE = 22050
+
+# Event -> notes as (frequency Hz, seconds); 0 Hz is a rest
+EARCONS = {
+    "accepted": [(880, 0.05), (1320, 0.07)],              # short rising chirp
+    "illegal": [(196, 0.16)],                             # low buzz
+    "ambiguous": [(660, 0.06), (0, 0.04), (660, 0.06)],   # two equal beeps
+    "check": [(1320, 0.04), (0, 0.03), (1320, 0.04), (0, 0.03), (1760, 0.06)],
+}
+
+
+def make_tone(notes: list[tuple[float, float]], sample_rate: int = EARCON_RATE,
+              volume: float = 0.4, fade: float = 0.005) -> np.ndarray:
+    """
+    Render a sequence of notes to 16-bit PCM.
+
+    Each note gets a short linear fade in/out so it starts and stops
+    without a click.
+    """
+    parts = []
+    for frequency, seconds in notes:
+        n = int(seconds * sample_rate)
+        if frequency <= 0:
+            parts.append(np.zeros(n, dtype=np.float32))
+            continue
+
+        t = np.arange(n, dtype=np.float32) / sample_rate
+        # A little second harmonic makes sine beeps carry better on laptop speakers
+        note = np.sin(2 * np.pi * frequency * t) + 0.3 * np.sin(4 * np.pi * frequency * t)
+
+        ramp = min(int(fade * sample_rate), n // 2)
+        envelope = np.ones(n, dtype=np.float32)
+        envelope[:ramp] = np.linspace(0, 1, ramp, endpoint=False)
+        envelope[n - ramp:] = np.linspace(1, 0, ramp)
+        parts.append((note * envelope / 1.3).astype(np.float32))
+
+    samples = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    return (samples * volume * 32767).astype(np.int16)
+
+
+def build_earcons(sample_rate: int = EARCON_RATE, volume: float = 0.4) -> dict[str, np.ndarray]:
+    """All earcons rendered once, ready to be played from memory."""
+    return {name: make_tone(notes, sample_rate, volume) for name, notes in EARCONS.items()}
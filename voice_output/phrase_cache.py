@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import threading
+import wave
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "handsfreechess" / "phrases"
+
+
+def load_wav(path: str | Path) -> tuple[np.ndarray, int]:
+    """Read a 16-bit WAV as mono int16 samples and its sample rate."""
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+class PhraseCache:
+    """
+    Rendered TTS phrases, bounded both on disk and in memory (LRU).
+
+    Audio files live in cache_dir named by a hash of the voice settings and
+    the text; file mtimes give the disk LRU order. A JSON index keeps the
+    text and hit count of every phrase so the most used ones can be loaded
+    back into memory at startup. Renders in progress go to tmp_dir, so one
+    cut short by a crash is never taken for an entry.
+
+    Thread-safe: the TTS worker renders and reads, other threads prewarm.
+
+    Args:
+        cache_dir: Directory holding the WAV files
+        voice: Anything that changes the rendered audio (rate, volume, voice)
+        max_disk_bytes: Disk budget; least recently used files are deleted
+        max_memory_bytes: Budget for decoded samples kept in memory
+    """
+
+    def __init__(self, cache_dir: str | Path = DEFAULT_CACHE_DIR, voice: str = "",
+                 max_disk_bytes: int = 50_000_000, max_memory_bytes: int = 8_000_000) -> None:
+        self.dir = Path(cache_dir)
+        self.voice = voice
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.index_path = self.dir / "index.json"
+        self.tmp_dir = self.dir / "tmp"
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (samples, rate)
+        self._memory_bytes = 0
+        self._index = {}              # key -> {"text": ..., "hits": ...}
+        self._disk = OrderedDict()    # key -> size, oldest first
+        self._disk_bytes = 0
+
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.tmp_dir.iterdir():
+            stale.unlink(missing_ok=True)
+        if self.index_path.exists():
+            try:
+                self._index = json.loads(self.index_path.read_text())
+            except (ValueError, OSError):
+                self._index = {}
+
+        files = sorted(self.dir.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._disk[path.stem] = size
+            self._disk_bytes += size
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.voice}|{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, text: str) -> Path:
+        return self.dir / f"{self.key(text)}.wav"
+
+    def __contains__(self, text: str) -> bool:
+        return self.key(text) in self._disk
+
+    # ---------------------------------------------------------
+    # Lookup
+    # ---------------------------------------------------------
+    def get(self, text: str) -> Optional[tuple[np.ndarray, int]]:
+        """Return (int16 samples, sample rate) for text, or None on a miss."""
+        key = self.key(text)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            elif key not in self._disk:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._index.setdefault(key, {"text": text, "hits": 0})["hits"] += 1
+            self._disk.move_to_end(key)
+
+        if entry is None:
+            entry = self._load(key)
+            if entry is None:
+                return None
+
+        try:
+            os.utime(self.dir / f"{key}.wav")
+        except OSError:
+            pass
+        return entry
+
+    def _load(self, key: str) -> Optional[tuple[np.ndarray, int]]:
+        try:
+            entry = load_wav(self.dir / f"{key}.wav")
+        except (OSError, ValueError, EOFError, wave.Error):
+            self._forget(key)
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    # ---------------------------------------------------------
+    # Storage
+    # ---------------------------------------------------------
+    def add(self, text: str, path: str | Path) -> bool:
+        """
+        Take ownership of a freshly rendered WAV file for text.
+
+        Returns:
+            False if the file could not be read (it is deleted)
+        """
+        key = self.key(text)
+        target = self.dir / f"{key}.wav"
+        try:
+            entry = load_wav(path)
+            os.replace(path, target)
+        except (OSError, ValueError, EOFError, wave.Error):
+            Path(path).unlink(missing_ok=True)
+            return False
+
+        size = target.stat().st_size
+        with self._lock:
+            self._disk_bytes += size - self._disk.pop(key, 0)
+            self._disk[key] = size
+            self._index.setdefault(key, {"text": text, "hits": 0})
+            self._remember(key, entry)
+            evicted = self._evict_disk()
+
+        for old in evicted:
+            (self.dir / f"{old}.wav").unlink(missing_ok=True)
+        return True
+
+    def _remember(self, key: str, entry: tuple[np.ndarray, int]) -> None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = entry
+        self._memory_bytes += entry[0].nbytes
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, (samples, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= samples.nbytes
+
+    def _evict_disk(self) -> list[str]:
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._index.pop(key, None)
+            entry = self._memory.pop(key, None)
+            if entry is not None:
+                self._memory_bytes -= entry[0].nbytes
+            evicted.append(key)
+        return evicted
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._index.pop(key, None)
+        (self.dir / f"{key}.wav").unlink(missing_ok=True)
+
+    # ---------------------------------------------------------
+    # Warm start
+    # ---------------------------------------------------------
+    def frequent(self, n: int) -> list[str]:
+        """Texts of the n most used cached phrases."""
+        with self._lock:
+            entries = [e for k, e in self._index.items() if k in self._disk]
+        entries.sort(key=lambda e: e["hits"], reverse=True)
+        return [e["text"] for e in entries[:n]]
+
+    def preload(self, texts: list[str]) -> list[str]:
+        """
+        Load cached phrases into memory.
+
+        Returns:
+            The texts that are not on disk yet (to be rendered)
+        """
+        missing = []
+        for text in texts:
+            key = self.key(text)
+            if key not in self._disk:
+                missing.append(text)
+            elif key not in self._memory:
+                self._load(key)
+        return missing
+
+    def flush(self) -> None:
+        """Write the index (texts and hit counts) to disk."""
+        with self._lock:
+            index = {k: e for k, e in self._index.items() if k in self._disk}
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index))
+        os.replace(tmp, self.index_path)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
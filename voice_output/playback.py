@@ -0,0 +1,59 @@
+import threading
+import numpy as np
+from typing import Optional
+
+FRAMES_PER_WRITE = 1024
+
+
+class AudioPlayer:
+    """
+    Plays int16 mono buffers through one PyAudio output stream kept open,
+    so playback starts within a few milliseconds (PyAudio is what
+    speech_recognition uses for the microphone). The stream is reopened
+    only when the sample rate changes.
+
+    Must be used from a single thread (the TTS worker).
+    """
+
+    def __init__(self) -> None:
+        self.sample_rate = None
+        self._audio = None
+        self._stream = None
+
+    def open(self, sample_rate: int) -> None:
+        import pyaudio
+        if self._audio is None:
+            self._audio = pyaudio.PyAudio()
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True,
+            frames_per_buffer=FRAMES_PER_WRITE
+        )
+        self.sample_rate = sample_rate
+
+    def play(self, samples: np.ndarray, sample_rate: int, stop: Optional[threading.Event] = None) -> bool:
+        """
+        Play samples, checking `stop` between small writes.
+
+        Returns:
+            False if playback was cut short by `stop`
+        """
+        if self._stream is None or sample_rate != self.sample_rate:
+            self.open(sample_rate)
+
+        for start in range(0, len(samples), FRAMES_PER_WRITE):
+            if stop is not None and stop.is_set():
+                return False
+            self._stream.write(samples[start:start + FRAMES_PER_WRITE].tobytes())
+        return True
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
@@ -1,15 +1,365 @@
-import pyttsx3
+import heapq
+import itertools
+import threading
+import time
+import os
+import tempfile
+from collections import deque
+from typing import Optional
+from voice_output.earcons import EARCON_RATE, build_earcons
+from voice_output.phrase_cache import PhraseCache
+from voice_output.playback import AudioPlayer
 # TODO: (Optional) Add functions for raising/lowering volume...
 
+# Message priorities (lower is spoken first)
+URGENT = 0   # opponent moves, game over
+NORMAL = 1   # confirmations, prompts
+LOW = 2      # hints that are fine to lose
+
+
+class Message:
+    __slots__ = ("text", "priority", "key", "audio", "queued_at")
+
+    def __init__(self, text: str, priority: int = NORMAL, key: Optional[str] = None,
+                 audio=None) -> None:
+        self.text = text
+        self.priority = priority
+        self.key = key
+        self.audio = audio  # pre-rendered earcon played instead of text
+        self.queued_at = time.monotonic()
+
+
+# ---------------------------------------------------------
+# Pending announcements
+# ---------------------------------------------------------
+
+class SpeechQueue:
+    """
+    Priority queue of announcements that drops the ones gone stale.
+
+    - A message with a key replaces queued messages with the same key
+      (e.g. only the latest "clock" update is worth saying).
+    - An URGENT message drops every queued message of lower priority; they
+      describe a position that has already moved on.
+    Equal priorities are spoken in arrival order.
+    """
+
+    def __init__(self) -> None:
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def put(self, message: Message) -> int:
+        """Queue a message. Returns how many queued messages it dropped."""
+        with self._cond:
+            before = len(self._heap)
+            if message.priority == URGENT:
+                self._heap = [e for e in self._heap if e[2].priority == URGENT]
+            if message.key is not None:
+                self._heap = [e for e in self._heap if e[2].key != message.key]
+            dropped = before - len(self._heap)
+            if dropped:
+                heapq.heapify(self._heap)
+
+            heapq.heappush(self._heap, (message.priority, next(self._order), message))
+            self._cond.notify()
+            return dropped
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Message]:
+        """Next message by priority, or None on timeout."""
+        with self._cond:
+            if not self._heap and not self._cond.wait_for(lambda: self._heap, timeout):
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def drop(self, min_priority: int = URGENT) -> int:
+        """Drop queued messages with priority >= min_priority."""
+        with self._cond:
+            before = len(self._heap)
+            self._heap = [e for e in self._heap if e[2].priority < min_priority]
+            heapq.heapify(self._heap)
+            return before - len(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+# ---------------------------------------------------------
+# Speech output worker
+# ---------------------------------------------------------
+
+def _print_message(message: Message) -> None:
+    # Fallback when nothing can be played
+    print(f"[speech] {message.text}")
+
+
 class TextToSpeech:
-    def __init__(self, rate=180, volume=1.0):
-        self.engine = pyttsx3.init()
-        self.engine.setProperty("rate", rate)
-        self.engine.setProperty("volume", volume)
-
-    def speak(self, text: str):
-        self.engine.say(text)
-        self.engine.runAndWait()
-        
-    
-        
\ No newline at end of file
+    """
+    Non-blocking speech output.
+
+    speak() queues a message and returns at once; a worker thread owns the
+    pyttsx3 engine (SAPI5 wants the engine used from the thread that
+    created it) and speaks messages in priority order.
+
+    While audio plays, `speaking` is set so the capture thread can ignore
+    our own voice (see AudioCapture's gate). interrupt() stops the current
+    sentence at the next word boundary, which is what pyttsx3 allows
+    (cached phrases and earcons stop within one small audio write).
+
+    With a PhraseCache, phrases are rendered once with save_to_file while
+    the worker is idle and later played straight from the cached buffer.
+
+    In earcon mode, routine confirmations (accepted, illegal, ambiguous,
+    check) are short tones rendered once at startup instead of sentences;
+    opponent moves and clarification prompts are still spoken.
+
+    If the speech driver cannot be started, `error` holds the reason and
+    messages without pre-rendered audio are printed instead; if the worker
+    stops altogether, speak() prints and wait() never blocks on it.
+
+    Args:
+        rate: Words per minute
+        volume: 0.0 - 1.0
+        earcons: Use tones for notify() events instead of speech
+        cache: Optional PhraseCache for rendered phrases
+        tracer: Optional app.tracing.Tracer; time to first audio is
+            reported as the "tts_first_audio" stage
+    """
+
+    def __init__(self, rate=180, volume=1.0, earcons=False, cache: Optional[PhraseCache] = None,
+                 tracer=None):
+        self.rate = rate
+        self.volume = volume
+        self.earcons = build_earcons(volume=0.4 * volume) if earcons else None
+        self.cache = cache
+        self.tracer = tracer
+        if cache is not None and not cache.voice:
+            cache.voice = f"rate={rate},volume={volume}"
+        self.queue = SpeechQueue()
+        self.speaking = threading.Event()
+
+        # Metrics
+        self.spoken = 0
+        self.dropped = 0
+        self.interrupted = 0
+        self.first_audio = deque(maxlen=100)  # seconds from speak() to audio
+
+        self._current = None
+        self._to_render = deque()
+        self._interrupt = threading.Event()
+        self._outstanding = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        self.error = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+        self._thread.start()
+
+    def speak(self, text: str, priority: int = NORMAL, key: Optional[str] = None) -> None:
+        """Queue text to be spoken and return immediately."""
+        self._enqueue(Message(text, priority, key))
+
+    def notify(self, event: str, text: Optional[str] = None, priority: int = NORMAL) -> None:
+        """
+        Confirm a routine event ("accepted", "illegal", "ambiguous", "check").
+
+        Plays the event's earcon in earcon mode, otherwise speaks text (if
+        any). Used for feedback the user only needs to recognise, not hear
+        in full.
+        """
+        if self.earcons is not None and event in self.earcons:
+            self._enqueue(Message(text or event, priority, audio=self.earcons[event]))
+        elif text:
+            self.speak(text, priority)
+
+    def _enqueue(self, message: Message) -> None:
+        with self._idle:
+            if self._stopped:
+                _print_message(message)
+                return
+            self._outstanding += 1
+            dropped = self.queue.put(message)
+        if dropped:
+            self._finished(dropped, dropped=True)
+
+        # Urgent news cuts off whatever less important sentence is playing
+        current = self._current
+        if message.priority == URGENT and current is not None and current.priority > URGENT:
+            self._interrupt.set()
+
+    def prewarm(self, texts: list[str], frequent: int = 50) -> None:
+        """
+        Load cached phrases into memory and render missing ones when idle.
+
+        Args:
+            texts: Phrases we know will be needed (fixed prompts, common
+                move announcements)
+            frequent: Also load this many of the most used cached phrases
+        """
+        if self.cache is None:
+            return
+        wanted = list(dict.fromkeys(texts + self.cache.frequent(frequent)))
+        for text in self.cache.preload(wanted):
+            self._schedule_render(text)
+
+    def _schedule_render(self, text: str) -> None:
+        if text not in self._to_render:
+            self._to_render.append(text)
+
+    def interrupt(self) -> None:
+        """
+        Barge-in: stop the current sentence and drop queued non-urgent
+        messages, since the user has started talking.
+        """
+        if self._current is not None:
+            self._interrupt.set()
+        dropped = self.queue.drop(NORMAL)
+        if dropped:
+            self._finished(dropped, dropped=True)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued has been spoken (or dropped)."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Finish what is queued, then stop the worker."""
+        self.wait(timeout)
+        self._closed = True
+        self._thread.join(timeout=1)
+        if self.cache is not None:
+            self.cache.flush()
+
+    def metrics(self) -> dict:
+        """Queue depth and time-to-first-audio (seconds) of recent messages."""
+        first_audio = sorted(self.first_audio)
+        return {
+            "queue_depth": len(self.queue),
+            "speaking": self.speaking.is_set(),
+            "spoken": self.spoken,
+            "dropped": self.dropped,
+            "interrupted": self.interrupted,
+            "first_audio_last": self.first_audio[-1] if self.first_audio else None,
+            "first_audio_p50": first_audio[len(first_audio) // 2] if first_audio else None,
+            "first_audio_max": first_audio[-1] if first_audio else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def _finished(self, count: int = 1, dropped: bool = False) -> None:
+        with self._idle:
+            self._outstanding -= count
+            if dropped:
+                self.dropped += count
+            self._idle.notify_all()
+
+    def _run(self) -> None:
+        try:
+            self._work()
+        except Exception as e:
+            print(f"Speech output stopped: {e!r}")
+            self.error = e
+        finally:
+            # Nobody will play what is still queued: print it, and don't
+            # leave wait() blocked on it
+            with self._idle:
+                self._stopped = True
+                messages = []
+                while (message := self.queue.get(timeout=0)) is not None:
+                    messages.append(message)
+            for message in messages:
+                _print_message(message)
+            if messages:
+                self._finished(len(messages), dropped=True)
+
+    def _init_engine(self):
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.setProperty("rate", self.rate)
+        engine.setProperty("volume", self.volume)
+
+        def on_word(name, location, length):
+            if self._interrupt.is_set():
+                engine.stop()
+
+        engine.connect("started-utterance", self._on_start)
+        engine.connect("started-word", on_word)
+        return engine
+
+    def _on_start(self, name) -> None:
+        # Rendering to a file fires the same callbacks but plays nothing
+        if self._current is None:
+            return
+        self.speaking.set()
+        first_audio = time.monotonic() - self._current.queued_at
+        self.first_audio.append(first_audio)
+        if self.tracer:
+            self.tracer.observe("tts_first_audio", first_audio)
+
+    def _work(self) -> None:
+        try:
+            engine = self._init_engine()
+        except Exception as e:
+            # No voice, but cached phrases and earcons can still play
+            print(f"Speech engine unavailable, printing messages instead: {e!r}")
+            self.error = e
+            engine = None
+        player = AudioPlayer()
+
+        while not self._closed:
+            message = self.queue.get(timeout=0.1)
+            if message is None:
+                # Idle: render one phrase for next time
+                if self._to_render and engine is not None:
+                    self._render(engine, self._to_render.popleft())
+                continue
+
+            self._interrupt.clear()
+            self._current = message
+            try:
+                audio = self._audio_for(message)
+                if audio is not None:
+                    self._on_start(None)
+                    player.play(*audio, stop=self._interrupt)
+                elif engine is not None:
+                    engine.say(message.text)
+                    engine.runAndWait()
+                    if self.cache is not None:
+                        self._schedule_render(message.text)
+                else:
+                    _print_message(message)
+            except Exception as e:
+                print(f"Error during speech output: {e}")
+                _print_message(message)
+            finally:
+                self.speaking.clear()
+                self._current = None
+
+            if self._interrupt.is_set():
+                self.interrupted += 1
+            else:
+                self.spoken += 1
+            self._finished()
+
+        player.close()
+
+    def _audio_for(self, message: Message) -> Optional[tuple]:
+        """Pre-rendered (samples, rate) for a message, if there is one."""
+        if message.audio is not None:
+            return message.audio, EARCON_RATE
+        if self.cache is not None:
+            return self.cache.get(message.text)
+        return None
+
+    def _render(self, engine, text: str) -> None:
+        if text in self.cache:
+            return
+        fd, path = tempfile.mkstemp(suffix=".wav", dir=self.cache.tmp_dir)
+        os.close(fd)
+        try:
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            self.cache.add(text, path)
+        except Exception as e:
+            print(f"Could not cache '{text}': {e}")
+            if os.path.exists(path):
+                os.remove(path)